@@ -50,7 +50,8 @@ class AnthropicAdapter(BaseAdapter):
         try:
             response = await self.client.post(
                 "/messages",
-                json=payload
+                json=payload,
+                **self._timeout_kwargs(request),
             )
             response.raise_for_status()
             data = response.json()
@@ -72,7 +73,8 @@ class AnthropicAdapter(BaseAdapter):
         async with self.client.stream(
             "POST",
             "/messages",
-            json=payload
+            json=payload,
+            **self._timeout_kwargs(request),
         ) as response:
             response.raise_for_status()
             
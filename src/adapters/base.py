@@ -66,6 +66,25 @@ class AdapterRequest:
     # Federation metadata
     task_id: Optional[str] = None
     routing_decision: Optional[Dict] = None
+    
+    # Seconds the whole call may take (None: adapter default)
+    timeout: Optional[float] = None
+    
+    @classmethod
+    def from_task(cls, task, **kwargs) -> "AdapterRequest":
+        """
+        Build a request for a routed Task.
+        
+        The timeout is the time left before ``task.deadline``, so a call
+        never outlives the caller's deadline.
+        """
+        kwargs.setdefault("timeout", task.remaining_seconds())
+        return cls(
+            prompt=task.prompt,
+            system_prompt=task.system_prompt,
+            task_id=task.id,
+            **kwargs,
+        )
 
 
 class BaseAdapter(ABC):
@@ -167,6 +186,12 @@ class BaseAdapter(ABC):
         
         return cost.estimate(input_tokens, output_tokens)
     
+    def _timeout_kwargs(self, request: AdapterRequest) -> Dict[str, Any]:
+        """HTTP call options enforcing the request's timeout, if any."""
+        if request.timeout is None:
+            return {}
+        return {"timeout": max(0.001, request.timeout)}
+    
     def _update_metrics(self, latency_ms: int, error: bool = False):
         """Update internal metrics."""
         self.total_requests += 1
@@ -52,7 +52,8 @@ class DeepSeekAdapter(BaseAdapter):
         try:
             response = await self.client.post(
                 "/chat/completions",
-                json=payload
+                json=payload,
+                **self._timeout_kwargs(request),
             )
             response.raise_for_status()
             data = response.json()
@@ -74,7 +75,8 @@ class DeepSeekAdapter(BaseAdapter):
         async with self.client.stream(
             "POST",
             "/chat/completions",
-            json=payload
+            json=payload,
+            **self._timeout_kwargs(request),
         ) as response:
             response.raise_for_status()
             
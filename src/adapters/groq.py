@@ -51,7 +51,8 @@ class GroqAdapter(BaseAdapter):
         try:
             response = await self.client.post(
                 "/chat/completions",
-                json=payload
+                json=payload,
+                **self._timeout_kwargs(request),
             )
             response.raise_for_status()
             data = response.json()
@@ -73,7 +74,8 @@ class GroqAdapter(BaseAdapter):
         async with self.client.stream(
             "POST",
             "/chat/completions",
-            json=payload
+            json=payload,
+            **self._timeout_kwargs(request),
         ) as response:
             response.raise_for_status()
             
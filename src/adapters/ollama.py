@@ -48,7 +48,8 @@ class OllamaAdapter(BaseAdapter):
         try:
             response = await self.client.post(
                 "/api/generate",
-                json=payload
+                json=payload,
+                **self._timeout_kwargs(request),
             )
             response.raise_for_status()
             data = response.json()
@@ -70,7 +71,8 @@ class OllamaAdapter(BaseAdapter):
         async with self.client.stream(
             "POST",
             "/api/generate",
-            json=payload
+            json=payload,
+            **self._timeout_kwargs(request),
         ) as response:
             response.raise_for_status()
             
@@ -49,7 +49,8 @@ class OpenAIAdapter(BaseAdapter):
         try:
             response = await self.client.post(
                 "/chat/completions",
-                json=payload
+                json=payload,
+                **self._timeout_kwargs(request),
             )
             response.raise_for_status()
             data = response.json()
@@ -71,7 +72,8 @@ class OpenAIAdapter(BaseAdapter):
         async with self.client.stream(
             "POST",
             "/chat/completions",
-            json=payload
+            json=payload,
+            **self._timeout_kwargs(request),
         ) as response:
             response.raise_for_status()
             
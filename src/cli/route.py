@@ -38,7 +38,8 @@ def task(
     config_path: Optional[Path] = typer.Option(None, "--config", "-c"),
     dry_run: bool = typer.Option(False, "--dry-run", "-n", help="Show routing without executing"),
     max_cost: Optional[float] = typer.Option(None, "--max-cost", help="Maximum cost in USD"),
-    max_latency: Optional[int] = typer.Option(None, "--max-latency", help="Maximum latency in ms"),
+    max_latency: Optional[int] = typer.Option(None, "--max-latency", help="Maximum p95 latency in ms"),
+    min_quality: Optional[float] = typer.Option(None, "--min-quality", help="Minimum quality score (0-1)"),
     require_functions: bool = typer.Option(False, "--functions", help="Require function calling"),
     data_residency: Optional[str] = typer.Option(None, "--data-residency", help="Data residency (us, eu, local)"),
     verbose: bool = typer.Option(False, "--verbose", "-v"),
@@ -50,6 +51,7 @@ def task(
     requirements = TaskRequirements(
         max_cost=max_cost,
         max_latency_ms=max_latency,
+        min_quality_score=min_quality,
         functions_required=require_functions,
         data_residency=data_residency,
     )
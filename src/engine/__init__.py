@@ -4,17 +4,20 @@ Federation Routing Engine
 Intelligent task routing across 50+ providers with quality-cost-latency optimization.
 """
 
-from .models import Task, TaskIntent, TaskRequirements, RoutingDecision
+from .models import Task, TaskComplexity, TaskIntent, TaskRequirements, RoutingDecision
 from .classifier import IntentClassifier
+from .complexity import ComplexityEstimator
 from .router import Router
 from .cost import CostCalculator
 
 __all__ = [
     "Task",
+    "TaskComplexity",
     "TaskIntent",
     "TaskRequirements",
     "RoutingDecision",
     "IntentClassifier",
+    "ComplexityEstimator",
     "Router",
     "CostCalculator",
 ]
@@ -0,0 +1,202 @@
+"""
+Multi-pattern keyword matching for intent classification.
+
+Aho-Corasick automaton that finds every keyword hit in a single
+linear scan, applying the same word-boundary rules as regex ``\\b``.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, List, Tuple
+
+
+def _is_word_char(ch: str) -> bool:
+    """Match the regex definition of a word character."""
+    return ch.isalnum() or ch == "_"
+
+
+@dataclass(frozen=True)
+class KeywordMatch:
+    """A single keyword hit in scanned text."""
+    label: Hashable
+    keyword: str
+    start: int
+    end: int
+
+
+@dataclass
+class ScanResult:
+    """
+    All keyword hits from one scan.
+    
+    ``counts`` holds the number of distinct keywords matched per label,
+    ``matches`` every hit in text order.
+    """
+    counts: Dict[Hashable, int] = field(default_factory=dict)
+    matches: List[KeywordMatch] = field(default_factory=list)
+    
+    def keywords_for(self, label: Hashable) -> List[str]:
+        """Distinct keywords matched for a label, in order of first hit."""
+        seen: Dict[str, None] = {}
+        for match in self.matches:
+            if match.label == label:
+                seen.setdefault(match.keyword, None)
+        return list(seen)
+    
+    def merge(self, other: "ScanResult", offset: int = 0):
+        """
+        Fold another scan's hits into this one.
+        
+        Args:
+            other: Result from scanning another region of text
+            offset: Amount to shift the other result's spans by
+        """
+        for match in other.matches:
+            if offset:
+                match = KeywordMatch(
+                    match.label, match.keyword, match.start + offset, match.end + offset
+                )
+            self.matches.append(match)
+        self.matches.sort(key=lambda m: m.start)
+        
+        counts: Dict[Hashable, int] = {}
+        for label, _ in {(m.label, m.keyword) for m in self.matches}:
+            counts[label] = counts.get(label, 0) + 1
+        self.counts = counts
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over labelled keyword lists.
+    
+    Keywords are matched case-insensitively; callers pass lowercased text.
+    A keyword may appear under several labels and counts for each.
+    """
+    
+    def __init__(self, patterns: Dict[Hashable, List[str]]):
+        """
+        Build the automaton.
+        
+        Args:
+            patterns: Mapping of label -> keywords
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+        self._keywords: List[str] = []
+        self._labels: List[Tuple[Hashable, ...]] = []
+        
+        keyword_ids: Dict[str, int] = {}
+        for label, keywords in patterns.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if not keyword:
+                    continue
+                if keyword not in keyword_ids:
+                    keyword_ids[keyword] = len(self._keywords)
+                    self._keywords.append(keyword)
+                    self._labels.append(())
+                    self._insert(keyword, keyword_ids[keyword])
+                kid = keyword_ids[keyword]
+                if label not in self._labels[kid]:
+                    self._labels[kid] += (label,)
+        
+        self._build_failure_links()
+    
+    def _insert(self, keyword: str, keyword_id: int):
+        """Add a keyword to the trie."""
+        state = 0
+        for ch in keyword:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+                self._goto[state][ch] = next_state
+            state = next_state
+        self._output[state] += (keyword_id,)
+    
+    def _build_failure_links(self):
+        """Breadth-first construction of failure links and merged outputs."""
+        queue = deque(self._goto[0].values())
+        
+        while queue:
+            state = queue.popleft()
+            for ch, child in self._goto[state].items():
+                queue.append(child)
+                
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] += self._output[self._fail[child]]
+    
+    @property
+    def keyword_count(self) -> int:
+        """Number of distinct keywords in the automaton."""
+        return len(self._keywords)
+    
+    def scan(self, text: str, start: int = 0, end: int = -1) -> ScanResult:
+        """
+        Find all keyword hits in ``text[start:end]``.
+        
+        Word boundaries are checked against the full text, so scanning a
+        window never reports a hit that is part of a longer word.
+        
+        Args:
+            text: Lowercased text to scan
+            start: First index to scan
+            end: Index to stop at (default: end of text)
+        
+        Returns:
+            ScanResult with per-label counts and matches
+        """
+        if end < 0 or end > len(text):
+            end = len(text)
+        
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        keywords = self._keywords
+        
+        result = ScanResult()
+        seen: set = set()
+        state = 0
+        
+        for i in range(start, end):
+            ch = text[i]
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            
+            if not output[state]:
+                continue
+            
+            for kid in output[state]:
+                keyword = keywords[kid]
+                hit_start = i - len(keyword) + 1
+                if hit_start < start or not self._on_boundary(text, keyword, hit_start, i + 1):
+                    continue
+                
+                for label in self._labels[kid]:
+                    result.matches.append(KeywordMatch(label, keyword, hit_start, i + 1))
+                    if (label, kid) not in seen:
+                        seen.add((label, kid))
+                        result.counts[label] = result.counts.get(label, 0) + 1
+        
+        return result
+    
+    @staticmethod
+    def _on_boundary(text: str, keyword: str, start: int, end: int) -> bool:
+        """Apply regex ``\\b`` semantics to both ends of a hit."""
+        before = _is_word_char(text[start - 1]) if start > 0 else False
+        if before == _is_word_char(keyword[0]):
+            return False
+        
+        after = _is_word_char(text[end]) if end < len(text) else False
+        if after == _is_word_char(keyword[-1]):
+            return False
+        
+        return True
@@ -0,0 +1,149 @@
+"""
+Cascade routing: try cheap providers first, escalate on failed validation.
+
+Validators inspect a provider response and decide whether it is good
+enough to return, or whether the task should move up the ladder to a
+higher-quality provider.
+"""
+
+import asyncio
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, List, Optional, Union
+
+from ..adapters.base import AdapterResponse
+from .models import Task
+
+
+# A validator receives the task and a response and returns pass/fail
+# (sync or async)
+Validator = Callable[[Task, AdapterResponse], Union[bool, Awaitable[bool]]]
+
+
+@dataclass
+class CascadeStep:
+    """One rung of a cascade attempt."""
+    provider_id: str
+    model: Optional[str]
+    passed: bool
+    failed_checks: List[str] = field(default_factory=list)
+    cost_usd: float = 0.0
+    latency_ms: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class CascadeResult:
+    """Outcome of a cascade execution."""
+    response: Optional[AdapterResponse]
+    provider_id: Optional[str]
+    validated: bool
+    steps: List[CascadeStep] = field(default_factory=list)
+    deadline_exceeded: bool = False
+    
+    @property
+    def escalations(self) -> int:
+        """Number of times the cascade moved up a rung."""
+        return max(0, len(self.steps) - 1)
+    
+    @property
+    def total_cost(self) -> float:
+        """Cost of every attempt, including rejected ones."""
+        return round(sum(s.cost_usd for s in self.steps), 6)
+
+
+def json_validator() -> Validator:
+    """Pass if the response content parses as JSON."""
+    def check(task: Task, response: AdapterResponse) -> bool:
+        try:
+            json.loads(response.content)
+        except (TypeError, ValueError):
+            return False
+        return True
+    
+    check.__name__ = "json"
+    return check
+
+
+def min_length_validator(min_chars: int) -> Validator:
+    """Pass if the stripped response has at least ``min_chars`` characters."""
+    def check(task: Task, response: AdapterResponse) -> bool:
+        return len((response.content or "").strip()) >= min_chars
+    
+    check.__name__ = f"min_length({min_chars})"
+    return check
+
+
+_CONFIDENCE_RE = re.compile(
+    r"confidence[\"']?\s*[:=]\s*([0-9]*\.?[0-9]+)\s*(%?)", re.IGNORECASE
+)
+
+
+def self_confidence_validator(threshold: float = 0.7) -> Validator:
+    """
+    Pass if the model reports a confidence at or above ``threshold``.
+    
+    Looks for ``confidence: 0.85``, ``Confidence = 85%`` or a JSON
+    ``"confidence"`` field. Responses with no reported confidence fail.
+    """
+    def check(task: Task, response: AdapterResponse) -> bool:
+        match = _CONFIDENCE_RE.search(response.content or "")
+        if not match:
+            return False
+        value = float(match.group(1))
+        if match.group(2) or value > 1.0:
+            value /= 100
+        return value >= threshold
+    
+    check.__name__ = f"self_confidence({threshold})"
+    return check
+
+
+def judge_validator(
+    judge: Callable[[Task, AdapterResponse], Union[float, Awaitable[float]]],
+    threshold: float = 0.7,
+) -> Validator:
+    """
+    Pass if a (cheap) judge scores the response at or above ``threshold``.
+    
+    Args:
+        judge: Callable returning a 0-1 score, sync or async
+        threshold: Minimum acceptable score
+    """
+    async def check(task: Task, response: AdapterResponse) -> bool:
+        score = judge(task, response)
+        if asyncio.iscoroutine(score):
+            score = await score
+        return score >= threshold
+    
+    check.__name__ = f"judge({threshold})"
+    return check
+
+
+async def run_validators(
+    validators: List[Validator],
+    task: Task,
+    response: AdapterResponse,
+) -> List[str]:
+    """
+    Run validators in order, stopping at the first failure.
+    
+    Cheap checks should come first so an expensive judge only runs on
+    responses that already passed them.
+    
+    Returns:
+        Names of the checks that failed (empty if all passed)
+    """
+    failed = []
+    for validator in validators:
+        try:
+            result: Any = validator(task, response)
+            if asyncio.iscoroutine(result):
+                result = await result
+        except Exception:
+            result = False
+        if not result:
+            failed.append(getattr(validator, "__name__", repr(validator)))
+            break
+    return failed
@@ -0,0 +1,127 @@
+"""
+Chunk-and-reduce for inputs larger than any provider's context window.
+
+The input is split into token-budgeted chunks at paragraph or line
+boundaries, each chunk is processed independently (map), and the partial
+results are combined (reduce), hierarchically if they are still too big.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from ..adapters.base import AdapterResponse
+from .compression import CHARS_PER_TOKEN
+
+
+_PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+
+
+def split_text(text: str, max_tokens: int) -> List[str]:
+    """
+    Split text into chunks of at most ``max_tokens`` (estimated).
+    
+    Breaks at paragraph boundaries where possible, then at line
+    boundaries, and only cuts mid-line for a single oversized line.
+    
+    Args:
+        text: Text to split
+        max_tokens: Token budget per chunk
+    
+    Returns:
+        Non-empty chunks in input order
+    """
+    if max_tokens <= 0:
+        raise ValueError("Chunk budget must be positive")
+    
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    
+    def flush():
+        nonlocal size
+        if current:
+            chunks.append("\n\n".join(current))
+            current.clear()
+            size = 0
+    
+    def pieces(paragraph: str):
+        if len(paragraph) <= max_chars:
+            yield paragraph
+            return
+        line_chunk: List[str] = []
+        line_size = 0
+        for line in paragraph.split("\n"):
+            while len(line) > max_chars:
+                if line_chunk:
+                    yield "\n".join(line_chunk)
+                    line_chunk, line_size = [], 0
+                yield line[:max_chars]
+                line = line[max_chars:]
+            if line_size + len(line) + 1 > max_chars and line_chunk:
+                yield "\n".join(line_chunk)
+                line_chunk, line_size = [], 0
+            line_chunk.append(line)
+            line_size += len(line) + 1
+        if line_chunk:
+            yield "\n".join(line_chunk)
+    
+    for paragraph in _PARAGRAPH_SPLIT.split(text):
+        if not paragraph.strip():
+            continue
+        for piece in pieces(paragraph):
+            if size + len(piece) + 2 > max_chars:
+                flush()
+            current.append(piece)
+            size += len(piece) + 2
+    flush()
+    
+    return chunks
+
+
+@dataclass
+class ChunkStep:
+    """One map or reduce call."""
+    stage: str                    # "map" or "reduce"
+    index: int                    # Chunk (or group) index within its round
+    provider_id: Optional[str]
+    cost_usd: float = 0.0
+    latency_ms: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class ChunkedResult:
+    """Outcome of a chunk-and-reduce execution."""
+    response: Optional[AdapterResponse]
+    chunks: int
+    chunk_tokens: int
+    steps: List[ChunkStep] = field(default_factory=list)
+    reduce_rounds: int = 0
+    failed_chunks: List[int] = field(default_factory=list)
+    error: Optional[str] = None
+    
+    @property
+    def content(self) -> Optional[str]:
+        """Final reduced output."""
+        return self.response.content if self.response else None
+    
+    @property
+    def partial(self) -> bool:
+        """Whether some chunks were lost and the answer is incomplete."""
+        return bool(self.failed_chunks)
+    
+    @property
+    def providers_used(self) -> List[str]:
+        """Distinct providers that served a successful call."""
+        seen = []
+        for step in self.steps:
+            if step.error is None and step.provider_id not in seen:
+                seen.append(step.provider_id)
+        return seen
+    
+    @property
+    def total_cost(self) -> float:
+        """Cost of every map and reduce call."""
+        return round(sum(s.cost_usd for s in self.steps), 6)
@@ -4,9 +4,9 @@ Intent classification for tasks.
 Rule-based v1 implementation. Future: ML-based classifier.
 """
 
-import re
 from typing import Dict, List, Optional, Tuple
 
+from .automaton import KeywordAutomaton, ScanResult
 from .models import Task, TaskIntent
 
 
@@ -14,7 +14,7 @@ class IntentClassifier:
     """
     Classifies task intent based on prompt content.
     
-    Uses keyword matching and pattern recognition.
+    Uses single-pass multi-keyword matching (Aho-Corasick).
     Future: Replace with fine-tuned BERT model.
     """
     
@@ -94,43 +94,118 @@ class IntentClassifier:
         ],
     }
     
-    def __init__(self):
-        """Initialize classifier with compiled patterns."""
-        self._compiled_patterns: Dict[TaskIntent, List[re.Pattern]] = {}
-        self._compile_patterns()
+    # Bounded mode: stop before the tail windows once the leading intent
+    # has at least this many keywords and this multiple of the runner-up
+    DOMINANCE_MIN_KEYWORDS = 3
+    DOMINANCE_RATIO = 3
     
-    def _compile_patterns(self):
-        """Compile regex patterns for efficiency."""
-        for intent, keywords in self.INTENT_PATTERNS.items():
-            self._compiled_patterns[intent] = [
-                re.compile(rf'\b{re.escape(kw)}\b', re.IGNORECASE)
-                for kw in keywords
-            ]
+    def __init__(self, window_chars: Optional[int] = None):
+        """
+        Initialize classifier with a keyword automaton.
+        
+        Args:
+            window_chars: If set, scan only this many characters from the
+                head and tail of the prompt and system prompt, so cost stays
+                flat for very large inputs. Default scans everything.
+        """
+        if window_chars is not None and window_chars <= 0:
+            raise ValueError("window_chars must be positive")
+        
+        self.window_chars = window_chars
+        self._automaton = KeywordAutomaton(self.INTENT_PATTERNS)
     
-    def classify(self, task: Task) -> TaskIntent:
+    def scan(self, task: Task) -> ScanResult:
         """
-        Classify the intent of a task.
+        Find all intent keywords in a task in a single pass.
         
         Args:
-            task: The task to classify
+            task: The task to scan
             
         Returns:
-            Classified intent
+            ScanResult with per-intent keyword counts and matched spans
         """
+        if self.window_chars is not None:
+            return self._scan_bounded(task)
+        
         text = f"{task.system_prompt or ''} {task.prompt}".lower()
+        return self._automaton.scan(text)
+    
+    def _scan_bounded(self, task: Task) -> ScanResult:
+        """
+        Scan head and tail windows of the system prompt and prompt.
+        
+        Spans use the same offsets as a full scan. The system prompt and
+        prompt are scanned separately, so a keyword split across the two is
+        not matched. The tail windows are skipped when the heads already
+        show a dominant intent.
+        """
+        window = self.window_chars
+        system = task.system_prompt or ""
+        segments = [(system, 0), (task.prompt, len(system) + 1)]
+        result = ScanResult()
+        
+        # Heads (or the whole segment when it fits in two windows)
+        for text, offset in segments:
+            end = len(text) if len(text) <= 2 * window else window
+            self._scan_window(result, text, 0, end, offset)
+        
+        if self._dominates(result.counts):
+            return result
         
-        # Score each intent
-        scores: Dict[TaskIntent, int] = {}
-        for intent, patterns in self._compiled_patterns.items():
-            score = sum(1 for p in patterns if p.search(text))
-            if score > 0:
-                scores[intent] = score
+        # Tails
+        for text, offset in segments:
+            if len(text) > 2 * window:
+                start = len(text) - window
+                self._scan_window(result, text, start, len(text), offset)
         
-        # Return highest scoring intent
-        if scores:
-            return max(scores, key=scores.get)
+        return result
+    
+    def _scan_window(
+        self,
+        result: ScanResult,
+        text: str,
+        start: int,
+        end: int,
+        offset: int,
+    ):
+        """
+        Scan ``text[start:end]`` into ``result`` without lowercasing the rest.
         
-        return TaskIntent.UNKNOWN
+        One character of context on each side keeps word-boundary checks
+        exact at the window edges.
+        """
+        lo = max(0, start - 1)
+        hi = min(len(text), end + 1)
+        before = text[lo:start].lower()
+        core = text[start:end].lower()
+        after = text[end:hi].lower()
+        
+        window = f"{before}{core}{after}"
+        hits = self._automaton.scan(window, len(before), len(before) + len(core))
+        result.merge(hits, offset + start - len(before))
+    
+    def _dominates(self, counts: Dict[TaskIntent, int]) -> bool:
+        """Check whether one intent clearly leads the rest."""
+        if not counts:
+            return False
+        
+        ranked = sorted(counts.values(), reverse=True)
+        best = ranked[0]
+        second = ranked[1] if len(ranked) > 1 else 0
+        
+        return best >= self.DOMINANCE_MIN_KEYWORDS and best >= second * self.DOMINANCE_RATIO
+    
+    def classify(self, task: Task) -> TaskIntent:
+        """
+        Classify the intent of a task.
+        
+        Args:
+            task: The task to classify
+        
+        Returns:
+            Classified intent
+        """
+        return self._best_intent(self.scan(task).counts)
     
     def classify_with_confidence(self, task: Task) -> Tuple[TaskIntent, float]:
         """
@@ -139,27 +214,33 @@ class IntentClassifier:
         Returns:
             Tuple of (intent, confidence)
         """
-        text = f"{task.system_prompt or ''} {task.prompt}".lower()
-        
-        scores: Dict[TaskIntent, int] = {}
-        for intent, patterns in self._compiled_patterns.items():
-            score = sum(1 for p in patterns if p.search(text))
-            if score > 0:
-                scores[intent] = score
-        
-        if not scores:
+        return self._score(self.scan(task).counts)
+    
+    def _best_intent(self, counts: Dict[TaskIntent, int]) -> TaskIntent:
+        """Pick the highest scoring intent, ties broken by pattern order."""
+        best_intent = TaskIntent.UNKNOWN
+        best_score = 0
+        for intent in self.INTENT_PATTERNS:
+            score = counts.get(intent, 0)
+            if score > best_score:
+                best_intent, best_score = intent, score
+        return best_intent
+    
+    def _score(self, counts: Dict[TaskIntent, int]) -> Tuple[TaskIntent, float]:
+        """Derive intent and confidence from per-intent keyword counts."""
+        if not counts:
             return TaskIntent.UNKNOWN, 0.0
         
         # Calculate confidence
-        best_intent = max(scores, key=scores.get)
-        best_score = scores[best_intent]
-        total_score = sum(scores.values())
+        best_intent = self._best_intent(counts)
+        best_score = counts[best_intent]
+        total_score = sum(counts.values())
         
         confidence = best_score / total_score if total_score > 0 else 0.0
         
         # Boost confidence if score is significantly higher
-        if len(scores) > 1:
-            second_best = sorted(scores.values(), reverse=True)[1]
+        if len(counts) > 1:
+            second_best = sorted(counts.values(), reverse=True)[1]
             if best_score > second_best * 2:
                 confidence = min(1.0, confidence * 1.2)
         
@@ -181,19 +262,17 @@ class IntentClassifier:
         Returns:
             Explanation string
         """
-        intent, confidence = self.classify_with_confidence(task)
+        result = self.scan(task)
+        intent, confidence = self._score(result.counts)
         
         if intent == TaskIntent.UNKNOWN:
             return "Could not determine intent from prompt. Using default routing."
         
-        # Find matching keywords
-        text = f"{task.system_prompt or ''} {task.prompt}".lower()
-        matching_keywords = []
-        
-        for pattern in self._compiled_patterns.get(intent, []):
-            match = pattern.search(text)
-            if match:
-                matching_keywords.append(match.group(0))
+        # Matching keywords, in pattern order
+        matched = set(result.keywords_for(intent))
+        matching_keywords = [
+            kw for kw in self.INTENT_PATTERNS[intent] if kw in matched
+        ]
         
         keywords_str = ", ".join(set(matching_keywords[:3]))
         
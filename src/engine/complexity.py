@@ -0,0 +1,174 @@
+"""
+Task complexity estimation.
+
+Cheap structural heuristics that label tasks simple/medium/complex so the
+router can send trivial work to fast, inexpensive providers.
+"""
+
+import math
+import re
+from typing import Dict
+
+from .models import Task, TaskComplexity, TaskIntent
+
+
+class ComplexityEstimator:
+    """
+    Estimates task complexity from prompt structure and content.
+    
+    Signals (each normalized to 0-1):
+    - Size: estimated input tokens
+    - Intent: inherent difficulty of the task type
+    - Structure: list items, numbered steps, and questions
+    - Code density: fences and code punctuation
+    - Math density: LaTeX, operators, and equations
+    
+    Only a bounded prefix is inspected, so cost is flat in prompt size.
+    Short prompts score low on size whatever they ask for, so intents
+    harder than ``SIMPLE_MAX_INTENT`` are never classified as simple.
+    """
+    
+    # Signal weights (sum to 1.0)
+    WEIGHT_SIZE = 0.30
+    WEIGHT_INTENT = 0.40
+    WEIGHT_STRUCTURE = 0.10
+    WEIGHT_CODE = 0.10
+    WEIGHT_MATH = 0.10
+    
+    # Score thresholds
+    SIMPLE_BELOW = 0.30
+    COMPLEX_FROM = 0.60
+    
+    # Hardest intent difficulty that can still be simple
+    SIMPLE_MAX_INTENT = 0.5
+    
+    # Inherent difficulty by intent
+    INTENT_DIFFICULTY: Dict[TaskIntent, float] = {
+        TaskIntent.QUESTION_ANSWERING: 0.1,
+        TaskIntent.TRANSLATION: 0.1,
+        TaskIntent.SUMMARIZATION: 0.2,
+        TaskIntent.CODE_DOCUMENTATION: 0.3,
+        TaskIntent.DOCUMENTATION: 0.3,
+        TaskIntent.CREATIVE_WRITING: 0.4,
+        TaskIntent.IMAGE_GENERATION: 0.4,
+        TaskIntent.VISION_ANALYSIS: 0.4,
+        TaskIntent.CODE_IMPLEMENTATION: 0.5,
+        TaskIntent.TECHNICAL_WRITING: 0.5,
+        TaskIntent.DECISION_SUPPORT: 0.5,
+        TaskIntent.CODE_REVIEW: 0.6,
+        TaskIntent.ANALYSIS: 0.7,
+        TaskIntent.PLANNING: 0.7,
+        TaskIntent.CODE_DEBUGGING: 0.7,
+        TaskIntent.PROBLEM_SOLVING: 0.8,
+        TaskIntent.RESEARCH: 0.8,
+        TaskIntent.SYNTHESIS: 0.8,
+    }
+    DEFAULT_INTENT_DIFFICULTY = 0.5
+    
+    # Input tokens at which the size signal saturates
+    SIZE_SATURATION_TOKENS = 8000
+    
+    _NUMBERED_STEP = re.compile(r"^\s*\d+[.)]\s", re.MULTILINE)
+    _CODE_CHARS = "{};=<>[]"
+    _MATH_CHARS = "+*/^=<>"
+    
+    def __init__(self, sample_chars: int = 8192):
+        """
+        Initialize estimator.
+        
+        Args:
+            sample_chars: Characters inspected for structure and density
+        """
+        self.sample_chars = sample_chars
+    
+    def score(self, task: Task) -> float:
+        """
+        Compute a complexity score.
+        
+        Args:
+            task: The task to score
+        
+        Returns:
+            Score from 0.0 (trivial) to 1.0 (hard)
+        """
+        sample = self._sample(task)
+        input_tokens, _ = task.estimate_tokens()
+        
+        size = self._size_signal(input_tokens)
+        intent = self._intent_difficulty(task)
+        structure = self._structure_signal(sample)
+        code = self._code_signal(sample)
+        math_density = self._math_signal(sample)
+        
+        return (
+            size * self.WEIGHT_SIZE +
+            intent * self.WEIGHT_INTENT +
+            structure * self.WEIGHT_STRUCTURE +
+            code * self.WEIGHT_CODE +
+            math_density * self.WEIGHT_MATH
+        )
+    
+    def estimate(self, task: Task) -> TaskComplexity:
+        """
+        Classify a task as simple, medium, or complex.
+        
+        Args:
+            task: The task to estimate
+        
+        Returns:
+            Estimated complexity
+        """
+        level = self.level(self.score(task))
+        if level == TaskComplexity.SIMPLE and self._intent_difficulty(task) > self.SIMPLE_MAX_INTENT:
+            return TaskComplexity.MEDIUM
+        return level
+    
+    def level(self, score: float) -> TaskComplexity:
+        """Map a complexity score to a level."""
+        if score < self.SIMPLE_BELOW:
+            return TaskComplexity.SIMPLE
+        if score < self.COMPLEX_FROM:
+            return TaskComplexity.MEDIUM
+        return TaskComplexity.COMPLEX
+    
+    def _intent_difficulty(self, task: Task) -> float:
+        """Inherent difficulty of the task's intent."""
+        return self.INTENT_DIFFICULTY.get(task.intent, self.DEFAULT_INTENT_DIFFICULTY)
+    
+    def _sample(self, task: Task) -> str:
+        """Bounded slice of the task text to inspect."""
+        prompt = task.prompt[:self.sample_chars]
+        remaining = self.sample_chars - len(prompt)
+        if task.system_prompt and remaining > 0:
+            return f"{task.system_prompt[:remaining]}\n{prompt}"
+        return prompt
+    
+    def _size_signal(self, input_tokens: int) -> float:
+        """Log-scaled size: ~50 tokens -> 0.0, saturation -> 1.0."""
+        if input_tokens <= 50:
+            return 0.0
+        span = math.log(self.SIZE_SATURATION_TOKENS / 50)
+        return min(1.0, math.log(input_tokens / 50) / span)
+    
+    def _structure_signal(self, sample: str) -> float:
+        """Multi-part requests: bullets, numbered steps, several questions."""
+        bullets = sample.count("\n- ") + sample.count("\n* ")
+        steps = len(self._NUMBERED_STEP.findall(sample))
+        questions = max(0, sample.count("?") - 1)
+        return min(1.0, (bullets + steps + questions) / 10)
+    
+    def _code_signal(self, sample: str) -> float:
+        """Code fences and density of code punctuation."""
+        if not sample:
+            return 0.0
+        fences = sample.count("```") // 2
+        density = sum(sample.count(c) for c in self._CODE_CHARS) / len(sample)
+        return min(1.0, fences * 0.4 + density * 10)
+    
+    def _math_signal(self, sample: str) -> float:
+        """LaTeX markers and density of arithmetic operators."""
+        if not sample:
+            return 0.0
+        latex = sample.count("$") // 2 + sample.count("\\frac") + sample.count("\\sum")
+        density = sum(sample.count(c) for c in self._MATH_CHARS) / len(sample)
+        return min(1.0, latex * 0.2 + density * 10)
@@ -0,0 +1,253 @@
+"""
+Prompt compression before dispatch.
+
+Normalizes whitespace, collapses repeated blocks (e.g. the same tool
+output pasted several times) and trims stale history so a prompt fits a
+token budget derived from the selected provider's context window.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from ..registry.models import Provider
+from .models import Task
+
+
+# Same heuristic as Task.estimate_tokens: ~4 characters per token
+CHARS_PER_TOKEN = 4
+
+_FENCE = re.compile(r"^\s*(```|~~~)")
+_BLOCK_SPLIT = re.compile(r"(\n\s*\n)")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a text."""
+    return len(text) // CHARS_PER_TOKEN
+
+
+@dataclass
+class CompressionResult:
+    """Outcome of compressing one prompt."""
+    prompt: str
+    original_tokens: int
+    compressed_tokens: int
+    blocks_deduplicated: int = 0
+    blocks_truncated: int = 0
+    steps: Dict[str, int] = field(default_factory=dict)  # step -> tokens saved
+    
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.compressed_tokens
+
+
+class PromptCompressor:
+    """
+    Lossy-but-safe prompt compression.
+    
+    Stages (each optional):
+    1. Whitespace: strip trailing spaces and collapse runs of blank
+       lines. Indentation and inner spacing are never touched, and fenced
+       code blocks are kept verbatim.
+    2. Deduplication: blank-line separated blocks of at least
+       ``min_block_chars`` that repeat verbatim are replaced by a marker.
+    3. Truncation: if still over budget, the oldest blocks between the
+       first block (usually the instruction) and the most recent ones are
+       dropped.
+    
+    The budget is ``context_fraction`` of the provider's ``max_context``
+    minus room for the expected output and the system prompt. When that
+    leaves nothing (the system prompt alone fills the window) the prompt
+    is not truncated: dropping all of it would only hide the problem.
+    """
+    
+    DUPLICATE_MARKER = "[duplicate of an earlier block omitted]"
+    TRUNCATION_MARKER = "[{count} earlier blocks omitted]"
+    
+    def __init__(
+        self,
+        normalize_whitespace: bool = True,
+        deduplicate: bool = True,
+        truncate: bool = True,
+        min_block_chars: int = 80,
+        context_fraction: float = 0.9,
+        output_reserve_fraction: float = 0.25,
+    ):
+        """
+        Initialize compressor.
+        
+        Args:
+            normalize_whitespace: Enable whitespace normalization
+            deduplicate: Enable repeated-block removal
+            truncate: Enable history truncation to the budget
+            min_block_chars: Shortest block considered for deduplication
+            context_fraction: Share of max_context the input may use
+            output_reserve_fraction: Most of max_context reserved for output
+        """
+        self.normalize_whitespace = normalize_whitespace
+        self.deduplicate = deduplicate
+        self.truncate = truncate
+        self.min_block_chars = min_block_chars
+        self.context_fraction = context_fraction
+        self.output_reserve_fraction = output_reserve_fraction
+    
+    def budget_for(self, task: Task, provider: Provider) -> int:
+        """Input token budget for a task on a provider."""
+        max_context = provider.capabilities.max_context
+        _, output_tokens = task.estimate_tokens()
+        reserve = min(output_tokens, int(max_context * self.output_reserve_fraction))
+        system_tokens = estimate_tokens(task.system_prompt or "")
+        return max(0, int(max_context * self.context_fraction) - reserve - system_tokens)
+    
+    def compress_task(self, task: Task, provider: Provider) -> CompressionResult:
+        """
+        Compress a task's prompt in place for the given provider.
+        
+        Returns:
+            CompressionResult describing the savings
+        """
+        result = self.compress(task.prompt, self.budget_for(task, provider))
+        task.prompt = result.prompt
+        if task.estimated_input_tokens:
+            task.estimated_input_tokens = max(1, task.estimated_input_tokens - result.tokens_saved)
+        return result
+    
+    def compress(self, text: str, budget_tokens: Optional[int] = None) -> CompressionResult:
+        """
+        Compress a text, optionally to a token budget.
+        
+        Args:
+            text: Prompt text
+            budget_tokens: Maximum tokens to keep (None or 0: no truncation)
+        """
+        original = estimate_tokens(text)
+        result = CompressionResult(prompt=text, original_tokens=original, compressed_tokens=original)
+        
+        if self.normalize_whitespace:
+            text = self._run_step(result, "whitespace", text, self._normalize(text))
+        
+        if self.deduplicate:
+            deduped, count = self._deduplicate(text)
+            result.blocks_deduplicated = count
+            text = self._run_step(result, "deduplicate", text, deduped)
+        
+        if self.truncate and budget_tokens and estimate_tokens(text) > budget_tokens:
+            truncated, count = self._truncate(text, budget_tokens)
+            result.blocks_truncated = count
+            text = self._run_step(result, "truncate", text, truncated)
+        
+        result.prompt = text
+        result.compressed_tokens = estimate_tokens(text)
+        return result
+    
+    def compress_messages(
+        self,
+        messages: List[Dict[str, str]],
+        budget_tokens: int,
+    ) -> List[Dict[str, str]]:
+        """
+        Fit a chat history to a budget, dropping the oldest turns first.
+        
+        System messages and the latest message are always kept; content
+        is whitespace-normalized when that stage is enabled.
+        """
+        if self.normalize_whitespace:
+            messages = [{**m, "content": self._normalize(m.get("content", ""))} for m in messages]
+        
+        pinned = {i for i, m in enumerate(messages) if m.get("role") == "system"}
+        if messages:
+            pinned.add(len(messages) - 1)
+        used = sum(estimate_tokens(messages[i].get("content", "")) for i in pinned)
+        
+        keep = set(pinned)
+        for i in range(len(messages) - 1, -1, -1):
+            if i in pinned:
+                continue
+            cost = estimate_tokens(messages[i].get("content", ""))
+            if used + cost > budget_tokens:
+                break
+            keep.add(i)
+            used += cost
+        
+        return [m for i, m in enumerate(messages) if i in keep]
+    
+    def _run_step(self, result: CompressionResult, name: str, before: str, after: str) -> str:
+        """Record one step's savings and return its output."""
+        result.steps[name] = estimate_tokens(before) - estimate_tokens(after)
+        return after
+    
+    def _normalize(self, text: str) -> str:
+        """Strip trailing whitespace and blank-line runs outside code fences."""
+        lines: List[str] = []
+        fence: Optional[str] = None
+        blank = False
+        for line in text.splitlines():
+            marker = _FENCE.match(line)
+            if fence is not None:
+                # Inside a fence every character may be significant
+                lines.append(line)
+                if marker and marker.group(1) == fence:
+                    fence = None
+                blank = False
+                continue
+            if marker:
+                fence = marker.group(1)
+            line = line.rstrip()
+            if not line and blank:
+                continue
+            blank = not line
+            lines.append(line)
+        return "\n".join(lines).strip("\n")
+    
+    def _deduplicate(self, text: str):
+        """Replace verbatim repeats of long blocks with a marker."""
+        seen = set()
+        pieces: List[str] = []
+        removed = 0
+        
+        # Blocks at even indexes, the separators before them at odd ones;
+        # separators are kept as written so untouched text stays verbatim
+        parts = _BLOCK_SPLIT.split(text)
+        for i in range(0, len(parts), 2):
+            block, separator = parts[i], parts[i - 1] if i else ""
+            if len(block) >= self.min_block_chars:
+                digest = hashlib.blake2b(block.strip().encode("utf-8"), digest_size=16).digest()
+                if digest in seen:
+                    removed += 1
+                    if pieces and pieces[-1] == self.DUPLICATE_MARKER:
+                        continue
+                    pieces += [separator, self.DUPLICATE_MARKER]
+                    continue
+                seen.add(digest)
+            pieces += [separator, block]
+        
+        return "".join(pieces), removed
+    
+    def _truncate(self, text: str, budget_tokens: int):
+        """Keep the first block and as many recent blocks as fit."""
+        blocks = _BLOCK_SPLIT.split(text)[::2]
+        budget_chars = budget_tokens * CHARS_PER_TOKEN
+        
+        head = blocks[0]
+        if len(blocks) == 1 or len(head) >= budget_chars:
+            # A single oversized block: keep its beginning and end
+            half = max(1, budget_chars // 2)
+            return text[:half] + "\n\n" + text[len(text) - half:], 0
+        
+        marker_room = len(self.TRUNCATION_MARKER) + 16
+        used = len(head) + marker_room
+        tail: List[str] = []
+        for block in reversed(blocks[1:]):
+            if used + len(block) + 2 > budget_chars:
+                break
+            tail.append(block)
+            used += len(block) + 2
+        tail.reverse()
+        
+        dropped = len(blocks) - 1 - len(tail)
+        if not dropped:
+            return text, 0
+        return "\n\n".join(
+            [head, self.TRUNCATION_MARKER.format(count=dropped), *tail]
+        ), dropped
@@ -9,6 +9,7 @@ from dataclasses import dataclass
 from datetime import datetime, timedelta
 
 from ..registry.models import Provider
+from .ledger import SpendLedger
 
 
 @dataclass
@@ -21,19 +22,32 @@ class BudgetAlert:
     period: str  # "daily", "monthly"
 
 
+@dataclass
+class TenantBudget:
+    """Spending limits for a tenant."""
+    daily_limit: Optional[float] = None
+    monthly_limit: Optional[float] = None
+
+
 class CostCalculator:
     """
     Calculates and tracks costs across the federation.
     
     Features:
     - Token-based cost estimation
-    - Budget tracking and alerts
+    - Budget tracking and alerts (time-bucketed SpendLedger)
     - Cost optimization recommendations
     """
     
-    def __init__(self):
-        """Initialize cost calculator."""
-        self._spending_cache: Dict[str, Dict[str, float]] = {}
+    def __init__(self, ledger: Optional[SpendLedger] = None):
+        """
+        Initialize cost calculator.
+        
+        Args:
+            ledger: Spend ledger (default: in-memory, no persistence)
+        """
+        self.ledger = ledger or SpendLedger()
+        self._budgets: Dict[str, TenantBudget] = {}
     
     def estimate(
         self,
@@ -138,6 +152,8 @@ class CostCalculator:
         provider_id: str,
         cost: float,
         timestamp: Optional[datetime] = None,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
     ):
         """
         Track spending for budget monitoring.
@@ -147,29 +163,16 @@ class CostCalculator:
             provider_id: The provider used
             cost: The actual cost incurred
             timestamp: When the spend occurred
+            user_id: Optional user for per-user rollups
+            session_id: Optional session for per-session rollups
         """
-        timestamp = timestamp or datetime.utcnow()
-        
-        # Initialize tenant tracking
-        if tenant_id not in self._spending_cache:
-            self._spending_cache[tenant_id] = {
-                "daily": {},
-                "monthly": {},
-            }
-        
-        tenant_cache = self._spending_cache[tenant_id]
-        
-        # Track by day
-        day_key = timestamp.strftime("%Y-%m-%d")
-        if day_key not in tenant_cache["daily"]:
-            tenant_cache["daily"][day_key] = 0.0
-        tenant_cache["daily"][day_key] += cost
-        
-        # Track by month
-        month_key = timestamp.strftime("%Y-%m")
-        if month_key not in tenant_cache["monthly"]:
-            tenant_cache["monthly"][month_key] = 0.0
-        tenant_cache["monthly"][month_key] += cost
+        self.ledger.record(
+            tenant_id,
+            cost,
+            timestamp=timestamp,
+            user_id=user_id,
+            session_id=session_id,
+        )
     
     def get_spend(
         self,
@@ -183,23 +186,115 @@ class CostCalculator:
         Args:
             tenant_id: The tenant to check
             period: "daily" or "monthly"
-            date: Specific date (default: today/this month)
+            date: Specific date, "%Y-%m-%d" or "%Y-%m" (default: today/this month)
             
         Returns:
             Total spend for the period
         """
-        if tenant_id not in self._spending_cache:
-            return 0.0
+        at = None
+        if date is not None:
+            fmt = "%Y-%m-%d" if period == "daily" else "%Y-%m"
+            at = datetime.strptime(date, fmt)
         
-        tenant_cache = self._spending_cache[tenant_id]
+        return self.ledger.period_spend(tenant_id, period, at)
+    
+    def get_window_spend(
+        self,
+        tenant_id: str,
+        window: timedelta,
+        scope: str = "tenant",
+    ) -> float:
+        """
+        Get spending over a trailing window (e.g. the last 15 minutes).
         
-        if date is None:
-            if period == "daily":
-                date = datetime.utcnow().strftime("%Y-%m-%d")
-            else:
-                date = datetime.utcnow().strftime("%Y-%m")
+        Args:
+            tenant_id: Tenant (or user/session ID, per ``scope``)
+            window: Window length
+            scope: "tenant", "user", or "session"
+            
+        Returns:
+            Spend in the window
+        """
+        return self.ledger.window_spend(tenant_id, window, scope)
+    
+    def burn_rate(
+        self,
+        tenant_id: str,
+        window: timedelta = timedelta(minutes=15),
+        scope: str = "tenant",
+    ) -> float:
+        """
+        Get the recent spend rate in USD/hour.
         
-        return tenant_cache.get(period, {}).get(date, 0.0)
+        Args:
+            tenant_id: Tenant (or user/session ID, per ``scope``)
+            window: Window to average over
+            scope: "tenant", "user", or "session"
+        """
+        return self.ledger.burn_rate(tenant_id, window, scope)
+    
+    def set_budget(
+        self,
+        tenant_id: str,
+        daily_limit: Optional[float] = None,
+        monthly_limit: Optional[float] = None,
+    ):
+        """
+        Register spending limits enforced during routing.
+        
+        Args:
+            tenant_id: The tenant to limit
+            daily_limit: Maximum USD per UTC day
+            monthly_limit: Maximum USD per UTC month
+        """
+        self._budgets[tenant_id] = TenantBudget(daily_limit, monthly_limit)
+    
+    def get_budget(self, tenant_id: Optional[str]) -> Optional[TenantBudget]:
+        """Get registered limits for a tenant, if any."""
+        return self._budgets.get(tenant_id) if tenant_id else None
+    
+    def remaining_budget(self, tenant_id: Optional[str]) -> Optional[float]:
+        """
+        Get the tenant's remaining spend under its tightest limit.
+        
+        Reads the ledger's current day/month buckets directly; no locks
+        are taken and no history is walked.
+        
+        Returns:
+            Remaining USD (may be negative), or None if no budget is set
+        """
+        budget = self.get_budget(tenant_id)
+        if budget is None:
+            return None
+        
+        remaining = None
+        if budget.daily_limit is not None:
+            remaining = budget.daily_limit - self.ledger.period_spend(tenant_id, "daily")
+        if budget.monthly_limit is not None:
+            monthly = budget.monthly_limit - self.ledger.period_spend(tenant_id, "monthly")
+            remaining = monthly if remaining is None else min(remaining, monthly)
+        return remaining
+    
+    def budget_utilization(self, tenant_id: Optional[str]) -> float:
+        """
+        Get the fraction of the tightest budget already spent.
+        
+        Returns:
+            0.0 (untouched or no budget) upward; 1.0 means exhausted
+        """
+        budget = self.get_budget(tenant_id)
+        if budget is None:
+            return 0.0
+        
+        utilization = 0.0
+        if budget.daily_limit:
+            utilization = self.ledger.period_spend(tenant_id, "daily") / budget.daily_limit
+        if budget.monthly_limit:
+            utilization = max(
+                utilization,
+                self.ledger.period_spend(tenant_id, "monthly") / budget.monthly_limit,
+            )
+        return utilization
     
     def check_budget(
         self,
@@ -210,11 +305,18 @@ class CostCalculator:
         """
         Check if spending is approaching or exceeding limits.
         
+        Limits default to those registered with ``set_budget``.
+        
         Returns:
             List of budget alerts (empty if all good)
         """
         alerts = []
         
+        budget = self.get_budget(tenant_id)
+        if budget is not None:
+            daily_limit = daily_limit if daily_limit is not None else budget.daily_limit
+            monthly_limit = monthly_limit if monthly_limit is not None else budget.monthly_limit
+        
         # Check daily limit
         if daily_limit:
             daily_spend = self.get_spend(tenant_id, "daily")
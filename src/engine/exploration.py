@@ -0,0 +1,93 @@
+"""
+Exploration budget for learning from non-top routing choices.
+
+Exploration is funded by a share of all traffic but spent preferentially
+on low-priority, low-cost tasks, and never on CRITICAL ones.
+"""
+
+import threading
+from typing import Dict
+
+from .models import TaskPriority
+
+
+class ExplorationBudget:
+    """
+    Token bucket of exploration credits with priority reserves.
+    
+    Every routed request deposits ``rate`` credits (up to ``burst``) and
+    each exploration spends one. BACKGROUND and LOW tasks may spend any
+    available credit; NORMAL and HIGH tasks only draw on surplus above a
+    reserve, i.e. credits that low-priority traffic has left unused.
+    CRITICAL tasks never explore. Long-run exploration stays at or below
+    ``rate`` of traffic.
+    
+    Within an eligible priority, tasks estimated to cost more than
+    ``cheap_cost`` explore with proportionally lower probability.
+    """
+    
+    # Fraction of ``burst`` that must remain after spending a credit
+    RESERVE: Dict[TaskPriority, float] = {
+        TaskPriority.BACKGROUND: 0.0,
+        TaskPriority.LOW: 0.0,
+        TaskPriority.NORMAL: 0.5,
+        TaskPriority.HIGH: 0.9,
+    }
+    
+    def __init__(self, rate: float = 0.05, burst: float = 20.0, cheap_cost: float = 0.01):
+        """
+        Initialize budget.
+        
+        Args:
+            rate: Fraction of requests that may explore
+            burst: Maximum saved-up credits
+            cheap_cost: Estimated USD cost at or below which a task
+                explores at full probability
+        """
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError("Exploration rate must be between 0 and 1")
+        
+        self.rate = rate
+        self.burst = burst
+        self.cheap_cost = cheap_cost
+        self.credits = 0.0
+        self.requests = 0
+        self.explorations = 0
+        self._lock = threading.Lock()
+    
+    def on_request(self):
+        """Credit the budget for one routed request."""
+        with self._lock:
+            self.requests += 1
+            self.credits = min(self.burst, self.credits + self.rate)
+    
+    def probability(self, priority: TaskPriority, estimated_cost: float) -> float:
+        """
+        Probability that a task explores, given the current balance.
+        
+        Returns:
+            0.0 when the priority may not explore or the budget can't
+            fund it, otherwise a cost-dependent probability in (0, 1]
+        """
+        reserve = self.RESERVE.get(priority)
+        if reserve is None:
+            return 0.0
+        if self.credits - 1.0 < reserve * self.burst:
+            return 0.0
+        if estimated_cost <= self.cheap_cost:
+            return 1.0
+        return self.cheap_cost / estimated_cost
+    
+    def spend(self) -> bool:
+        """Spend one credit; False if it was taken concurrently."""
+        with self._lock:
+            if self.credits < 1.0:
+                return False
+            self.credits -= 1.0
+            self.explorations += 1
+            return True
+    
+    @property
+    def exploration_rate(self) -> float:
+        """Fraction of requests that explored so far."""
+        return self.explorations / self.requests if self.requests else 0.0
@@ -0,0 +1,80 @@
+"""
+Hedged requests for tail latency.
+
+If the primary provider is slow to produce its first token, a backup
+request is started on the next-ranked provider and the first to finish
+wins. A budget caps hedges to a fraction of traffic.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from ..adapters.base import AdapterResponse
+
+
+class HedgeBudget:
+    """
+    Token bucket limiting hedges to a fraction of requests.
+    
+    Every request deposits ``ratio`` tokens (up to ``burst``); a hedge
+    spends one. Over any long run at most ``ratio`` of requests are
+    hedged, so duplicate spend is bounded by that fraction.
+    """
+    
+    def __init__(self, ratio: float = 0.05, burst: float = 10.0):
+        """
+        Initialize budget.
+        
+        Args:
+            ratio: Fraction of requests that may be hedged
+            burst: Maximum saved-up hedges
+        """
+        if not 0.0 <= ratio <= 1.0:
+            raise ValueError("Hedge ratio must be between 0 and 1")
+        
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = 0.0
+        self.requests = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+    
+    def on_request(self):
+        """Credit the budget for one request."""
+        with self._lock:
+            self.requests += 1
+            self.tokens = min(self.burst, self.tokens + self.ratio)
+    
+    def try_acquire(self) -> bool:
+        """Spend one hedge if the budget allows."""
+        with self._lock:
+            if self.tokens < 1.0:
+                return False
+            self.tokens -= 1.0
+            self.hedges += 1
+            return True
+    
+    @property
+    def hedge_rate(self) -> float:
+        """Fraction of requests hedged so far."""
+        return self.hedges / self.requests if self.requests else 0.0
+
+
+@dataclass
+class HedgeResult:
+    """Outcome of a hedged execution."""
+    response: Optional[AdapterResponse]
+    provider_id: Optional[str]
+    hedged: bool = False
+    backup_provider_id: Optional[str] = None
+    winner: Optional[str] = None           # "primary" or "backup"
+    hedge_delay_ms: int = 0
+    duplicate_cost_usd: float = 0.0        # Spent on the losing request
+    error: Optional[str] = None
+    
+    @property
+    def total_cost(self) -> float:
+        """Winner's cost plus duplicate spend."""
+        winner_cost = self.response.cost_usd if self.response else 0.0
+        return round(winner_cost + self.duplicate_cost_usd, 6)
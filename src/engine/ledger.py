@@ -0,0 +1,461 @@
+"""
+Time-bucketed spend ledger.
+
+Fixed-size ring buffers of minute, hour, day and month buckets per
+tenant, with user and session rollups. Memory is bounded and sliding
+window queries ("last 15 minutes") are O(1).
+"""
+
+import atexit
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+
+class BucketRing:
+    """
+    Ring buffer of spend buckets with O(1) "spend since bucket" queries.
+    
+    Alongside each bucket's own amount, the ring stores the running total
+    at the moment that bucket opened. Spend since bucket ``b`` is then
+    ``total - start_of(b)``, with no summing over buckets.
+    
+    Bucket IDs are caller-defined monotonically increasing integers
+    (e.g. epoch minutes).
+    """
+    
+    def __init__(self, size: int):
+        """
+        Initialize an empty ring.
+        
+        Args:
+            size: Number of buckets retained
+        """
+        if size <= 0:
+            raise ValueError("Ring size must be positive")
+        
+        self.size = size
+        self.total = 0.0
+        self._values = array("d", [0.0]) * size
+        self._starts = array("d", [0.0]) * size
+        self._ids = array("q", [-1]) * size
+        self._head: Optional[int] = None
+    
+    @property
+    def head(self) -> Optional[int]:
+        """Most recent bucket ID written (None if empty)."""
+        return self._head
+    
+    def add(self, bucket_id: int, amount: float):
+        """
+        Add spend to a bucket.
+        
+        Moving forward opens (and zeroes) the skipped buckets. Late writes
+        into retained buckets shift the starts of later buckets; writes
+        older than the ring only count toward the running total.
+        """
+        if self._head is None:
+            self._open(bucket_id - self.size + 1, bucket_id)
+        elif bucket_id > self._head:
+            self._open(max(self._head + 1, bucket_id - self.size + 1), bucket_id)
+        elif bucket_id <= self._head - self.size:
+            # Older than anything retained: happened before every window
+            self.total += amount
+            for slot in range(self.size):
+                self._starts[slot] += amount
+            return
+        else:
+            for later in range(bucket_id + 1, self._head + 1):
+                self._starts[later % self.size] += amount
+        
+        self._values[bucket_id % self.size] += amount
+        self.total += amount
+    
+    def _open(self, first_id: int, last_id: int):
+        """Open buckets first_id..last_id and advance the head."""
+        for bid in range(first_id, last_id + 1):
+            slot = bid % self.size
+            self._ids[slot] = bid
+            self._values[slot] = 0.0
+            self._starts[slot] = self.total
+        self._head = last_id
+    
+    def get(self, bucket_id: int) -> float:
+        """Spend recorded in a single bucket (0.0 if not retained)."""
+        slot = bucket_id % self.size
+        if self._ids[slot] != bucket_id:
+            return 0.0
+        return self._values[slot]
+    
+    def since(self, bucket_id: int) -> float:
+        """
+        Spend in buckets ``bucket_id`` through the head, in O(1).
+        
+        Bucket IDs older than the ring are clamped to the oldest retained
+        bucket.
+        """
+        if self._head is None or bucket_id > self._head:
+            return 0.0
+        
+        bucket_id = max(bucket_id, self._head - self.size + 1)
+        return self.total - self._starts[bucket_id % self.size]
+    
+    def to_dict(self) -> dict:
+        """Serialize for persistence."""
+        return {
+            "size": self.size,
+            "total": self.total,
+            "head": self._head,
+            "ids": self._ids.tolist(),
+            "values": self._values.tolist(),
+            "starts": self._starts.tolist(),
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> "BucketRing":
+        """Restore a ring saved with ``to_dict``."""
+        ring = cls(data["size"])
+        ring.total = data["total"]
+        ring._head = data["head"]
+        ring._ids = array("q", data["ids"])
+        ring._values = array("d", data["values"])
+        ring._starts = array("d", data["starts"])
+        return ring
+
+
+def _month_id(ts: float) -> int:
+    """Calendar month bucket ID (UTC)."""
+    dt = datetime.utcfromtimestamp(ts)
+    return dt.year * 12 + dt.month - 1
+
+
+class SpendAccount:
+    """
+    Spend rings for one tenant, user, or session.
+    
+    Fixed-width resolutions (minute, hour, day) answer sliding windows;
+    day and month buckets also answer calendar periods.
+    """
+    
+    # name -> bucket width in seconds
+    WIDTHS = {"minute": 60, "hour": 3600, "day": 86400}
+    
+    def __init__(self, sizes: Dict[str, int]):
+        """
+        Initialize account.
+        
+        Args:
+            sizes: Buckets retained per resolution ("minute", "hour",
+                "day", "month")
+        """
+        self.rings: Dict[str, BucketRing] = {
+            name: BucketRing(size) for name, size in sizes.items()
+        }
+    
+    def record(self, ts: float, amount: float):
+        """Add spend at a UNIX timestamp."""
+        for name, ring in self.rings.items():
+            if name == "month":
+                ring.add(_month_id(ts), amount)
+            else:
+                ring.add(int(ts // self.WIDTHS[name]), amount)
+    
+    @property
+    def total(self) -> float:
+        """All-time spend."""
+        return next(iter(self.rings.values())).total if self.rings else 0.0
+    
+    def window(self, seconds: float, now: float) -> float:
+        """
+        Spend over the trailing window, at bucket granularity.
+        
+        Uses the finest resolution whose ring covers the window; the
+        window is rounded up to whole buckets.
+        """
+        for name, width in self.WIDTHS.items():
+            ring = self.rings.get(name)
+            if ring is None:
+                continue
+            buckets = max(1, math.ceil(seconds / width))
+            if buckets <= ring.size or name == "day":
+                return ring.since(int(now // width) - buckets + 1)
+        return 0.0
+    
+    def period(self, period: str, ts: float) -> float:
+        """Spend in the calendar day or month containing ``ts``."""
+        if period == "daily":
+            return self.rings["day"].get(int(ts // 86400))
+        if period == "monthly":
+            return self.rings["month"].get(_month_id(ts))
+        raise ValueError(f"Unknown period: {period}")
+    
+    def to_dict(self) -> dict:
+        """Serialize for persistence."""
+        return {name: ring.to_dict() for name, ring in self.rings.items()}
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> "SpendAccount":
+        """Restore an account saved with ``to_dict``."""
+        account = cls({})
+        account.rings = {name: BucketRing.from_dict(r) for name, r in data.items()}
+        return account
+
+
+class SpendLedger:
+    """
+    Streaming spend ledger with tenant, user, and session scopes.
+    
+    Tenants keep long history (24h of minutes, 35 days of hours, 400 days,
+    36 months). Users and sessions keep shorter rollups and are evicted
+    least-recently-used beyond ``max_users`` / ``max_sessions``, so memory
+    stays bounded.
+    
+    With ``persist_path`` set, a record that finds the persist interval
+    elapsed wakes a background thread to write the snapshot, so no
+    request pays for serialization. ``close()`` (also run at interpreter
+    exit) writes a final snapshot.
+    
+    Example:
+        ledger = SpendLedger(persist_path="spend.json")
+        ledger.record("acme", 0.12, user_id="u1", session_id="s1")
+        ledger.window_spend("acme", timedelta(minutes=15))
+        ledger.burn_rate("acme")  # USD/hour over the last 15 minutes
+    """
+    
+    TENANT_SIZES = {"minute": 1440, "hour": 24 * 35, "day": 400, "month": 36}
+    ROLLUP_SIZES = {"minute": 60, "hour": 48, "day": 31, "month": 2}
+    
+    SCOPES = ("tenant", "user", "session")
+    
+    def __init__(
+        self,
+        max_users: int = 10_000,
+        max_sessions: int = 5_000,
+        persist_path: Optional[Union[str, Path]] = None,
+        persist_interval: float = 60.0,
+    ):
+        """
+        Initialize ledger.
+        
+        Args:
+            max_users: User rollups kept before LRU eviction
+            max_sessions: Session rollups kept before LRU eviction
+            persist_path: JSON file to snapshot to (None disables)
+            persist_interval: Minimum seconds between automatic snapshots
+        """
+        self.max_users = max_users
+        self.max_sessions = max_sessions
+        self.persist_path = Path(persist_path) if persist_path else None
+        self.persist_interval = persist_interval
+        
+        self._accounts: Dict[str, "OrderedDict[str, SpendAccount]"] = {
+            scope: OrderedDict() for scope in self.SCOPES
+        }
+        self._lock = threading.Lock()
+        self._last_persist = time.time()
+        # Serializes snapshot writes so an older one never lands last
+        self._save_lock = threading.Lock()
+        self._persist_wake = threading.Event()
+        self._persist_stopped = threading.Event()
+        self._persist_thread: Optional[threading.Thread] = None
+        self.persist_error: Optional[str] = None
+        
+        if self.persist_path and self.persist_path.exists():
+            self.load(self.persist_path)
+        if self.persist_path:
+            self._persist_thread = threading.Thread(
+                target=self._persist_loop, name="spend-persist", daemon=True
+            )
+            self._persist_thread.start()
+            atexit.register(self.close)
+    
+    def record(
+        self,
+        tenant_id: str,
+        cost: float,
+        timestamp: Optional[datetime] = None,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ):
+        """
+        Record spend.
+        
+        Args:
+            tenant_id: Tenant incurring the cost
+            cost: Amount in USD
+            timestamp: When the spend occurred (default: now, UTC)
+            user_id: Optional user rollup
+            session_id: Optional session rollup
+        """
+        ts = self._ts(timestamp)
+        
+        with self._lock:
+            self._account("tenant", tenant_id).record(ts, cost)
+            if user_id:
+                self._account("user", user_id).record(ts, cost)
+            if session_id:
+                self._account("session", session_id).record(ts, cost)
+        
+        self.maybe_persist()
+    
+    def _account(self, scope: str, key: str) -> SpendAccount:
+        """Get or create an account, maintaining LRU order for rollups."""
+        accounts = self._accounts[scope]
+        account = accounts.get(key)
+        
+        if account is None:
+            if scope == "tenant":
+                account = SpendAccount(self.TENANT_SIZES)
+            else:
+                account = SpendAccount(self.ROLLUP_SIZES)
+                limit = self.max_users if scope == "user" else self.max_sessions
+                while len(accounts) >= limit:
+                    accounts.popitem(last=False)
+            accounts[key] = account
+        elif scope != "tenant":
+            accounts.move_to_end(key)
+        
+        return account
+    
+    def _ts(self, timestamp: Optional[datetime]) -> float:
+        """UNIX seconds for a naive-UTC or aware datetime."""
+        if timestamp is None:
+            return time.time()
+        if timestamp.tzinfo is None:
+            return (timestamp - datetime(1970, 1, 1)).total_seconds()
+        return timestamp.timestamp()
+    
+    def window_spend(
+        self,
+        key: str,
+        window: timedelta,
+        scope: str = "tenant",
+        now: Optional[datetime] = None,
+    ) -> float:
+        """
+        Spend over a trailing window, e.g. the last 15 minutes.
+        
+        Resolution is one bucket of the finest ring that covers the window.
+        """
+        account = self._accounts[scope].get(key)
+        if account is None:
+            return 0.0
+        return account.window(window.total_seconds(), self._ts(now))
+    
+    def period_spend(
+        self,
+        key: str,
+        period: str = "daily",
+        at: Optional[datetime] = None,
+        scope: str = "tenant",
+    ) -> float:
+        """
+        Spend in the calendar day ("daily") or month ("monthly") containing ``at``.
+        """
+        account = self._accounts[scope].get(key)
+        if account is None:
+            return 0.0
+        return account.period(period, self._ts(at))
+    
+    def total_spend(self, key: str, scope: str = "tenant") -> float:
+        """All-time spend for a tenant, user, or session."""
+        account = self._accounts[scope].get(key)
+        return account.total if account else 0.0
+    
+    def burn_rate(
+        self,
+        key: str,
+        window: timedelta = timedelta(minutes=15),
+        scope: str = "tenant",
+        now: Optional[datetime] = None,
+    ) -> float:
+        """Average spend rate in USD/hour over the trailing window."""
+        hours = window.total_seconds() / 3600
+        if hours <= 0:
+            return 0.0
+        return self.window_spend(key, window, scope, now) / hours
+    
+    def maybe_persist(self):
+        """
+        Schedule a snapshot to ``persist_path`` if the persist interval has
+        elapsed. The interval is checked and claimed under the lock, so
+        concurrent callers schedule at most one snapshot per interval.
+        """
+        if not self.persist_path:
+            return
+        now = time.time()
+        with self._lock:
+            if now - self._last_persist < self.persist_interval:
+                return
+            self._last_persist = now
+        self._persist_wake.set()
+    
+    def _persist_loop(self):
+        """Background thread writing the snapshots ``maybe_persist`` schedules."""
+        while True:
+            self._persist_wake.wait()
+            self._persist_wake.clear()
+            if self._persist_stopped.is_set():
+                return
+            try:
+                self.save(self.persist_path)
+                self.persist_error = None
+            except Exception as e:
+                # Spend stays in memory; the next snapshot retries
+                self.persist_error = str(e)
+    
+    def close(self):
+        """Stop the background writer and write a final snapshot."""
+        if self._persist_thread is None:
+            return
+        self._persist_stopped.set()
+        self._persist_wake.set()
+        if self._persist_thread is not threading.current_thread():
+            self._persist_thread.join()
+        self._persist_thread = None
+        atexit.unregister(self.close)
+        self.save(self.persist_path)
+    
+    def save(self, path: Union[str, Path]):
+        """Atomically write a JSON snapshot of all accounts."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        
+        with self._save_lock:
+            with self._lock:
+                data = {
+                    scope: {key: acct.to_dict() for key, acct in accounts.items()}
+                    for scope, accounts in self._accounts.items()
+                }
+                self._last_persist = time.time()
+            
+            # A unique temporary file per write, renamed over the snapshot
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+    
+    def load(self, path: Union[str, Path]):
+        """Replace in-memory accounts with a snapshot written by ``save``."""
+        with open(path, "r") as f:
+            data = json.load(f)
+        
+        with self._lock:
+            for scope in self.SCOPES:
+                self._accounts[scope] = OrderedDict(
+                    (key, SpendAccount.from_dict(acct))
+                    for key, acct in data.get(scope, {}).items()
+                )
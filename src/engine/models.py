@@ -55,6 +55,13 @@ class TaskPriority(Enum):
     BACKGROUND = 5
 
 
+class TaskComplexity(Enum):
+    """Estimated task difficulty, used to trade quality for speed and cost."""
+    SIMPLE = "simple"
+    MEDIUM = "medium"
+    COMPLEX = "complex"
+
+
 @dataclass
 class TaskRequirements:
     """
@@ -110,6 +117,7 @@ class Task:
     
     # Classification (filled by classifier)
     intent: TaskIntent = TaskIntent.UNKNOWN
+    complexity: Optional[TaskComplexity] = None
     estimated_input_tokens: Optional[int] = None
     estimated_output_tokens: Optional[int] = None
     
@@ -126,6 +134,26 @@ class Task:
     # Context for routing
     context: Dict[str, Any] = field(default_factory=dict)
     
+    def remaining_seconds(self, now: Optional[datetime] = None) -> Optional[float]:
+        """
+        Time left before the deadline.
+        
+        Args:
+            now: Current time, naive UTC like ``created_at`` (default: now)
+        
+        Returns:
+            Seconds remaining (negative once passed), or None without a deadline
+        """
+        if self.deadline is None:
+            return None
+        return (self.deadline - (now or datetime.utcnow())).total_seconds()
+    
+    @property
+    def is_expired(self) -> bool:
+        """Whether the deadline has passed."""
+        remaining = self.remaining_seconds()
+        return remaining is not None and remaining <= 0
+    
     def estimate_tokens(self) -> tuple[int, int]:
         """Estimate input/output tokens if not provided."""
         if self.estimated_input_tokens and self.estimated_output_tokens:
@@ -184,8 +212,18 @@ class RoutingDecision:
     
     # Tracking
     task_id: Optional[str] = None
+    task_complexity: Optional[str] = None     # "simple", "medium", "complex"
     executed: bool = False
     outcome_recorded: bool = False
+    fallback: bool = False                     # No candidate qualified; see reasoning
+    
+    # Exploration logging: whether the exploration branch was taken and
+    # the probability of selecting this provider (for off-policy learning)
+    explored: bool = False
+    propensity: Optional[float] = None
+    
+    # Prompt compression: tokens removed before dispatch (None if disabled)
+    tokens_saved: Optional[int] = None
     
     def to_dict(self) -> Dict[str, Any]:
         """Serialize to dictionary."""
@@ -198,5 +236,10 @@ class RoutingDecision:
             "estimated_latency_ms": self.estimated_latency_ms,
             "overall_score": self.overall_score,
             "alternatives": self.alternatives,
+            "task_complexity": self.task_complexity,
+            "fallback": self.fallback,
+            "explored": self.explored,
+            "propensity": self.propensity,
+            "tokens_saved": self.tokens_saved,
             "routed_at": self.routed_at.isoformat(),
         }
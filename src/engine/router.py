@@ -4,16 +4,31 @@ Core routing engine for the federation.
 Routes tasks to optimal providers based on quality, speed, cost, and reliability.
 """
 
+import asyncio
+import dataclasses
+import math
 import time
 import random
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple, Any
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union, Any
 
 from ..registry.models import Provider, ProviderStatus
+from ..registry.reload import ConfigStore, ProviderDiff
+from ..registry.snapshot import SnapshotStore, write_snapshot
 from ..registry.store import RegistryStore
-from .models import Task, TaskIntent, TaskRequirements, RoutingDecision
+from ..adapters.base import AdapterResponse
+from ..patterns.mapreduce import MapReducePattern
+from .models import Task, TaskComplexity, TaskIntent, TaskRequirements, RoutingDecision
+from .cascade import CascadeResult, CascadeStep, Validator, run_validators
 from .classifier import IntentClassifier
+from .chunking import ChunkedResult, ChunkStep, split_text
+from .complexity import ComplexityEstimator
+from .compression import CHARS_PER_TOKEN, PromptCompressor, estimate_tokens
 from .cost import CostCalculator
+from .exploration import ExplorationBudget
+from .hedging import HedgeBudget, HedgeResult
+from .sla import FrontierEntry, LatencyTracker, SLAFrontier
 
 
 @dataclass
@@ -54,14 +69,62 @@ class Router:
     WEIGHT_COST = 0.10
     WEIGHT_RELIABILITY = 0.10
     
-    # A/B testing: percentage of traffic to explore
+    # Simple tasks don't need frontier quality; shift weight toward
+    # speed and cost. Medium and complex tasks keep the defaults.
+    # (quality, speed, cost, reliability)
+    COMPLEXITY_WEIGHTS: Dict[TaskComplexity, Tuple[float, float, float, float]] = {
+        TaskComplexity.SIMPLE: (0.25, 0.35, 0.30, 0.10),
+    }
+    
+    # Budget pressure: from this fraction of a tenant's budget onward,
+    # blend toward BUDGET_WEIGHTS (fully applied at 100%)
+    BUDGET_DOWNGRADE_AT = 0.80
+    BUDGET_WEIGHTS: Tuple[float, float, float, float] = (0.20, 0.20, 0.50, 0.10)
+    
+    # SLA mode: observed samples needed before p95 replaces the
+    # provider's typical latency, and how long frontiers are reused
+    SLA_MIN_SAMPLES = 20
+    SLA_REFRESH_SECONDS = 5.0
+    
+    # Provider fields SLA frontier entries are computed from
+    FRONTIER_FIELDS = {
+        "cost.input_per_1m",
+        "cost.output_per_1m",
+        "quality_score",
+        "capabilities.specialties",
+        "capabilities.typical_latency_ms",
+    }
+    
+    # Hedging: first-token latency quantile after which a backup starts
+    HEDGE_QUANTILE = 0.95
+    
+    # A/B testing: share of traffic funding exploration, spent mostly on
+    # low-priority tasks and never on CRITICAL ones (see ExplorationBudget)
     EXPLORATION_RATE = 0.05  # 5% for enterprise stability
+    EXPLORATION_TOP_N = 3
+    
+    # Chunk-and-reduce for inputs no context window can hold: chunks take
+    # a share of the smallest fan-out provider's context, are spread over
+    # the top-ranked providers, and reduce at most MAX_REDUCE_ROUNDS deep
+    CHUNK_CONTEXT_FRACTION = 0.5
+    CHUNK_FANOUT = 3
+    CHUNK_MAX_WORKERS = 5
+    MAX_REDUCE_ROUNDS = 3
+    CHUNK_INSTRUCTION = (
+        "Process the following part of a larger input. Results for all "
+        "parts will be combined afterwards."
+    )
     
     def __init__(
         self,
         store: RegistryStore,
         classifier: Optional[IntentClassifier] = None,
         cost_calculator: Optional[CostCalculator] = None,
+        complexity_estimator: Optional[ComplexityEstimator] = None,
+        latency_tracker: Optional[LatencyTracker] = None,
+        hedge_budget: Optional[HedgeBudget] = None,
+        exploration_budget: Optional[ExplorationBudget] = None,
+        compressor: Optional[PromptCompressor] = None,
     ):
         """
         Initialize router.
@@ -70,10 +133,28 @@ class Router:
             store: Provider registry store
             classifier: Intent classifier (default: rule-based)
             cost_calculator: Cost calculator (default: standard)
+            complexity_estimator: Complexity estimator (default: heuristic)
+            latency_tracker: Observed latencies for SLA routing (default: empty)
+            hedge_budget: Limit on hedged requests (default: 5% of traffic)
+            exploration_budget: Exploration allowance (default: EXPLORATION_RATE)
+            compressor: Prompt compression applied once a provider is
+                chosen (default: none)
         """
         self.store = store
         self.classifier = classifier or IntentClassifier()
         self.cost_calc = cost_calculator or CostCalculator()
+        self.complexity = complexity_estimator or ComplexityEstimator()
+        self.latency = latency_tracker or LatencyTracker()
+        self.first_token_latency = LatencyTracker()
+        self.hedge_budget = hedge_budget or HedgeBudget()
+        self.exploration = exploration_budget or ExplorationBudget(rate=self.EXPLORATION_RATE)
+        self.compressor = compressor
+        
+        # Per-intent SLA frontiers, rebuilt when stale or when the set of
+        # healthy providers changes
+        self._sla_frontiers: Dict[TaskIntent, SLAFrontier] = {}
+        self._sla_providers: Tuple[str, ...] = ()
+        self._sla_built_at = 0.0
     
     def route(self, task: Task) -> RoutingDecision:
         """
@@ -81,7 +162,7 @@ class Router:
         
         Args:
             task: The task to route
-            
+        
         Returns:
             RoutingDecision with selected provider and metadata
         """
@@ -91,37 +172,869 @@ class Router:
         if task.intent is None or task.intent.value == "unknown":
             task.intent, confidence = self.classifier.classify_with_confidence(task)
         
+        # Step 1b: Estimate complexity if not already done
+        if task.complexity is None:
+            task.complexity = self.complexity.estimate(task)
+        
+        # SLA mode: cheapest provider meeting latency and quality bounds
+        reqs = task.requirements
+        if reqs.max_latency_ms is not None or reqs.min_quality_score is not None:
+            return self.route_sla(task, start_time)
+        
         # Step 2: Get candidate providers
         candidates = self._get_candidates(task)
         
         if not candidates:
-            return self._create_fallback_decision(task, "No providers available")
+            return self._create_fallback_decision(task, self._no_candidates_reason(task))
         
         # Step 3: Score candidates
         scored = self._score_providers(candidates, task)
         
         # Step 4: Select provider
-        selected = self._select_provider(scored, task)
+        selected, explored, propensity = self._select_provider(scored, task)
+        
+        # Step 4b: Compress the prompt to fit the chosen provider
+        tokens_saved = self._compress(task, selected.provider)
         
         # Step 5: Build decision
         decision_time_ms = int((time.time() - start_time) * 1000)
         decision = self._build_decision(selected, scored, task, decision_time_ms)
+        decision.explored = explored
+        decision.propensity = propensity
+        decision.tokens_saved = tokens_saved
         
         return decision
     
+    def _compress(self, task: Task, provider: Provider) -> Optional[int]:
+        """
+        Run the compression stage, if configured, for the chosen provider.
+        
+        Returns:
+            Tokens saved, or None when compression is disabled
+        """
+        if self.compressor is None:
+            return None
+        return self.compressor.compress_task(task, provider).tokens_saved
+    
+    def _no_candidates_reason(self, task: Task) -> str:
+        """Explain why ``_get_candidates`` came back empty."""
+        remaining = self.cost_calc.remaining_budget(task.tenant_id)
+        if remaining is not None and remaining <= 0:
+            return "Tenant budget exhausted"
+        if task.is_expired:
+            return "Deadline passed"
+        if self.exceeds_context(task):
+            return "Input exceeds every provider's context window (use route_chunked)"
+        if task.deadline is not None:
+            return "No provider can meet the deadline"
+        return "No providers available"
+    
+    def route_sla(self, task: Task, start_time: Optional[float] = None) -> RoutingDecision:
+        """
+        Route to the cheapest provider meeting the task's SLA.
+        
+        ``requirements.max_latency_ms`` bounds observed p95 latency and
+        ``requirements.min_quality_score`` bounds the provider's quality
+        for the task's intent. The answer comes from the intent's
+        precomputed frontier; other hard requirements, health, and the
+        cost ceiling are then checked, with a scan of the eligible
+        candidates if the frontier's choice is ruled out.
+        
+        Args:
+            task: The task to route (intent must already be set)
+            start_time: When routing began, for decision timing
+        
+        Returns:
+            RoutingDecision for the selected provider, or a fallback
+        """
+        start_time = start_time or time.time()
+        reqs = task.requirements
+        
+        providers = self.store.get_all_providers()
+        frontier = self._sla_frontier(task.intent, providers)
+        entry = frontier.cheapest(reqs.min_quality_score, reqs.max_latency_ms)
+        if entry is None:
+            return self._create_fallback_decision(task, "No provider meets the SLA")
+        
+        provider = providers.get(entry.provider_id)
+        candidates = self._get_candidates(task)
+        
+        if entry.provider_id not in {p.id for p in candidates}:
+            # Ruled out by a requirement the frontier doesn't model:
+            # take the cheapest remaining candidate that meets the SLA
+            eligible = [
+                e for e in (self._frontier_entry(p, task.intent) for p in candidates)
+                if (reqs.min_quality_score is None or e.quality >= reqs.min_quality_score)
+                and (reqs.max_latency_ms is None or e.latency_ms <= reqs.max_latency_ms)
+            ]
+            if not eligible:
+                return self._create_fallback_decision(task, "No provider meets the SLA")
+            entry = min(eligible, key=lambda e: e.cost)
+            provider = providers[entry.provider_id]
+        
+        selected = self._score_providers([provider], task)[0]
+        tokens_saved = self._compress(task, provider)
+        decision_time_ms = int((time.time() - start_time) * 1000)
+        decision = self._build_decision(selected, [selected], task, decision_time_ms)
+        
+        decision.propensity = 1.0
+        decision.tokens_saved = tokens_saved
+        if not math.isinf(entry.latency_ms):
+            decision.estimated_latency_ms = int(entry.latency_ms)
+        decision.reasoning = (
+            f"Selected {provider.name} ({provider.emoji}) as the cheapest provider "
+            f"meeting the SLA. p95 latency: {decision.estimated_latency_ms}ms, "
+            f"Quality: {entry.quality:.0%}"
+        )
+        return decision
+    
+    def swap_registry(self, store: RegistryStore, diff: Optional[ProviderDiff] = None):
+        """
+        Route from a new registry store.
+        
+        The swap is a single assignment: requests in flight keep the
+        providers they already read, later ones see the new set. With a
+        diff, only the structures it affects are reset: SLA frontiers
+        when a provider is added or removed or a field they are built
+        from changes, and latency samples of removed providers.
+        
+        Args:
+            store: Store to route from
+            diff: What changed (None: treat everything as changed)
+        """
+        self.store = store
+        
+        if diff is None:
+            self._sla_built_at = float("-inf")
+            return
+        
+        for provider_id in diff.removed:
+            self.latency.forget(provider_id)
+            self.first_token_latency.forget(provider_id)
+        if diff.added or diff.removed or diff.changed_fields & self.FRONTIER_FIELDS:
+            self._sla_built_at = float("-inf")
+    
+    def reload_registry(self, diff: ProviderDiff):
+        """
+        Apply a config diff (see ConfigWatcher) to a ConfigStore registry.
+        
+        Raises:
+            TypeError: If the router's store isn't a ConfigStore
+        """
+        if not isinstance(self.store, ConfigStore):
+            raise TypeError("Config reloads need a router over a ConfigStore")
+        self.swap_registry(self.store.apply(diff), diff)
+    
+    def record_latency(self, provider_id: str, latency_ms: float):
+        """Record an observed request latency for SLA routing."""
+        self.latency.record(provider_id, latency_ms)
+    
+    def provider_latency(self, provider: Provider) -> float:
+        """
+        Best available p95 latency estimate for a provider.
+        
+        Observed p95 once enough samples exist, then the health check
+        average, then the configured typical latency (inf if unknown).
+        """
+        if self.latency.count(provider.id) >= self.SLA_MIN_SAMPLES:
+            return self.latency.percentile(provider.id, 0.95)
+        if provider.health.avg_latency_ms:
+            return provider.health.avg_latency_ms
+        if provider.capabilities.typical_latency_ms:
+            return float(provider.capabilities.typical_latency_ms)
+        return math.inf
+    
+    def _can_finish_in(self, provider: Provider, seconds: float) -> bool:
+        """Whether the provider's predicted latency fits in ``seconds``."""
+        latency_ms = self.provider_latency(provider)
+        # Unknown latency can't be ruled out
+        return math.isinf(latency_ms) or latency_ms <= seconds * 1000
+    
+    def _frontier_entry(self, provider: Provider, intent: TaskIntent) -> FrontierEntry:
+        """Place a provider in cost/quality/latency space for an intent."""
+        # Blended price at a 3:1 input:output token mix, so the ordering
+        # doesn't depend on any one task's token estimate
+        blended = (provider.cost.input_per_1m * 3 + provider.cost.output_per_1m) / 4
+        quality = self._calc_quality_score(provider, Task(id="sla", intent=intent))
+        return FrontierEntry(provider.id, blended, quality, self.provider_latency(provider))
+    
+    def _sla_frontier(self, intent: TaskIntent, providers: Dict[str, Provider]) -> SLAFrontier:
+        """Get the intent's frontier, rebuilding all of them when stale."""
+        healthy = tuple(sorted(pid for pid, p in providers.items() if p.is_healthy))
+        now = time.time()
+        
+        if healthy != self._sla_providers or now - self._sla_built_at >= self.SLA_REFRESH_SECONDS:
+            self._sla_frontiers = {}
+            self._sla_providers = healthy
+            self._sla_built_at = now
+        
+        frontier = self._sla_frontiers.get(intent)
+        if frontier is None:
+            frontier = self._sla_frontiers[intent] = SLAFrontier(
+                self._frontier_entry(providers[pid], intent) for pid in healthy
+            )
+        return frontier
+    
+    def cascade_ladder(self, task: Task, max_steps: int = 3) -> List[ScoredProvider]:
+        """
+        Build the escalation ladder for cascade routing.
+        
+        The first rung is the cheapest eligible provider for the task.
+        Each following rung is the cheapest provider with strictly higher
+        quality than the rung below, so the ladder climbs in quality and
+        ends no lower than the normal routing choice.
+        
+        Args:
+            task: The task to route
+            max_steps: Maximum number of rungs
+        
+        Returns:
+            Scored providers in escalation order
+        """
+        if task.intent is None or task.intent.value == "unknown":
+            task.intent, _ = self.classifier.classify_with_confidence(task)
+        if task.complexity is None:
+            task.complexity = self.complexity.estimate(task)
+        
+        candidates = self._get_candidates(task)
+        if not candidates:
+            return []
+        
+        scored = self._score_providers(candidates, task)
+        
+        # Unrounded relative cost: ProviderCost.estimate rounds to 4
+        # decimals, which ties every provider on short prompts
+        input_tokens, output_tokens = task.estimate_tokens()
+        input_tokens, output_tokens = max(input_tokens, 1), max(output_tokens, 1)
+        by_cost = sorted(
+            scored,
+            key=lambda s: (
+                s.provider.cost.input_per_1m * input_tokens +
+                s.provider.cost.output_per_1m * output_tokens,
+                -s.quality_score,
+            ),
+        )
+        
+        ladder = [by_cost[0]]
+        for candidate in by_cost[1:]:
+            if len(ladder) >= max_steps:
+                break
+            if candidate.quality_score > ladder[-1].quality_score:
+                ladder.append(candidate)
+        
+        # Always finish on the top-scored provider
+        best = scored[0]
+        if best.quality_score > ladder[-1].quality_score:
+            if len(ladder) >= max_steps:
+                ladder[-1] = best
+            else:
+                ladder.append(best)
+        
+        return ladder
+    
+    async def route_cascade(
+        self,
+        task: Task,
+        execute: Callable[[Provider, Task], Awaitable[AdapterResponse]],
+        validators: List[Validator],
+        max_steps: int = 3,
+    ) -> CascadeResult:
+        """
+        Execute a task cheapest-first, escalating when validation fails.
+        
+        With ``task.deadline`` set, rungs whose predicted latency exceeds
+        the time left are skipped and each call is cancelled when the
+        deadline passes. ``execute`` should pass the remaining time on to
+        the adapter (``AdapterRequest.from_task`` does this).
+        
+        Args:
+            task: The task to execute
+            execute: Coroutine that runs the task on a provider
+            validators: Checks a response must pass (see engine.cascade)
+            max_steps: Maximum number of providers to try
+        
+        Returns:
+            CascadeResult with the accepted (or last) response and every step
+        """
+        ladder = self.cascade_ladder(task, max_steps)
+        result = CascadeResult(response=None, provider_id=None, validated=False)
+        
+        for rung in ladder:
+            provider = rung.provider
+            
+            # Never start a call the deadline can't accommodate
+            remaining = task.remaining_seconds()
+            if remaining is not None:
+                if remaining <= 0:
+                    result.deadline_exceeded = True
+                    break
+                if not self._can_finish_in(provider, remaining):
+                    continue
+            
+            start_time = time.time()
+            
+            try:
+                # Cancel the call as soon as the deadline passes
+                response = await asyncio.wait_for(execute(provider, task), timeout=remaining)
+            except Exception as e:
+                timed_out = isinstance(e, asyncio.TimeoutError) and task.is_expired
+                result.deadline_exceeded = result.deadline_exceeded or timed_out
+                result.steps.append(CascadeStep(
+                    provider_id=provider.id,
+                    model=provider.models[0] if provider.models else None,
+                    passed=False,
+                    latency_ms=int((time.time() - start_time) * 1000),
+                    error="Deadline exceeded" if timed_out else str(e),
+                ))
+                if timed_out:
+                    break
+                continue
+            
+            failed = await run_validators(validators, task, response)
+            result.steps.append(CascadeStep(
+                provider_id=provider.id,
+                model=response.model,
+                passed=not failed,
+                failed_checks=failed,
+                cost_usd=response.cost_usd,
+                latency_ms=response.latency_ms or int((time.time() - start_time) * 1000),
+            ))
+            self.record_latency(provider.id, result.steps[-1].latency_ms)
+            
+            if task.tenant_id and response.cost_usd:
+                self.cost_calc.track_spend(
+                    task.tenant_id,
+                    provider.id,
+                    response.cost_usd,
+                    user_id=task.user_id,
+                    session_id=task.session_id,
+                )
+            
+            # Keep the latest response so callers get a best effort
+            # answer even when every rung fails validation
+            result.response = response
+            result.provider_id = provider.id
+            
+            if not failed:
+                result.validated = True
+                break
+        
+        return result
+    
+    async def route_hedged(
+        self,
+        task: Task,
+        execute: Callable[[Provider, Task, Callable[[], None]], Awaitable[AdapterResponse]],
+        quantile: Optional[float] = None,
+    ) -> HedgeResult:
+        """
+        Execute a task with a tail-latency hedge.
+        
+        The routed provider runs first. If it hasn't produced a first
+        token within its observed first-token latency quantile, and the
+        hedge budget allows, the next-ranked alternative is started too.
+        If the primary fails within that window the alternative is started
+        at once instead (a failover, which adds no load and so needs no
+        budget). The wait never outlasts the task's deadline. The first
+        successful response wins and the other call is cancelled. A
+        cancelled loser's input tokens are billed, so their estimated cost
+        is tracked as duplicate spend.
+        
+        Args:
+            task: The task to execute
+            execute: Coroutine running the task on a provider; it calls
+                the given ``on_first_token`` callback when streaming starts
+                (non-streaming calls may ignore it)
+            quantile: First-token latency quantile (default: HEDGE_QUANTILE)
+        
+        Returns:
+            HedgeResult with the winning response, or the routing error
+            (nothing is executed) when no provider qualifies
+        """
+        decision = self.route(task)
+        if decision.fallback:
+            # Routing rejected every provider: never dispatch the fallback
+            return HedgeResult(response=None, provider_id=None, error=decision.reasoning)
+        providers = self.store.get_all_providers()
+        primary = providers.get(decision.provider_id)
+        if primary is None:
+            return HedgeResult(response=None, provider_id=None, error=decision.reasoning)
+        
+        backup = next(
+            (
+                providers[alt["provider_id"]] for alt in decision.alternatives
+                if alt["provider_id"] in providers
+            ),
+            None,
+        )
+        
+        self.hedge_budget.on_request()
+        delay = self.hedge_delay(primary, quantile)
+        result = HedgeResult(
+            response=None,
+            provider_id=primary.id,
+            hedge_delay_ms=int(delay * 1000) if delay is not None else 0,
+        )
+        
+        primary_started = asyncio.Event()
+        calls = {
+            asyncio.ensure_future(
+                self._hedge_call(execute, primary, task, primary_started)
+            ): primary,
+        }
+        
+        try:
+            if backup is not None and delay is not None:
+                remaining = task.remaining_seconds()
+                wait = delay if remaining is None else max(0.0, min(delay, remaining))
+                first_token = asyncio.ensure_future(primary_started.wait())
+                done, _ = await asyncio.wait(
+                    [*calls, first_token],
+                    timeout=wait,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                first_token.cancel()
+                
+                failed = any(call in done and call.exception() is not None for call in calls)
+                # A wait cut short by the deadline leaves no time for a backup
+                stalled = not done and wait == delay
+                if failed or (stalled and self.hedge_budget.try_acquire()):
+                    calls[asyncio.ensure_future(
+                        self._hedge_call(execute, backup, task, asyncio.Event())
+                    )] = backup
+                    result.hedged = stalled
+                    result.backup_provider_id = backup.id
+            
+            winner, response, error = await self._first_success(
+                calls, task.remaining_seconds()
+            )
+        finally:
+            losers = [call for call in calls if not call.done()]
+            for call in losers:
+                call.cancel()
+            await asyncio.gather(*losers, return_exceptions=True)
+        
+        result.error = error
+        if winner is not None:
+            result.response = response
+            result.provider_id = winner.id
+            result.winner = "primary" if winner is primary else "backup"
+        
+        # Duplicate spend: a finished loser's actual cost, or the input
+        # tokens a cancelled loser was billed for
+        input_tokens, _ = task.estimate_tokens()
+        for call, provider in calls.items():
+            if provider is winner:
+                continue
+            if call.cancelled():
+                result.duplicate_cost_usd += provider.cost.estimate(input_tokens, 0)
+            elif call.done() and call.exception() is None:
+                result.duplicate_cost_usd += call.result().cost_usd
+        
+        if task.tenant_id and result.total_cost:
+            self.cost_calc.track_spend(
+                task.tenant_id,
+                result.provider_id,
+                result.total_cost,
+                user_id=task.user_id,
+                session_id=task.session_id,
+            )
+        
+        return result
+    
+    def exceeds_context(self, task: Task) -> bool:
+        """
+        Whether the task's input is too large for every provider that
+        otherwise qualifies.
+        
+        The size is the larger of ``requirements.min_context`` and the
+        estimated input tokens.
+        """
+        providers = self._context_relaxed_candidates(task)
+        if not providers:
+            return False
+        input_tokens, _ = task.estimate_tokens()
+        required = max(task.requirements.min_context or 0, input_tokens)
+        return required > max(p.capabilities.max_context for p in providers)
+    
+    def _context_relaxed_candidates(self, task: Task) -> List[Provider]:
+        """Candidates for the task if the context window were no constraint."""
+        probe = dataclasses.replace(
+            task,
+            prompt="",
+            estimated_input_tokens=None,
+            estimated_output_tokens=None,
+            requirements=dataclasses.replace(task.requirements, min_context=None),
+        )
+        return self._get_candidates(probe)
+    
+    async def route_chunked(
+        self,
+        task: Task,
+        execute: Callable[[Provider, Task], Awaitable[AdapterResponse]],
+        instruction: Optional[str] = None,
+        max_workers: Optional[int] = None,
+    ) -> ChunkedResult:
+        """
+        Execute an over-length task by chunk-and-reduce.
+        
+        The prompt is split into chunks sized for the smallest of the
+        CHUNK_FANOUT best-ranked providers. Chunks are mapped in parallel
+        (round-robin over those providers, failing over to the next one on
+        error), then the partial results are reduced; if they don't fit
+        one call, they are reduced in groups first, at most
+        MAX_REDUCE_ROUNDS deep. ``task.deadline`` bounds every call.
+        
+        Args:
+            task: The task to execute
+            execute: Coroutine that runs a (sub)task on a provider
+            instruction: What to do with each chunk and with the combined
+                results (default: CHUNK_INSTRUCTION)
+            max_workers: Parallel map calls (default: CHUNK_MAX_WORKERS)
+        
+        Returns:
+            ChunkedResult with the reduced response and every call made
+        """
+        if task.intent is None or task.intent.value == "unknown":
+            task.intent = self.classifier.classify(task)
+        if task.complexity is None:
+            task.complexity = self.complexity.estimate(task)
+        
+        instruction = instruction or self.CHUNK_INSTRUCTION
+        candidates = self._context_relaxed_candidates(task)
+        if not candidates:
+            return ChunkedResult(
+                response=None, chunks=0, chunk_tokens=0,
+                error=self._no_candidates_reason(task),
+            )
+        
+        # Admission on the whole job's cost, with each provider's own
+        # chunking (a lower bound), then again at the fan-out's chunk size
+        cost_ceiling = self._cost_ceiling(task)
+        if cost_ceiling is not None:
+            candidates = [
+                p for p in candidates
+                if self._chunked_cost(task, p, instruction, self._chunk_budget(task, [p], instruction)) <= cost_ceiling
+            ]
+        fanout = [s.provider for s in self._score_providers(candidates, task)[:self.CHUNK_FANOUT]]
+        
+        chunk_tokens = self._chunk_budget(task, fanout, instruction) if fanout else 0
+        if fanout and chunk_tokens <= 0:
+            return ChunkedResult(
+                response=None, chunks=0, chunk_tokens=0,
+                error="Instruction leaves no room for input",
+            )
+        if cost_ceiling is not None:
+            fanout = [
+                p for p in fanout
+                if self._chunked_cost(task, p, instruction, chunk_tokens) <= cost_ceiling
+            ]
+        if not fanout:
+            return ChunkedResult(
+                response=None, chunks=0, chunk_tokens=0,
+                error="Estimated cost of chunked execution exceeds the cost ceiling",
+            )
+        
+        chunks = split_text(task.prompt, chunk_tokens)
+        result = ChunkedResult(response=None, chunks=len(chunks), chunk_tokens=chunk_tokens)
+        
+        async def map_chunk(item: Tuple[int, str]) -> AdapterResponse:
+            index, chunk = item
+            prompt = f"{instruction}\n\n[Part {index + 1} of {len(chunks)}]\n\n{chunk}"
+            try:
+                return await self._chunk_call(task, "map", index, prompt, fanout, execute, result)
+            except Exception:
+                result.failed_chunks.append(index)
+                raise
+        
+        async def reduce(partials: List[AdapterResponse]) -> AdapterResponse:
+            return await self._reduce_partials(
+                task, partials, instruction, chunk_tokens, fanout, execute, result
+            )
+        
+        pattern = MapReducePattern(max_workers=max_workers or self.CHUNK_MAX_WORKERS)
+        outcome = await pattern.execute(
+            items=list(enumerate(chunks)),
+            map_fn=map_chunk,
+            reduce_fn=reduce,
+        )
+        
+        result.failed_chunks.sort()
+        if isinstance(outcome.results, AdapterResponse):
+            result.response = outcome.results
+        elif outcome.errors:
+            result.error = str(outcome.errors[-1]) or type(outcome.errors[-1]).__name__
+        else:
+            result.error = "No input to process"
+        
+        return result
+    
+    def _chunk_budget(self, task: Task, providers: List[Provider], instruction: str) -> int:
+        """Input tokens per chunk for the smallest context among ``providers``."""
+        smallest = min(p.capabilities.max_context for p in providers)
+        return (
+            int(smallest * self.CHUNK_CONTEXT_FRACTION)
+            - estimate_tokens(instruction)
+            - estimate_tokens(task.system_prompt or "")
+        )
+    
+    def _chunked_tokens(self, task: Task, instruction: str, chunk_tokens: int) -> Tuple[int, int]:
+        """
+        Estimated (input, output) tokens of a whole chunk-and-reduce job.
+        
+        Every map call repeats the instruction and system prompt; map
+        outputs together are the task's estimated output, and they are
+        reduced in groups of ``chunk_tokens`` until one call remains.
+        """
+        _, output_tokens = task.estimate_tokens()
+        prompt_tokens = estimate_tokens(task.prompt)
+        # Instruction, system prompt and the part header, per call
+        overhead = estimate_tokens(instruction) + estimate_tokens(task.system_prompt or "") + 16
+        
+        chunks = max(1, math.ceil(prompt_tokens / chunk_tokens))
+        per_call_output = max(1, output_tokens // chunks)
+        input_total = prompt_tokens + chunks * overhead
+        output_total = output_tokens
+        
+        partials = output_tokens
+        for _ in range(self.MAX_REDUCE_ROUNDS):
+            groups = max(1, math.ceil(partials / chunk_tokens))
+            input_total += partials + groups * overhead
+            output_total += groups * per_call_output
+            partials = groups * per_call_output
+            if groups == 1:
+                break
+        
+        return input_total, output_total
+    
+    def _chunked_cost(self, task: Task, provider: Provider, instruction: str, chunk_tokens: int) -> float:
+        """Estimated cost of running the whole chunked job on one provider."""
+        if chunk_tokens <= 0:
+            return math.inf
+        return provider.cost.estimate(*self._chunked_tokens(task, instruction, chunk_tokens))
+    
+    async def _reduce_partials(
+        self,
+        task: Task,
+        partials: List[AdapterResponse],
+        instruction: str,
+        budget_tokens: int,
+        fanout: List[Provider],
+        execute: Callable[[Provider, Task], Awaitable[AdapterResponse]],
+        result: ChunkedResult,
+    ) -> AdapterResponse:
+        """Combine partial results, in groups while they exceed the budget."""
+        if len(partials) == 1:
+            return partials[0]
+        
+        budget_chars = budget_tokens * CHARS_PER_TOKEN
+        for round_index in range(self.MAX_REDUCE_ROUNDS):
+            # Greedily pack consecutive partials into groups that fit
+            groups: List[List[str]] = [[]]
+            size = 0
+            for partial in partials:
+                text = partial.content or ""
+                if groups[-1] and size + len(text) > budget_chars:
+                    groups.append([])
+                    size = 0
+                groups[-1].append(text)
+                size += len(text)
+            
+            if round_index == self.MAX_REDUCE_ROUNDS - 1:
+                # Out of rounds: the final call gets everything
+                groups = [[text for group in groups for text in group]]
+            
+            result.reduce_rounds += 1
+            outputs = await asyncio.gather(
+                *[
+                    self._chunk_call(
+                        task, "reduce", i, self._reduce_prompt(instruction, group),
+                        fanout, execute, result,
+                    )
+                    for i, group in enumerate(groups)
+                ],
+                return_exceptions=True,
+            )
+            for output in outputs:
+                if isinstance(output, BaseException):
+                    raise output
+            
+            partials = outputs
+            if len(partials) == 1:
+                return partials[0]
+        
+        return partials[0]
+    
+    @staticmethod
+    def _reduce_prompt(instruction: str, partials: List[str]) -> str:
+        """Prompt combining partial results in input order."""
+        parts = "\n\n".join(
+            f"[Result {i + 1}]\n{text}" for i, text in enumerate(partials)
+        )
+        return (
+            f"{instruction}\n\nCombine the following partial results, which "
+            f"cover consecutive parts of the input, into a single answer.\n\n{parts}"
+        )
+    
+    async def _chunk_call(
+        self,
+        task: Task,
+        stage: str,
+        index: int,
+        prompt: str,
+        fanout: List[Provider],
+        execute: Callable[[Provider, Task], Awaitable[AdapterResponse]],
+        result: ChunkedResult,
+    ) -> AdapterResponse:
+        """Run one map/reduce call, rotating over providers on failure."""
+        subtask = Task(
+            id=f"{task.id}:{stage}{index}",
+            session_id=task.session_id,
+            prompt=prompt,
+            system_prompt=task.system_prompt,
+            intent=task.intent,
+            complexity=task.complexity,
+            requirements=dataclasses.replace(task.requirements, min_context=None),
+            priority=task.priority,
+            tenant_id=task.tenant_id,
+            user_id=task.user_id,
+            deadline=task.deadline,
+            context=task.context,
+        )
+        
+        error = "No providers available"
+        for offset in range(len(fanout)):
+            provider = fanout[(index + offset) % len(fanout)]
+            remaining = task.remaining_seconds()
+            if remaining is not None and remaining <= 0:
+                error = "Deadline exceeded"
+                break
+            
+            start_time = time.time()
+            try:
+                response = await asyncio.wait_for(execute(provider, subtask), timeout=remaining)
+            except Exception as e:
+                error = "Deadline exceeded" if task.is_expired else (str(e) or type(e).__name__)
+                result.steps.append(ChunkStep(
+                    stage=stage,
+                    index=index,
+                    provider_id=provider.id,
+                    latency_ms=int((time.time() - start_time) * 1000),
+                    error=error,
+                ))
+                continue
+            
+            latency_ms = response.latency_ms or int((time.time() - start_time) * 1000)
+            self.record_latency(provider.id, latency_ms)
+            result.steps.append(ChunkStep(
+                stage=stage,
+                index=index,
+                provider_id=provider.id,
+                cost_usd=response.cost_usd,
+                latency_ms=latency_ms,
+            ))
+            
+            if task.tenant_id and response.cost_usd:
+                self.cost_calc.track_spend(
+                    task.tenant_id,
+                    provider.id,
+                    response.cost_usd,
+                    user_id=task.user_id,
+                    session_id=task.session_id,
+                )
+            return response
+        
+        raise RuntimeError(f"{stage} {index} failed: {error}")
+    
+    def hedge_delay(self, provider: Provider, quantile: Optional[float] = None) -> Optional[float]:
+        """
+        Seconds to wait for a first token before hedging.
+        
+        Uses the observed first-token quantile once enough samples exist,
+        otherwise the provider's predicted latency. None if unknown.
+        """
+        quantile = quantile or self.HEDGE_QUANTILE
+        if self.first_token_latency.count(provider.id) >= self.SLA_MIN_SAMPLES:
+            return self.first_token_latency.percentile(provider.id, quantile) / 1000
+        
+        latency_ms = self.provider_latency(provider)
+        return None if math.isinf(latency_ms) else latency_ms / 1000
+    
+    async def _hedge_call(
+        self,
+        execute: Callable[[Provider, Task, Callable[[], None]], Awaitable[AdapterResponse]],
+        provider: Provider,
+        task: Task,
+        started: asyncio.Event,
+    ) -> AdapterResponse:
+        """Run one hedge leg, recording first-token and total latency."""
+        start_time = time.time()
+        
+        def on_first_token():
+            if not started.is_set():
+                started.set()
+                self.first_token_latency.record(provider.id, (time.time() - start_time) * 1000)
+        
+        response = await execute(provider, task, on_first_token)
+        on_first_token()
+        self.record_latency(provider.id, (time.time() - start_time) * 1000)
+        return response
+    
+    async def _first_success(
+        self,
+        calls: Dict["asyncio.Future", Provider],
+        timeout: Optional[float],
+    ) -> Tuple[Optional[Provider], Optional[AdapterResponse], Optional[str]]:
+        """
+        Wait for the first call to succeed.
+        
+        Returns:
+            Tuple of (winning provider, response, error if none succeeded)
+        """
+        pending = set(calls)
+        error = None
+        deadline = time.time() + timeout if timeout is not None else None
+        
+        while pending:
+            wait = None if deadline is None else max(0.0, deadline - time.time())
+            done, pending = await asyncio.wait(
+                pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                return None, None, "Deadline exceeded"
+            
+            for call in done:
+                if call.exception() is None:
+                    return calls[call], call.result(), None
+                error = str(call.exception())
+        
+        return None, None, error
+    
     def _get_candidates(self, task: Task) -> List[Provider]:
         """
         Filter providers based on task requirements.
         
         Args:
             task: The task to route
-            
+        
         Returns:
             List of eligible providers
         """
         all_providers = self.store.get_all_providers()
         candidates = []
         
+        remaining = self.cost_calc.remaining_budget(task.tenant_id)
+        if remaining is not None and remaining <= 0:
+            # Exhausted: even near-free estimates are not admitted
+            return []
+        cost_ceiling = self._cost_ceiling(task)
+        input_tokens, output_tokens = task.estimate_tokens()
+        
+        # Deadline: nothing can start once it has passed
+        remaining_seconds = task.remaining_seconds()
+        if remaining_seconds is not None and remaining_seconds <= 0:
+            return []
+        
         for provider in all_providers.values():
             # Basic health check
             if not provider.is_healthy:
@@ -131,6 +1044,20 @@ class Router:
             if not self._meets_requirements(provider, task.requirements):
                 continue
             
+            # The input itself must fit the context window
+            if provider.capabilities.max_context < input_tokens:
+                continue
+            
+            # Check cost against max_cost and budget
+            if cost_ceiling is not None:
+                if provider.cost.estimate(input_tokens, output_tokens) > cost_ceiling:
+                    continue
+            
+            # Check predicted latency against the time left
+            if remaining_seconds is not None:
+                if not self._can_finish_in(provider, remaining_seconds):
+                    continue
+            
             # Check governance policy
             if task.requirements.governance_policy:
                 if not self._check_governance(provider, task.requirements.governance_policy):
@@ -140,6 +1067,14 @@ class Router:
         
         return candidates
     
+    def _cost_ceiling(self, task: Task) -> Optional[float]:
+        """The tighter of the task's max_cost and the tenant's remaining budget."""
+        cost_ceiling = task.requirements.max_cost
+        remaining = self.cost_calc.remaining_budget(task.tenant_id)
+        if remaining is not None:
+            cost_ceiling = remaining if cost_ceiling is None else min(cost_ceiling, remaining)
+        return cost_ceiling
+    
     def _meets_requirements(self, provider: Provider, reqs: TaskRequirements) -> bool:
         """Check if provider meets task requirements."""
         caps = provider.capabilities
@@ -199,31 +1134,41 @@ class Router:
         Args:
             providers: List of candidate providers
             task: The task being routed
-            
+        
         Returns:
             List of scored providers
         """
         scored = []
+        w_quality, w_speed, w_cost, w_reliability = self._weights_for(task)
+        static = self._snapshot_scores(task)
         
         for provider in providers:
-            # Quality score (0-1)
-            quality = self._calc_quality_score(provider, task)
-            
-            # Speed score (0-1)
-            speed = self._calc_speed_score(provider, task)
-            
-            # Cost score (0-1, higher = more cost-efficient)
-            cost = self._calc_cost_score(provider, task)
+            if static is not None and static[1].get(provider.id) is provider:
+                # Precomputed in the snapshot this provider came from
+                (quality_table, speed_table, cost_table), _, positions = static
+                position = positions[provider.id]
+                quality = quality_table[position]
+                speed = speed_table[position]
+                cost = cost_table[position]
+            else:
+                # Quality score (0-1)
+                quality = self._calc_quality_score(provider, task)
+                
+                # Speed score (0-1)
+                speed = self._calc_speed_score(provider, task)
+                
+                # Cost score (0-1, higher = more cost-efficient)
+                cost = self._calc_cost_score(provider, task)
             
             # Reliability score (0-1)
             reliability = self._calc_reliability_score(provider)
             
             # Weighted overall score
             overall = (
-                quality * self.WEIGHT_QUALITY +
-                speed * self.WEIGHT_SPEED +
-                cost * self.WEIGHT_COST +
-                reliability * self.WEIGHT_RELIABILITY
+                quality * w_quality +
+                speed * w_speed +
+                cost * w_cost +
+                reliability * w_reliability
             )
             
             scored.append(ScoredProvider(
@@ -240,6 +1185,77 @@ class Router:
         
         return scored
     
+    def export_snapshot(
+        self,
+        path: Union[str, Path],
+        providers: Optional[Dict[str, Provider]] = None,
+    ) -> Path:
+        """
+        Publish the registry and its static score tables as a snapshot.
+        
+        Quality (per intent), speed and cost scores depend only on
+        provider configuration, so they are computed once here; workers
+        routing from a SnapshotStore on the file read them instead of
+        recomputing. Reliability depends on live health and is always
+        computed at routing time.
+        
+        Args:
+            path: Snapshot file, atomically replaced
+            providers: Providers to export (default: the store's)
+        
+        Returns:
+            The snapshot path
+        """
+        if providers is None:
+            providers = self.store.get_all_providers()
+        ordered = [providers[pid] for pid in sorted(providers)]
+        
+        probe = Task(id="snapshot")
+        tables = {
+            "speed": [self._calc_speed_score(p, probe) for p in ordered],
+            "cost": [self._calc_cost_score(p, probe) for p in ordered],
+        }
+        for intent in TaskIntent:
+            probe = Task(id="snapshot", intent=intent)
+            tables[f"quality:{intent.value}"] = [self._calc_quality_score(p, probe) for p in ordered]
+        
+        return write_snapshot(path, providers, tables)
+    
+    def _snapshot_scores(self, task: Task):
+        """Precomputed (quality, speed, cost) tables when routing from a snapshot."""
+        if not isinstance(self.store, SnapshotStore):
+            return None
+        return self.store.score_tables((f"quality:{task.intent.value}", "speed", "cost"))
+    
+    def _weights_for(self, task: Task) -> Tuple[float, float, float, float]:
+        """
+        Scoring weights (quality, speed, cost, reliability) for a task.
+        
+        Starts from the complexity weights, then blends toward
+        BUDGET_WEIGHTS as the tenant nears its budget.
+        """
+        if task.complexity in self.COMPLEXITY_WEIGHTS:
+            weights = self.COMPLEXITY_WEIGHTS[task.complexity]
+        else:
+            weights = (
+                self.WEIGHT_QUALITY,
+                self.WEIGHT_SPEED,
+                self.WEIGHT_COST,
+                self.WEIGHT_RELIABILITY,
+            )
+        
+        utilization = self.cost_calc.budget_utilization(task.tenant_id)
+        if utilization >= self.BUDGET_DOWNGRADE_AT:
+            pressure = min(
+                1.0,
+                (utilization - self.BUDGET_DOWNGRADE_AT) / (1.0 - self.BUDGET_DOWNGRADE_AT),
+            )
+            weights = tuple(
+                w + (b - w) * pressure for w, b in zip(weights, self.BUDGET_WEIGHTS)
+            )
+        
+        return weights
+    
     def _calc_quality_score(self, provider: Provider, task: Task) -> float:
         """Calculate quality score for provider-task match."""
         # Base quality from provider config
@@ -297,7 +1313,6 @@ class Router:
             return 0.2
         else:
             # Log scale for better differentiation
-            import math
             return 1.0 - (math.log10(avg_cost) - math.log10(0.5)) / 2
     
     def _calc_reliability_score(self, provider: Provider) -> float:
@@ -321,28 +1336,51 @@ class Router:
         self, 
         scored: List[ScoredProvider], 
         task: Task
-    ) -> ScoredProvider:
+    ) -> Tuple[ScoredProvider, bool, float]:
         """
         Select provider from scored list.
         
-        With EXPLORATION_RATE probability, pick a non-top provider
-        to gather learning data.
+        When the exploration budget funds it, pick uniformly from the top
+        EXPLORATION_TOP_N to gather learning data. CRITICAL tasks never
+        explore; see ExplorationBudget for how credit is prioritized.
+        
+        Returns:
+            Tuple of (selected, whether exploration was taken, propensity
+            of the selected provider under this policy)
         """
         if not scored:
             raise ValueError("No scored providers")
         
+        self.exploration.on_request()
+        
         # Always pick best if only one option
         if len(scored) == 1:
-            return scored[0]
+            return scored[0], False, 1.0
+        
+        input_tokens, output_tokens = task.estimate_tokens()
+        p_explore = self.exploration.probability(
+            task.priority,
+            scored[0].provider.cost.estimate(input_tokens, output_tokens),
+        )
+        top_n = min(self.EXPLORATION_TOP_N, len(scored))
         
         # Exploration: occasionally try alternatives
-        if random.random() < self.EXPLORATION_RATE and len(scored) > 1:
-            # Pick randomly from top 3 (not just the best)
-            top_n = min(3, len(scored))
-            return random.choice(scored[:top_n])
+        explored = False
+        selected = scored[0]
+        if p_explore > 0 and random.random() < p_explore:
+            if not self.exploration.spend():
+                # Credit taken concurrently: greedy was the only outcome
+                return selected, False, 1.0
+            explored = True
+            selected = random.choice(scored[:top_n])
+        
+        # P(selected): exploration's uniform share, plus exploitation's
+        # mass if it is the top provider
+        propensity = p_explore / top_n if selected in scored[:top_n] else 0.0
+        if selected is scored[0]:
+            propensity += 1.0 - p_explore
         
-        # Exploitation: pick the best
-        return scored[0]
+        return selected, explored, propensity
     
     def _build_decision(
         self,
@@ -381,6 +1419,7 @@ class Router:
             estimated_latency_ms=estimated_latency,
             decision_time_ms=decision_time_ms,
             task_id=task.id,
+            task_complexity=task.complexity.value if task.complexity else None,
         )
     
     def _generate_reasoning(self, selected: ScoredProvider, task: Task) -> str:
@@ -424,4 +1463,6 @@ class Router:
             estimated_cost=0.0,
             estimated_latency_ms=100,
             task_id=task.id,
+            task_complexity=task.complexity.value if task.complexity else None,
+            fallback=True,
         )
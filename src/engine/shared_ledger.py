@@ -0,0 +1,348 @@
+"""
+Cluster-wide spend ledger.
+
+Replicas share tenant day/month spend counters through Redis so budgets
+hold across the whole deployment. Each node accumulates deltas locally
+and flushes them in pipelined batches; reads combine a periodically
+refreshed cluster total with this node's unflushed deltas.
+"""
+
+import atexit
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+from .ledger import SpendLedger, _month_id
+
+
+class SpendBackend:
+    """
+    Abstract base class for shared spend counter storage.
+    """
+    
+    def increment(self, deltas: Dict[str, float], ttls: Dict[str, int]) -> Dict[str, float]:
+        """
+        Atomically add deltas to counters in one round trip.
+        
+        Args:
+            deltas: Counter key -> amount to add
+            ttls: Counter key -> expiry in seconds
+        
+        Returns:
+            Counter key -> value after the increment
+        """
+        raise NotImplementedError
+    
+    def fetch(self, keys: List[str]) -> Dict[str, float]:
+        """Read counters in one round trip (missing counters read as 0.0)."""
+        raise NotImplementedError
+
+
+class LocalSpendBackend(SpendBackend):
+    """
+    In-process stand-in for Redis counters.
+    
+    Share one instance between several SharedSpendLedgers to simulate
+    replicas in tests or single-host development. Expiry is not modelled.
+    """
+    
+    def __init__(self):
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.round_trips = 0
+        self._lock = threading.Lock()
+    
+    def increment(self, deltas: Dict[str, float], ttls: Dict[str, int]) -> Dict[str, float]:
+        """Add deltas to counters."""
+        with self._lock:
+            self.round_trips += 1
+            for key, amount in deltas.items():
+                self.counters[key] += amount
+            return {key: self.counters[key] for key in deltas}
+    
+    def fetch(self, keys: List[str]) -> Dict[str, float]:
+        """Read counters."""
+        with self._lock:
+            self.round_trips += 1
+            return {key: self.counters.get(key, 0.0) for key in keys}
+
+
+class RedisSpendBackend(SpendBackend):
+    """
+    Redis-backed spend counters.
+    
+    Each flush is a single pipeline of INCRBYFLOAT + EXPIRE per counter;
+    refreshes are a single MGET.
+    """
+    
+    def __init__(
+        self,
+        redis_url: str = "redis://localhost:6379/0",
+        client: Optional["redis.Redis"] = None,
+    ):
+        """
+        Initialize backend.
+        
+        Args:
+            redis_url: Redis connection URL
+            client: Existing client to reuse (e.g. RedisStore.client)
+        """
+        if client is None:
+            if not REDIS_AVAILABLE:
+                raise ImportError("Redis support requires 'redis' package: pip install redis")
+            client = redis.from_url(redis_url, decode_responses=True)
+        
+        self.client = client
+    
+    def increment(self, deltas: Dict[str, float], ttls: Dict[str, int]) -> Dict[str, float]:
+        """Add deltas to counters in one pipelined transaction."""
+        keys = list(deltas)
+        pipe = self.client.pipeline(transaction=True)
+        for key in keys:
+            pipe.incrbyfloat(key, deltas[key])
+            pipe.expire(key, ttls[key])
+        results = pipe.execute()
+        # Results alternate (new value, expire ack)
+        return {key: float(results[i * 2]) for i, key in enumerate(keys)}
+    
+    def fetch(self, keys: List[str]) -> Dict[str, float]:
+        """Read counters with one MGET."""
+        values = self.client.mget(keys)
+        return {key: float(v) if v is not None else 0.0 for key, v in zip(keys, values)}
+
+
+class SharedSpendLedger(SpendLedger):
+    """
+    SpendLedger whose tenant day/month totals are shared across nodes.
+    
+    Spend is recorded locally as usual (sliding windows, user and session
+    rollups stay per-node) and also queued as a delta for the tenant's
+    shared day and month counters. Deltas are flushed in one pipelined
+    batch once ``flush_interval`` seconds or ``max_pending`` records have
+    accumulated; a daemon thread flushes on the interval even when the
+    node is idle, and ``close()`` (also run at interpreter exit) flushes
+    what is left.
+    
+    ``period_spend`` for a tenant returns the last known cluster total
+    plus this node's unflushed deltas, including a batch whose increment
+    has not been acknowledged yet. The cluster total is refreshed at
+    most every ``refresh_interval`` seconds (and updated for free on each
+    flush), so another node's spend is visible here within
+    ``flush_interval + refresh_interval`` seconds.
+    
+    Example:
+        backend = RedisSpendBackend("redis://redis:6379/0")
+        calc = CostCalculator(ledger=SharedSpendLedger(backend))
+        router = Router(store, cost_calculator=calc)
+    """
+    
+    # Counter expiry: keep last month's day counters and last year's months
+    DAY_TTL = 86400 * 35
+    MONTH_TTL = 86400 * 400
+    
+    def __init__(
+        self,
+        backend: SpendBackend,
+        flush_interval: float = 1.0,
+        refresh_interval: float = 2.0,
+        max_pending: int = 500,
+        key_prefix: str = "federation",
+        **kwargs,
+    ):
+        """
+        Initialize shared ledger.
+        
+        Args:
+            backend: Shared counter storage
+            flush_interval: Maximum seconds a local delta waits to be flushed
+            refresh_interval: Maximum age in seconds of a cached cluster total
+            max_pending: Records that trigger an early flush
+            key_prefix: Prefix for counter keys
+            **kwargs: Passed to SpendLedger
+        """
+        super().__init__(**kwargs)
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.refresh_interval = refresh_interval
+        self.max_pending = max_pending
+        self.key_prefix = key_prefix
+        
+        self._pending: Dict[str, float] = defaultdict(float)
+        self._pending_records = 0
+        # Batch being written: counted in reads until acknowledged
+        self._inflight: Dict[str, float] = {}
+        self._last_flush = time.time()
+        # Counter key -> (cluster value, fetched at)
+        self._remote: Dict[str, Tuple[float, float]] = {}
+        self._flush_lock = threading.Lock()
+        
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="spend-flush", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    def _counter_key(self, tenant_id: str, period: str, ts: float) -> str:
+        """Shared counter key for a tenant's day or month."""
+        if period == "daily":
+            return f"{self.key_prefix}:spend:{tenant_id}:day:{int(ts // 86400)}"
+        if period == "monthly":
+            return f"{self.key_prefix}:spend:{tenant_id}:month:{_month_id(ts)}"
+        raise ValueError(f"Unknown period: {period}")
+    
+    def record(
+        self,
+        tenant_id: str,
+        cost: float,
+        timestamp: Optional[datetime] = None,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ):
+        """Record spend locally and queue it for the shared counters."""
+        super().record(tenant_id, cost, timestamp, user_id, session_id)
+        
+        ts = self._ts(timestamp)
+        with self._lock:
+            self._pending[self._counter_key(tenant_id, "daily", ts)] += cost
+            self._pending[self._counter_key(tenant_id, "monthly", ts)] += cost
+            self._pending_records += 1
+            due = (
+                self._pending_records >= self.max_pending or
+                time.time() - self._last_flush >= self.flush_interval
+            )
+        
+        if due:
+            self.flush()
+    
+    def flush(self) -> bool:
+        """
+        Push queued deltas to the backend in one batch.
+        
+        On failure the deltas are re-queued so no spend is lost.
+        
+        Returns:
+            True if the batch was written (or nothing was queued)
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = dict(self._pending), defaultdict(float)
+                self._inflight = batch
+                self._pending_records = 0
+                self._last_flush = time.time()
+            
+            if not batch:
+                return True
+            
+            ttls = {
+                key: self.DAY_TTL if ":day:" in key else self.MONTH_TTL
+                for key in batch
+            }
+            try:
+                totals = self.backend.increment(batch, ttls)
+            except Exception:
+                with self._lock:
+                    for key, amount in batch.items():
+                        self._pending[key] += amount
+                    self._inflight = {}
+                return False
+            
+            # The new totals include the batch: swap them in together
+            now = time.time()
+            with self._lock:
+                for key, value in totals.items():
+                    self._remote[key] = (value, now)
+                self._inflight = {}
+            return True
+    
+    def period_spend(
+        self,
+        key: str,
+        period: str = "daily",
+        at: Optional[datetime] = None,
+        scope: str = "tenant",
+    ) -> float:
+        """
+        Spend in a calendar day or month.
+        
+        Tenant scope is cluster-wide: cached cluster total plus unflushed
+        local deltas. User and session scopes are per-node.
+        """
+        if scope != "tenant":
+            return super().period_spend(key, period, at, scope)
+        
+        if time.time() - self._last_flush >= self.flush_interval:
+            self.flush()
+        
+        counter = self._counter_key(key, period, self._ts(at))
+        cached = self._remote.get(counter)
+        if cached is None or time.time() - cached[1] >= self.refresh_interval:
+            cached = self._refresh(key, period, at, counter)
+        
+        with self._lock:
+            # A refresh racing an unacknowledged flush may count the batch
+            # twice for a moment; overcounting only errs toward the budget
+            unflushed = self._pending.get(counter, 0.0) + self._inflight.get(counter, 0.0)
+        return cached[0] + unflushed
+    
+    def _refresh(
+        self,
+        tenant_id: str,
+        period: str,
+        at: Optional[datetime],
+        counter: str,
+    ) -> Tuple[float, float]:
+        """
+        Re-read a tenant's current day and month counters together.
+        
+        Falls back to the stale value (or this node's flushed spend) if
+        the backend is unreachable.
+        """
+        now = time.time()
+        keys = [counter]
+        for sibling_period in ("daily", "monthly"):
+            sibling = self._counter_key(tenant_id, sibling_period, now)
+            if sibling != counter:
+                keys.append(sibling)
+        
+        try:
+            values = self.backend.fetch(keys)
+        except Exception:
+            stale = self._remote.get(counter)
+            if stale is not None:
+                return stale
+            local = super().period_spend(tenant_id, period, at)
+            unflushed = self._pending.get(counter, 0.0) + self._inflight.get(counter, 0.0)
+            return (local - unflushed, 0.0)
+        
+        with self._lock:
+            for k, value in values.items():
+                # Never let a refresh race a flush into going backwards
+                previous = self._remote.get(k)
+                if previous is not None and previous[0] > value:
+                    value = previous[0]
+                self._remote[k] = (value, now)
+            return self._remote[counter]
+    
+    def _run(self):
+        """Background flush loop, so idle nodes still publish their spend."""
+        while not self._stopped.wait(max(self.flush_interval, 0.05)):
+            try:
+                self.flush()
+            except Exception:
+                # flush() requeues on backend errors; keep the loop alive
+                pass
+    
+    def close(self):
+        """Stop the background flusher and flush remaining deltas."""
+        self._stopped.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.flush()
+        atexit.unregister(self.close)
+        super().close()
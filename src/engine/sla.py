@@ -0,0 +1,160 @@
+"""
+SLA-constrained routing support.
+
+Observed latency percentiles per provider, and per-intent Pareto frontiers
+that answer "cheapest provider with p95 latency <= L and quality >= Q" with
+two binary searches.
+"""
+
+import math
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+
+class LatencyTracker:
+    """
+    Sliding window of observed latencies per provider.
+    
+    Keeps the last ``window`` samples per provider in a ring and caches
+    the sorted copy used for percentiles until the next sample arrives.
+    """
+    
+    def __init__(self, window: int = 500):
+        """
+        Initialize tracker.
+        
+        Args:
+            window: Samples retained per provider
+        """
+        self.window = window
+        self._samples: Dict[str, array] = {}
+        self._next: Dict[str, int] = {}
+        self._sorted: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+    
+    def record(self, provider_id: str, latency_ms: float):
+        """Record one observed request latency."""
+        with self._lock:
+            samples = self._samples.get(provider_id)
+            if samples is None:
+                samples = self._samples[provider_id] = array("d")
+                self._next[provider_id] = 0
+            
+            if len(samples) < self.window:
+                samples.append(latency_ms)
+            else:
+                samples[self._next[provider_id]] = latency_ms
+            self._next[provider_id] = (self._next[provider_id] + 1) % self.window
+            self._sorted.pop(provider_id, None)
+    
+    def forget(self, provider_id: str):
+        """Drop every sample of a provider."""
+        with self._lock:
+            self._samples.pop(provider_id, None)
+            self._next.pop(provider_id, None)
+            self._sorted.pop(provider_id, None)
+    
+    def count(self, provider_id: str) -> int:
+        """Number of retained samples for a provider."""
+        samples = self._samples.get(provider_id)
+        return len(samples) if samples is not None else 0
+    
+    def percentile(self, provider_id: str, q: float = 0.95) -> Optional[float]:
+        """
+        Latency percentile (nearest rank) over the retained window.
+        
+        Returns:
+            Latency in ms, or None if nothing has been recorded
+        """
+        ordered = self._sorted.get(provider_id)
+        if ordered is None:
+            with self._lock:
+                samples = self._samples.get(provider_id)
+                if not samples:
+                    return None
+                ordered = self._sorted[provider_id] = sorted(samples)
+        
+        rank = max(1, math.ceil(q * len(ordered)))
+        return ordered[rank - 1]
+
+
+@dataclass(frozen=True)
+class FrontierEntry:
+    """A provider's position in cost/quality/latency space."""
+    provider_id: str
+    cost: float          # Blended USD per 1M tokens
+    quality: float       # 0.0 - 1.0
+    latency_ms: float    # p95 (inf if unknown)
+
+
+class SLAFrontier:
+    """
+    Cost/quality Pareto frontiers nested by latency tier.
+    
+    Tier ``k`` holds the frontier of every entry whose latency is at most
+    the ``k``-th smallest latency. Within a tier, entries are sorted by
+    quality with strictly increasing cost, so the first entry at or above
+    a quality floor is the cheapest that meets it. A query is one bisect
+    for the tier and one for the quality floor.
+    """
+    
+    def __init__(self, entries: Iterable[FrontierEntry]):
+        """
+        Build all tiers.
+        
+        Args:
+            entries: Candidate providers
+        """
+        by_latency = sorted(entries, key=lambda e: e.latency_ms)
+        self.tier_latencies: List[float] = []
+        self._tiers: List[List[FrontierEntry]] = []
+        self._tier_qualities: List[List[float]] = []
+        
+        for i, entry in enumerate(by_latency):
+            # Entries sharing a latency belong to the same tier
+            if i + 1 < len(by_latency) and by_latency[i + 1].latency_ms == entry.latency_ms:
+                continue
+            frontier = self._pareto(by_latency[:i + 1])
+            self.tier_latencies.append(entry.latency_ms)
+            self._tiers.append(frontier)
+            self._tier_qualities.append([e.quality for e in frontier])
+    
+    @staticmethod
+    def _pareto(entries: List[FrontierEntry]) -> List[FrontierEntry]:
+        """Entries not beaten on both cost and quality, by ascending quality."""
+        frontier = []
+        cheapest = math.inf
+        for entry in sorted(entries, key=lambda e: (-e.quality, e.cost)):
+            if entry.cost < cheapest:
+                frontier.append(entry)
+                cheapest = entry.cost
+        frontier.reverse()
+        return frontier
+    
+    def cheapest(
+        self,
+        min_quality: Optional[float] = None,
+        max_latency_ms: Optional[float] = None,
+    ) -> Optional[FrontierEntry]:
+        """
+        Cheapest entry meeting both bounds.
+        
+        Returns:
+            The entry, or None if no entry satisfies the SLA
+        """
+        if max_latency_ms is None:
+            tier = len(self._tiers) - 1
+        else:
+            tier = bisect_right(self.tier_latencies, max_latency_ms) - 1
+        if tier < 0:
+            return None
+        
+        index = 0
+        if min_quality is not None:
+            index = bisect_left(self._tier_qualities[tier], min_quality)
+        if index >= len(self._tiers[tier]):
+            return None
+        return self._tiers[tier][index]
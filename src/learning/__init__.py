@@ -6,5 +6,14 @@ Outcome tracking, A/B testing, and adaptive routing improvements.
 
 from .outcomes import OutcomeTracker, RoutingOutcome
 from .optimizer import RoutingOptimizer
+from .classifier import LearnedIntentClassifier
+from .simulator import CostSimulator, TrafficHistory
 
-__all__ = ["OutcomeTracker", "RoutingOutcome", "RoutingOptimizer"]
+__all__ = [
+    "OutcomeTracker",
+    "RoutingOutcome",
+    "RoutingOptimizer",
+    "LearnedIntentClassifier",
+    "CostSimulator",
+    "TrafficHistory",
+]
@@ -0,0 +1,362 @@
+"""
+Learned intent classifier.
+
+Hashed n-gram features with a multinomial naive Bayes model, trained
+offline from labelled tasks and routing outcomes. Falls back to the
+rule-based classifier when the model is not confident.
+"""
+
+import re
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from ..engine.classifier import IntentClassifier
+from ..engine.models import Task, TaskIntent
+from .outcomes import OutcomeStatus, RoutingOutcome
+
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+class LearnedIntentClassifier(IntentClassifier):
+    """
+    CPU-only intent classifier over hashed word n-grams.
+    
+    Unigrams and bigrams are hashed into a fixed number of buckets
+    (no vocabulary to store), and a multinomial naive Bayes model scores
+    each intent. Predictions below ``min_confidence`` use the keyword
+    rules from IntentClassifier instead.
+    
+    Example:
+        clf = LearnedIntentClassifier()
+        clf.fit(prompts, intents)
+        clf.save("intent_model.npz")
+        
+        router = Router(store, classifier=LearnedIntentClassifier.load("intent_model.npz"))
+    """
+    
+    def __init__(
+        self,
+        n_features: int = 2 ** 16,
+        min_confidence: float = 0.6,
+        max_chars: int = 4096,
+        alpha: float = 0.1,
+        window_chars: Optional[int] = None,
+    ):
+        """
+        Initialize an untrained classifier.
+        
+        Args:
+            n_features: Number of hash buckets
+            min_confidence: Posterior below which keyword rules are used
+            max_chars: Characters of input featurized per task
+            alpha: Additive smoothing for the naive Bayes model
+            window_chars: Passed to the keyword fallback
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError(
+                "Learned classifier requires 'numpy' package: pip install numpy"
+            )
+        
+        super().__init__(window_chars=window_chars)
+        self.n_features = n_features
+        self.min_confidence = min_confidence
+        self.max_chars = max_chars
+        self.alpha = alpha
+        
+        self.classes: List[TaskIntent] = []
+        self._class_log_prior: Optional["np.ndarray"] = None
+        # Stored transposed (n_features x n_classes) so a row gather
+        # per feature is contiguous
+        self._feature_log_prob: Optional["np.ndarray"] = None
+        self._bucket_cache: Dict[str, int] = {}
+    
+    @property
+    def is_trained(self) -> bool:
+        """Whether a model has been fit or loaded."""
+        return self._feature_log_prob is not None
+    
+    # Featurization
+    
+    def _text(self, task: Task) -> str:
+        """Bounded, lowercased model input for a task."""
+        return f"{task.system_prompt or ''} {task.prompt}"[:self.max_chars].lower()
+    
+    def _bucket(self, feature: str) -> int:
+        """Stable hash bucket for a feature string."""
+        bucket = self._bucket_cache.get(feature)
+        if bucket is None:
+            if len(self._bucket_cache) >= 100_000:
+                self._bucket_cache.clear()
+            bucket = zlib.crc32(feature.encode("utf-8")) % self.n_features
+            self._bucket_cache[feature] = bucket
+        return bucket
+    
+    def _features(self, text: str) -> List[int]:
+        """Hash bucket indices for the unigrams and bigrams of a text."""
+        tokens = _TOKEN_RE.findall(text)
+        bucket = self._bucket
+        indices = [bucket(tok) for tok in tokens]
+        indices.extend(bucket(f"{a} {b}") for a, b in zip(tokens, tokens[1:]))
+        return indices
+    
+    def _featurize_batch(self, texts: Sequence[str]) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Featurize many texts into flat index and row-offset arrays.
+        
+        Returns:
+            Tuple of (feature indices, row start offsets)
+        """
+        rows = [self._features(text) for text in texts]
+        lengths = np.fromiter((len(r) for r in rows), dtype=np.int64, count=len(rows))
+        offsets = np.zeros(len(rows), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=offsets[1:])
+        indices = np.fromiter(
+            (i for r in rows for i in r), dtype=np.int64, count=int(lengths.sum())
+        )
+        return indices, offsets
+    
+    # Training
+    
+    def fit(
+        self,
+        texts: Sequence[str],
+        labels: Sequence[TaskIntent],
+        weights: Optional[Sequence[float]] = None,
+    ) -> "LearnedIntentClassifier":
+        """
+        Fit the model on labelled texts.
+        
+        Args:
+            texts: Prompt texts
+            labels: Intent for each text
+            weights: Optional per-sample weights (default 1.0)
+        
+        Returns:
+            self
+        
+        Raises:
+            ValueError: If the inputs differ in length, the training set is
+                empty, or the weights are negative or all zero
+        """
+        if len(texts) != len(labels):
+            raise ValueError("texts and labels must be the same length")
+        if weights is not None and len(weights) != len(texts):
+            raise ValueError("weights must be the same length as texts")
+        if not texts:
+            raise ValueError("Cannot fit on an empty training set")
+        
+        self.classes = sorted(set(labels), key=lambda i: i.value)
+        class_index = {intent: i for i, intent in enumerate(self.classes)}
+        y = np.fromiter((class_index[label] for label in labels), dtype=np.int64, count=len(labels))
+        w = (
+            np.asarray(weights, dtype=np.float64)
+            if weights is not None else np.ones(len(labels))
+        )
+        if (w < 0).any() or not w.sum() > 0:
+            raise ValueError("weights must be non-negative and not all zero")
+        
+        indices, offsets = self._featurize_batch([t[:self.max_chars].lower() for t in texts])
+        lengths = np.diff(np.append(offsets, len(indices)))
+        row_class = np.repeat(y, lengths)
+        row_weight = np.repeat(w, lengths)
+        
+        n_classes = len(self.classes)
+        counts = np.zeros((self.n_features, n_classes), dtype=np.float64)
+        np.add.at(counts, (indices, row_class), row_weight)
+        
+        smoothed = counts + self.alpha
+        self._feature_log_prob = (
+            np.log(smoothed) - np.log(smoothed.sum(axis=0, keepdims=True))
+        ).astype(np.float32)
+        
+        class_weight = np.bincount(y, weights=w, minlength=n_classes)
+        self._class_log_prior = np.log(class_weight / class_weight.sum()).astype(np.float32)
+        
+        return self
+    
+    def fit_tasks(self, tasks: Iterable[Task]) -> "LearnedIntentClassifier":
+        """Fit on tasks whose intent has already been labelled."""
+        labelled = [t for t in tasks if t.intent != TaskIntent.UNKNOWN]
+        return self.fit(
+            [f"{t.system_prompt or ''} {t.prompt}" for t in labelled],
+            [t.intent for t in labelled],
+        )
+    
+    def fit_outcomes(
+        self,
+        tasks: Dict[str, Task],
+        outcomes: Iterable[RoutingOutcome],
+    ) -> "LearnedIntentClassifier":
+        """
+        Fit from recorded routing outcomes.
+        
+        Successful and partial outcomes label their task with the
+        recorded intent, weighted by quality score where available.
+        Failed outcomes say nothing reliable about intent and are skipped.
+        
+        Args:
+            tasks: Task ID -> Task for the prompts that were routed
+            outcomes: Recorded outcomes
+        """
+        texts, labels, weights = [], [], []
+        
+        for outcome in outcomes:
+            if outcome.status not in (OutcomeStatus.SUCCESS, OutcomeStatus.PARTIAL):
+                continue
+            task = tasks.get(outcome.task_id)
+            if task is None or not outcome.task_intent:
+                continue
+            
+            intent = TaskIntent(outcome.task_intent)
+            if intent == TaskIntent.UNKNOWN:
+                continue
+            
+            weight = outcome.quality_score if outcome.quality_score is not None else 1.0
+            if outcome.status == OutcomeStatus.PARTIAL:
+                weight *= 0.5
+            
+            texts.append(f"{task.system_prompt or ''} {task.prompt}")
+            labels.append(intent)
+            weights.append(weight)
+        
+        return self.fit(texts, labels, weights)
+    
+    # Inference
+    
+    def _posterior(self, log_joint: "np.ndarray") -> "np.ndarray":
+        """Normalize joint log-likelihoods into posteriors (last axis)."""
+        shifted = log_joint - log_joint.max(axis=-1, keepdims=True)
+        probs = np.exp(shifted)
+        return probs / probs.sum(axis=-1, keepdims=True)
+    
+    def predict_proba(self, task: Task) -> Dict[TaskIntent, float]:
+        """
+        Posterior probability of each trained intent.
+        
+        Raises:
+            RuntimeError: If the model has not been trained
+        """
+        if not self.is_trained:
+            raise RuntimeError("Model has not been trained")
+        
+        probs = self._posterior(self._log_joint(self._features(self._text(task))))
+        return {intent: float(p) for intent, p in zip(self.classes, probs)}
+    
+    def _log_joint(self, indices: List[int]) -> "np.ndarray":
+        """Joint log-likelihood of one feature list for each class."""
+        if not indices:
+            return self._class_log_prior
+        return self._class_log_prior + self._feature_log_prob[indices].sum(axis=0)
+    
+    def classify(self, task: Task) -> TaskIntent:
+        """Classify a task, falling back to keyword rules when unsure."""
+        return self.classify_with_confidence(task)[0]
+    
+    def classify_with_confidence(self, task: Task) -> Tuple[TaskIntent, float]:
+        """
+        Classify with the learned model's posterior as confidence.
+        
+        Falls back to the keyword rules when untrained or when the
+        posterior is below ``min_confidence``.
+        """
+        if not self.is_trained:
+            return super().classify_with_confidence(task)
+        
+        probs = self._posterior(self._log_joint(self._features(self._text(task))))
+        best = int(probs.argmax())
+        
+        if probs[best] < self.min_confidence:
+            return super().classify_with_confidence(task)
+        
+        return self.classes[best], round(float(probs[best]), 2)
+    
+    def batch_classify(self, tasks: List[Task]) -> Dict[str, TaskIntent]:
+        """
+        Classify many tasks in one vectorized pass.
+        
+        Low-confidence rows fall back to the keyword rules individually.
+        
+        Returns:
+            Dictionary mapping task ID to intent
+        """
+        if not self.is_trained or not tasks:
+            return super().batch_classify(tasks)
+        
+        probs = self.predict_proba_batch([self._text(t) for t in tasks])
+        best = probs.argmax(axis=1)
+        confident = probs[np.arange(len(tasks)), best] >= self.min_confidence
+        
+        results: Dict[str, TaskIntent] = {}
+        for row, task in enumerate(tasks):
+            if confident[row]:
+                results[task.id] = self.classes[best[row]]
+            else:
+                results[task.id] = super().classify(task)
+        return results
+    
+    def predict_proba_batch(self, texts: Sequence[str]) -> "np.ndarray":
+        """
+        Posterior matrix (n_texts x n_classes) for lowercased texts.
+        
+        Raises:
+            RuntimeError: If the model has not been trained
+        """
+        if not self.is_trained:
+            raise RuntimeError("Model has not been trained")
+        
+        indices, offsets = self._featurize_batch(texts)
+        log_joint = np.tile(self._class_log_prior, (len(texts), 1))
+        
+        if len(indices):
+            # Sum gathered per-feature rows within each text's segment;
+            # reduceat misbehaves on empty segments, so mask those out
+            gathered = self._feature_log_prob[indices]
+            nonempty = offsets < np.append(offsets[1:], len(indices))
+            sums = np.add.reduceat(gathered, offsets[nonempty], axis=0)
+            log_joint[nonempty] += sums
+        
+        return self._posterior(log_joint)
+    
+    # Persistence
+    
+    def save(self, path: Union[str, Path]):
+        """Save the trained model to an ``.npz`` file."""
+        if not self.is_trained:
+            raise RuntimeError("Model has not been trained")
+        
+        np.savez_compressed(
+            path,
+            classes=np.array([c.value for c in self.classes]),
+            class_log_prior=self._class_log_prior,
+            feature_log_prob=self._feature_log_prob,
+            params=np.array([self.n_features, self.max_chars], dtype=np.int64),
+        )
+    
+    @classmethod
+    def load(
+        cls,
+        path: Union[str, Path],
+        min_confidence: float = 0.6,
+        window_chars: Optional[int] = None,
+    ) -> "LearnedIntentClassifier":
+        """Load a model saved with ``save``."""
+        with np.load(path) as data:
+            n_features, max_chars = (int(v) for v in data["params"])
+            clf = cls(
+                n_features=n_features,
+                min_confidence=min_confidence,
+                max_chars=max_chars,
+                window_chars=window_chars,
+            )
+            clf.classes = [TaskIntent(v) for v in data["classes"]]
+            clf._class_log_prior = data["class_log_prior"]
+            clf._feature_log_prob = data["feature_log_prob"]
+        return clf
@@ -6,7 +6,7 @@ Improves routing decisions based on historical outcomes.
 
 import random
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 
 from ..registry.models import Provider
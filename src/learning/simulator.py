@@ -0,0 +1,451 @@
+"""
+What-if cost simulation over historical traffic.
+
+Recorded usage is held as column arrays and collapsed to per-intent token
+totals, so alternative provider mixes and routing weights are priced over
+the whole history with array arithmetic instead of a loop per request.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from ..engine.models import Task, TaskIntent
+from ..engine.router import Router
+from ..registry.models import Provider
+from .outcomes import RoutingOutcome
+
+
+def _require_numpy():
+    if not NUMPY_AVAILABLE:
+        raise ImportError(
+            "Cost simulation requires 'numpy' package: pip install numpy"
+        )
+
+
+class TrafficHistory:
+    """
+    Columnar store of recorded requests.
+    
+    Intents and providers are dictionary-encoded to small integer codes;
+    token counts are int64 columns. Quality is NaN where not recorded.
+    """
+    
+    def __init__(
+        self,
+        intents: Sequence[str],
+        providers: Sequence[str],
+        intent_codes: "np.ndarray",
+        provider_codes: "np.ndarray",
+        input_tokens: "np.ndarray",
+        output_tokens: "np.ndarray",
+        quality: Optional["np.ndarray"] = None,
+    ):
+        """
+        Initialize from encoded columns.
+        
+        Args:
+            intents: Intent value for each intent code
+            providers: Provider ID for each provider code
+            intent_codes: Intent code per request
+            provider_codes: Provider code per request
+            input_tokens: Input tokens per request
+            output_tokens: Output tokens per request
+            quality: Observed quality per request (NaN if unknown)
+        """
+        _require_numpy()
+        
+        self.intents = list(intents)
+        self.providers = list(providers)
+        self.intent_codes = np.asarray(intent_codes, dtype=np.int32)
+        self.provider_codes = np.asarray(provider_codes, dtype=np.int32)
+        self.input_tokens = np.asarray(input_tokens, dtype=np.int64)
+        self.output_tokens = np.asarray(output_tokens, dtype=np.int64)
+        self.quality = (
+            np.asarray(quality, dtype=np.float32) if quality is not None
+            else np.full(len(self.intent_codes), np.nan, dtype=np.float32)
+        )
+    
+    def __len__(self) -> int:
+        return len(self.intent_codes)
+    
+    @classmethod
+    def from_records(
+        cls,
+        records: Iterable[Tuple[str, int, int, str, Optional[float]]],
+    ) -> "TrafficHistory":
+        """
+        Build from (intent, input_tokens, output_tokens, provider_id, quality) rows.
+        
+        Quality may be None.
+        """
+        _require_numpy()
+        
+        intent_index: Dict[str, int] = {}
+        provider_index: Dict[str, int] = {}
+        intent_codes, provider_codes, inputs, outputs, quality = [], [], [], [], []
+        
+        for intent, input_tokens, output_tokens, provider_id, score in records:
+            intent_codes.append(intent_index.setdefault(intent, len(intent_index)))
+            provider_codes.append(provider_index.setdefault(provider_id, len(provider_index)))
+            inputs.append(input_tokens or 0)
+            outputs.append(output_tokens or 0)
+            quality.append(np.nan if score is None else score)
+        
+        return cls(
+            list(intent_index),
+            list(provider_index),
+            np.array(intent_codes, dtype=np.int32),
+            np.array(provider_codes, dtype=np.int32),
+            np.array(inputs, dtype=np.int64),
+            np.array(outputs, dtype=np.int64),
+            np.array(quality, dtype=np.float32),
+        )
+    
+    @classmethod
+    def from_outcomes(cls, outcomes: Iterable[RoutingOutcome]) -> "TrafficHistory":
+        """Build from recorded routing outcomes with token counts."""
+        return cls.from_records(
+            (
+                o.task_intent or TaskIntent.UNKNOWN.value,
+                o.input_tokens,
+                o.output_tokens,
+                o.provider_id,
+                o.quality_score,
+            )
+            for o in outcomes
+            if o.input_tokens is not None or o.output_tokens is not None
+        )
+    
+    def save(self, path: Union[str, Path]):
+        """Save columns to an ``.npz`` file."""
+        np.savez_compressed(
+            path,
+            intents=np.array(self.intents),
+            providers=np.array(self.providers),
+            intent_codes=self.intent_codes,
+            provider_codes=self.provider_codes,
+            input_tokens=self.input_tokens,
+            output_tokens=self.output_tokens,
+            quality=self.quality,
+        )
+    
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "TrafficHistory":
+        """Load columns saved with ``save``."""
+        _require_numpy()
+        
+        with np.load(path) as data:
+            return cls(
+                [str(v) for v in data["intents"]],
+                [str(v) for v in data["providers"]],
+                data["intent_codes"],
+                data["provider_codes"],
+                data["input_tokens"],
+                data["output_tokens"],
+                data["quality"],
+            )
+
+
+@dataclass
+class SimulationResult:
+    """Cost and quality of one routing policy over the history."""
+    label: str
+    total_cost: float
+    mean_quality: float
+    assignment: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    weights: Optional[Tuple[float, float, float, float]] = None
+    
+    def to_dict(self) -> Dict:
+        return {
+            "label": self.label,
+            "total_cost": round(self.total_cost, 4),
+            "mean_quality": round(self.mean_quality, 4),
+            "assignment": self.assignment,
+            "weights": self.weights,
+        }
+
+
+class CostSimulator:
+    """
+    Prices alternative routing policies over recorded traffic.
+    
+    The history is reduced once to per-intent request counts and token
+    totals. Because price is linear in tokens and router scores depend
+    only on (intent, provider), any policy that assigns intents to
+    providers - a fixed mix or the argmax of a weight vector - costs one
+    matrix product, and thousands of weight vectors are scored together.
+    
+    Quality per (intent, provider) is the observed mean where the history
+    has ratings, otherwise the router's quality score.
+    
+    Example:
+        history = TrafficHistory.from_outcomes(tracker._outcomes.values())
+        sim = CostSimulator(history, router)
+        sim.baseline()
+        curve = sim.pareto_curve(sim.sweep_weights(steps=10))
+    """
+    
+    # Ratings needed before observed quality replaces the prior
+    MIN_QUALITY_SAMPLES = 20
+    
+    def __init__(
+        self,
+        history: TrafficHistory,
+        router: Router,
+        providers: Optional[Mapping[str, Provider]] = None,
+    ):
+        """
+        Initialize simulator.
+        
+        Args:
+            history: Recorded traffic
+            router: Router whose scoring is simulated
+            providers: Candidate providers (default: router's store)
+        """
+        _require_numpy()
+        
+        self.history = history
+        self.router = router
+        providers = providers if providers is not None else router.store.get_all_providers()
+        self.providers: List[Provider] = list(providers.values())
+        self.provider_ids = [p.id for p in self.providers]
+        self.intents = history.intents
+        
+        n_intents = len(self.intents)
+        codes = history.intent_codes
+        
+        # Per-intent volume and token totals
+        self.requests = np.bincount(codes, minlength=n_intents).astype(np.float64)
+        input_totals = np.bincount(codes, weights=history.input_tokens, minlength=n_intents)
+        output_totals = np.bincount(codes, weights=history.output_tokens, minlength=n_intents)
+        
+        # Cost matrix (intents x providers) for the whole history
+        input_price = np.array([p.cost.input_per_1m for p in self.providers]) / 1e6
+        output_price = np.array([p.cost.output_per_1m for p in self.providers]) / 1e6
+        self.cost = np.outer(input_totals, input_price) + np.outer(output_totals, output_price)
+        
+        # Router score components (intents x providers x 4)
+        self.components = self._score_components()
+        self.quality = self._quality_matrix()
+    
+    def _score_components(self) -> "np.ndarray":
+        """Quality, speed, cost, and reliability scores per intent/provider."""
+        components = np.zeros((len(self.intents), len(self.providers), 4))
+        for i, value in enumerate(self.intents):
+            try:
+                intent = TaskIntent(value)
+            except ValueError:
+                intent = TaskIntent.UNKNOWN
+            task = Task(id=f"sim-{value}", prompt="", intent=intent)
+            for p, provider in enumerate(self.providers):
+                components[i, p] = (
+                    self.router._calc_quality_score(provider, task),
+                    self.router._calc_speed_score(provider, task),
+                    self.router._calc_cost_score(provider, task),
+                    self.router._calc_reliability_score(provider),
+                )
+        return components
+    
+    def _quality_matrix(self) -> "np.ndarray":
+        """Observed mean quality where well sampled, router prior elsewhere."""
+        quality = self.components[:, :, 0].copy()
+        
+        history = self.history
+        rated = ~np.isnan(history.quality)
+        if not rated.any():
+            return quality
+        
+        # Map history provider codes onto simulator provider columns
+        column = {pid: p for p, pid in enumerate(self.provider_ids)}
+        remap = np.array([column.get(pid, -1) for pid in history.providers], dtype=np.int64)
+        cols = remap[history.provider_codes[rated]]
+        known = cols >= 0
+        
+        n_providers = len(self.providers)
+        cells = history.intent_codes[rated][known].astype(np.int64) * n_providers + cols[known]
+        size = len(self.intents) * n_providers
+        counts = np.bincount(cells, minlength=size).reshape(quality.shape)
+        sums = np.bincount(
+            cells, weights=history.quality[rated][known], minlength=size
+        ).reshape(quality.shape)
+        
+        observed = counts >= self.MIN_QUALITY_SAMPLES
+        quality[observed] = sums[observed] / counts[observed]
+        return quality
+    
+    def _result(self, label: str, mix: "np.ndarray", weights=None) -> SimulationResult:
+        """Summarize an (intents x providers) fraction matrix."""
+        total = self.requests.sum()
+        return SimulationResult(
+            label=label,
+            total_cost=float((self.cost * mix).sum()),
+            mean_quality=float(
+                (self.quality * mix * self.requests[:, None]).sum() / total
+            ) if total else 0.0,
+            assignment={
+                intent: {
+                    self.provider_ids[p]: round(float(mix[i, p]), 4)
+                    for p in np.flatnonzero(mix[i])
+                }
+                for i, intent in enumerate(self.intents)
+            },
+            weights=weights,
+        )
+    
+    def baseline(self) -> SimulationResult:
+        """Recorded routing, priced at current rates."""
+        history = self.history
+        column = {pid: p for p, pid in enumerate(self.provider_ids)}
+        remap = np.array([column.get(pid, -1) for pid in history.providers], dtype=np.int64)
+        cols = remap[history.provider_codes]
+        known = cols >= 0
+        
+        n_providers = len(self.providers)
+        cells = history.intent_codes[known].astype(np.int64) * n_providers + cols[known]
+        counts = np.bincount(cells, minlength=len(self.intents) * n_providers)
+        counts = counts.reshape(len(self.intents), n_providers).astype(np.float64)
+        
+        mix = counts / np.maximum(counts.sum(axis=1, keepdims=True), 1)
+        result = self._result("baseline", mix)
+        
+        # Recorded requests differ in size, so price them row by row
+        # rather than spreading intent token totals over the mix
+        input_price = np.array([p.cost.input_per_1m for p in self.providers]) / 1e6
+        output_price = np.array([p.cost.output_per_1m for p in self.providers]) / 1e6
+        result.total_cost = float(
+            (history.input_tokens[known] * input_price[cols[known]]).sum() +
+            (history.output_tokens[known] * output_price[cols[known]]).sum()
+        )
+        return result
+    
+    def simulate_mix(
+        self,
+        mix: Mapping[str, Mapping[str, float]],
+        label: str = "mix",
+    ) -> SimulationResult:
+        """
+        Price a provider mix.
+        
+        Args:
+            mix: Intent -> {provider ID: traffic fraction}. Use "*" as the
+                intent for a default applied to unlisted intents.
+            label: Name for the result
+        """
+        column = {pid: p for p, pid in enumerate(self.provider_ids)}
+        matrix = np.zeros(self.cost.shape)
+        
+        for i, intent in enumerate(self.intents):
+            shares = mix.get(intent, mix.get("*", {}))
+            for pid, fraction in shares.items():
+                if pid not in column:
+                    raise ValueError(f"Unknown provider in mix: {pid}")
+                matrix[i, column[pid]] = fraction
+        
+        sums = matrix.sum(axis=1, keepdims=True)
+        matrix = np.divide(matrix, sums, out=np.zeros_like(matrix), where=sums > 0)
+        return self._result(label, matrix)
+    
+    def simulate_weights(
+        self,
+        weights: Sequence[Tuple[float, float, float, float]],
+    ) -> List[SimulationResult]:
+        """
+        Price routing with each (quality, speed, cost, reliability) weight vector.
+        
+        All vectors are evaluated in one pass: scores are an
+        (intents x providers x vectors) tensor and the router's choice is
+        its argmax over providers.
+        """
+        w = np.asarray(weights, dtype=np.float64).reshape(-1, 4)
+        scores = self.components @ w.T                        # (I, P, K)
+        choice = scores.argmax(axis=1)                        # (I, K)
+        
+        intents = np.arange(len(self.intents))[:, None]
+        costs = self.cost[intents, choice].sum(axis=0)        # (K,)
+        total = self.requests.sum()
+        qualities = (
+            (self.quality[intents, choice] * self.requests[:, None]).sum(axis=0) / total
+            if total else np.zeros(len(w))
+        )
+        
+        results = []
+        for k, vector in enumerate(w):
+            results.append(SimulationResult(
+                label=f"weights{tuple(round(float(x), 3) for x in vector)}",
+                total_cost=float(costs[k]),
+                mean_quality=float(qualities[k]),
+                assignment={
+                    intent: {self.provider_ids[choice[i, k]]: 1.0}
+                    for i, intent in enumerate(self.intents)
+                },
+                weights=tuple(float(x) for x in vector),
+            ))
+        return results
+    
+    def sweep_weights(self, steps: int = 10) -> List[SimulationResult]:
+        """
+        Simulate every weight vector on a simplex grid of ``steps`` divisions.
+        """
+        grid = [
+            (q / steps, s / steps, c / steps, (steps - q - s - c) / steps)
+            for q in range(steps + 1)
+            for s in range(steps + 1 - q)
+            for c in range(steps + 1 - q - s)
+        ]
+        return self.simulate_weights(grid)
+    
+    def optimal_curve(self, points: int = 50) -> List[SimulationResult]:
+        """
+        Cheapest per-intent assignments across the cost/quality trade-off.
+        
+        For each trade-off rate lambda (USD per unit of mean quality), every
+        intent independently picks the provider minimizing
+        ``cost - lambda * quality * requests``; all rates are solved in one
+        vectorized pass. This traces the convex cost/quality frontier.
+        """
+        total = self.requests.sum()
+        if not total:
+            return []
+        
+        value = self.quality * self.requests[:, None] / total   # (I, P)
+        spread = max(float(self.cost.max()), 1e-9) / max(float(value.max()), 1e-9)
+        rates = np.concatenate([[0.0], np.geomspace(spread * 1e-6, spread * 1e3, points - 1)])
+        
+        objective = self.cost[:, :, None] - value[:, :, None] * rates  # (I, P, L)
+        choice = objective.argmin(axis=1)                              # (I, L)
+        
+        seen = set()
+        results = []
+        for k in range(len(rates)):
+            key = tuple(choice[:, k])
+            if key in seen:
+                continue
+            seen.add(key)
+            mix = np.zeros(self.cost.shape)
+            mix[np.arange(len(self.intents)), choice[:, k]] = 1.0
+            results.append(self._result(f"optimal@{rates[k]:.3g}", mix))
+        
+        return self.pareto_curve(results)
+    
+    @staticmethod
+    def pareto_curve(results: Sequence[SimulationResult]) -> List[SimulationResult]:
+        """
+        Non-dominated results, ordered by increasing cost.
+        
+        A result is kept if no other is at least as cheap and strictly
+        higher quality (or strictly cheaper at equal quality).
+        """
+        frontier: List[SimulationResult] = []
+        best_quality = float("-inf")
+        for result in sorted(results, key=lambda r: (r.total_cost, -r.mean_quality)):
+            if result.mean_quality > best_quality:
+                frontier.append(result)
+                best_quality = result.mean_quality
+        return frontier
@@ -6,7 +6,7 @@ Splits a large task into subtasks, executes in parallel, then aggregates results
 
 import asyncio
 from dataclasses import dataclass
-from typing import Callable, List, TypeVar, Generic, Any
+from typing import Callable, List, Optional, TypeVar, Generic, Any
 from concurrent.futures import ThreadPoolExecutor
 
 T = TypeVar('T')
@@ -65,7 +65,7 @@ class MapReducePattern:
         Args:
             items: Items to process
             map_fn: Function to apply to each item
-            reduce_fn: Optional function to aggregate results
+            reduce_fn: Optional function (sync or async) to aggregate results
             
         Returns:
             MapReduceResult with results and metadata
@@ -103,6 +103,8 @@ class MapReducePattern:
         if reduce_fn and successes:
             try:
                 final_result = reduce_fn(successes)
+                if asyncio.iscoroutine(final_result):
+                    final_result = await final_result
             except Exception as e:
                 errors.append(e)
         
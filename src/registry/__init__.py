@@ -7,13 +7,14 @@ of 50+ model providers across the federation.
 
 from .models import Provider, ProviderCapabilities, ProviderCost, ProviderHealth
 from .loader import RegistryLoader
-from .store import RegistryStore
+from .store import ReadOnlyStoreError, RegistryStore
 
 __all__ = [
     "Provider",
     "ProviderCapabilities", 
     "ProviderCost",
     "ProviderHealth",
+    "ReadOnlyStoreError",
     "RegistryLoader",
     "RegistryStore",
 ]
@@ -0,0 +1,157 @@
+"""
+Write-behind batching for append-only store writes.
+
+Rows are queued in memory and handed to a flush function in batches, by
+size or on an interval, so many inserts share one transaction.
+"""
+
+import atexit
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+
+# kind -> rows, in arrival order
+Batch = Dict[str, List[tuple]]
+
+
+class WriteBehindQueue:
+    """
+    Bounded write-behind queue with a background flusher.
+    
+    A daemon thread flushes every ``flush_interval`` seconds, or as soon
+    as ``max_batch`` rows are pending. Memory is bounded by
+    ``max_pending``: when the queue is full the caller flushes inline
+    (backpressure), so producers slow to the speed of the database
+    instead of growing the queue. Rows from a failed flush are requeued
+    ahead of newer ones; if that overflows the bound the oldest rows are
+    dropped and counted in ``dropped``.
+    
+    Pending rows are flushed on ``close()``, which also runs at
+    interpreter exit.
+    """
+    
+    def __init__(
+        self,
+        flush_fn: Callable[[Batch], None],
+        flush_interval: float = 1.0,
+        max_batch: int = 500,
+        max_pending: int = 10_000,
+    ):
+        """
+        Initialize queue and start the flusher.
+        
+        Args:
+            flush_fn: Writes a batch (one transaction); raises on failure
+            flush_interval: Seconds between background flushes
+            max_batch: Pending rows that trigger an early flush
+            max_pending: Most rows held in memory
+        """
+        if max_pending < max_batch:
+            raise ValueError("max_pending must be at least max_batch")
+        
+        self.flush_fn = flush_fn
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        
+        self.flushes = 0
+        self.rows_written = 0
+        self.dropped = 0
+        self.last_error: Optional[str] = None
+        
+        self._pending: Deque[Tuple[str, tuple]] = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    def __len__(self) -> int:
+        return len(self._pending)
+    
+    def put(self, kind: str, row: tuple):
+        """
+        Queue one row.
+        
+        Raises:
+            RuntimeError: If the queue has been closed
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Write-behind queue is closed")
+            full = len(self._pending) >= self.max_pending
+        if full:
+            # Backpressure: the producer pays for the flush
+            self.flush()
+        
+        with self._cond:
+            if len(self._pending) >= self.max_pending:
+                # The flush failed: stay bounded at the cost of the oldest row
+                self._pending.popleft()
+                self.dropped += 1
+            self._pending.append((kind, row))
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify()
+    
+    def flush(self) -> bool:
+        """
+        Write every pending row now.
+        
+        Returns:
+            True if the queue was drained (or empty), False if the write
+            failed and rows were requeued
+        """
+        with self._flush_lock:
+            with self._cond:
+                if not self._pending:
+                    return True
+                rows = list(self._pending)
+                self._pending.clear()
+            
+            batch: Batch = {}
+            for kind, row in rows:
+                batch.setdefault(kind, []).append(row)
+            
+            try:
+                self.flush_fn(batch)
+            except Exception as e:
+                self.last_error = str(e)
+                with self._cond:
+                    self._pending.extendleft(reversed(rows))
+                    overflow = len(self._pending) - self.max_pending
+                    for _ in range(max(0, overflow)):
+                        self._pending.popleft()
+                        self.dropped += 1
+                return False
+            
+            self.flushes += 1
+            self.rows_written += len(rows)
+            return True
+    
+    def close(self):
+        """Stop the flusher and write everything still pending."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.flush()
+        atexit.unregister(self.close)
+    
+    def _run(self):
+        """Background flush loop."""
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while not self._closed and len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._closed:
+                    return
+            self.flush()
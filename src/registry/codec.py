@@ -0,0 +1,150 @@
+"""
+Compact serialization of providers for the registry stores.
+
+Unlike ``Provider.to_dict`` (an API view) a record holds every field,
+including full health and circuit-breaker state, and decodes straight
+into dataclasses without going through RegistryLoader's config parsing.
+Records written from ``to_dict`` output still decode.
+"""
+
+import copy
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from .models import (
+    Provider,
+    ProviderCapabilities,
+    ProviderCost,
+    ProviderHealth,
+    ProviderStatus,
+    ProviderTier,
+)
+
+
+RECORD_VERSION = 2
+
+_TIERS = {tier.value: tier for tier in ProviderTier}
+_STATUSES = {status.name: status for status in ProviderStatus}
+
+
+def _time(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def provider_to_record(provider: Provider) -> Dict[str, Any]:
+    """Every field of a provider as JSON-compatible values."""
+    caps = provider.capabilities
+    cost = provider.cost
+    health = provider.health
+    return {
+        "v": RECORD_VERSION,
+        "id": provider.id,
+        "name": provider.name,
+        "tier": provider.tier.value,
+        "emoji": provider.emoji,
+        "api_base": provider.api_base,
+        "api_key_env": provider.api_key_env,
+        "capabilities": {
+            "max_context": caps.max_context,
+            "supports_functions": caps.supports_functions,
+            "supports_vision": caps.supports_vision,
+            "supports_json_mode": caps.supports_json_mode,
+            "supports_streaming": caps.supports_streaming,
+            "supports_batch": caps.supports_batch,
+            "specialties": sorted(caps.specialties),
+            "typical_latency_ms": caps.typical_latency_ms,
+            "throughput_tpm": caps.throughput_tpm,
+            "soc2_compliant": caps.soc2_compliant,
+            "gdpr_compliant": caps.gdpr_compliant,
+            "hipaa_compliant": caps.hipaa_compliant,
+            "data_residency": sorted(caps.data_residency),
+        },
+        "cost": {
+            "input_per_1m": cost.input_per_1m,
+            "output_per_1m": cost.output_per_1m,
+            "context_cache_hit": cost.context_cache_hit,
+            "batch_discount": cost.batch_discount,
+            "currency": cost.currency,
+        },
+        "health": {
+            "status": health.status.name,
+            "last_checked": _time(health.last_checked),
+            "avg_latency_ms": health.avg_latency_ms,
+            "error_rate_24h": health.error_rate_24h,
+            "success_rate_24h": health.success_rate_24h,
+            "consecutive_failures": health.consecutive_failures,
+            "circuit_open": health.circuit_open,
+            "circuit_open_until": _time(health.circuit_open_until),
+        },
+        "enabled": provider.enabled,
+        "quality_score": provider.quality_score,
+        "reliability_score": provider.reliability_score,
+        "models": list(provider.models),
+        "docs_url": provider.docs_url,
+        "created_at": _time(provider.created_at),
+        "updated_at": _time(provider.updated_at),
+        "config": provider.config,
+    }
+
+
+def provider_from_record(record: Dict[str, Any]) -> Provider:
+    """
+    Build a provider from ``provider_to_record`` (or ``to_dict``) output.
+    
+    The provider shares no mutable state with ``record``, so one parsed
+    record can build any number of independent providers.
+    """
+    caps = dict(record["capabilities"])
+    caps["specialties"] = set(caps.get("specialties", ()))
+    caps["data_residency"] = set(caps.get("data_residency", ()))
+    
+    health = record.get("health") or {}
+    created_at = _parse_time(record.get("created_at"))
+    updated_at = _parse_time(record.get("updated_at"))
+    
+    provider = Provider(
+        id=record["id"],
+        name=record["name"],
+        tier=_TIERS[record["tier"]],
+        emoji=record.get("emoji", "🤖"),
+        api_base=record["api_base"],
+        api_key_env=record.get("api_key_env", ""),
+        capabilities=ProviderCapabilities(**caps),
+        cost=ProviderCost(**record["cost"]),
+        health=ProviderHealth(
+            status=_STATUSES.get(health.get("status"), ProviderStatus.UNKNOWN),
+            last_checked=_parse_time(health.get("last_checked")),
+            avg_latency_ms=health.get("avg_latency_ms"),
+            error_rate_24h=health.get("error_rate_24h"),
+            success_rate_24h=health.get("success_rate_24h"),
+            consecutive_failures=health.get("consecutive_failures", 0),
+            circuit_open=health.get("circuit_open", False),
+            circuit_open_until=_parse_time(health.get("circuit_open_until")),
+        ),
+        enabled=record.get("enabled", True),
+        quality_score=record.get("quality_score"),
+        reliability_score=record.get("reliability_score"),
+        models=list(record.get("models", ())),
+        docs_url=record.get("docs_url"),
+        config=copy.deepcopy(record.get("config") or {}),
+    )
+    if created_at is not None:
+        provider.created_at = created_at
+    if updated_at is not None:
+        provider.updated_at = updated_at
+    return provider
+
+
+def encode_provider(provider: Provider) -> str:
+    """Serialize a provider to a compact JSON record."""
+    return json.dumps(provider_to_record(provider), separators=(",", ":"))
+
+
+def decode_provider(data: str) -> Provider:
+    """Deserialize a provider from ``encode_provider`` output."""
+    return provider_from_record(json.loads(data))
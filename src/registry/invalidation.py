@@ -0,0 +1,145 @@
+"""
+Cross-node cache invalidation for the Redis registry store.
+
+Writers publish a small JSON notification per change on a pub/sub
+channel; every subscribed node applies it to its local provider cache.
+Provider saves carry the new record versions (readers refetch only the
+providers they hold at a different version); health saves carry the health
+sample itself, so nodes update live health without any fetch.
+"""
+
+import json
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+PROVIDERS = "providers"
+HEALTH = "health"
+
+
+def providers_message(versions: Dict[str, int]) -> str:
+    """Notification that providers were saved at the given versions."""
+    return json.dumps({"kind": PROVIDERS, "versions": versions}, separators=(",", ":"))
+
+
+def health_message(provider_id: str, version: float, health: Dict[str, Any]) -> str:
+    """Notification of one health sample, versioned by its timestamp."""
+    return json.dumps(
+        {"kind": HEALTH, "id": provider_id, "version": version, "health": health},
+        separators=(",", ":"),
+    )
+
+
+class InvalidationListener:
+    """
+    Applies notifications from a pub/sub channel.
+    
+    ``poll()`` handles whatever has arrived; ``start()`` runs it on a
+    daemon thread so notifications are applied as they are published.
+    Messages published while the subscription is down are lost, so
+    ``on_reset`` is called after every (re)subscribe, and after any
+    notification that can't be applied; the store must then treat its
+    whole cache as unverified.
+    """
+    
+    def __init__(
+        self,
+        client,
+        channel: str,
+        handler: Callable[[Dict[str, Any]], None],
+        on_reset: Callable[[], None],
+        poll_interval: float = 1.0,
+        retry_delay: float = 1.0,
+    ):
+        """
+        Initialize listener and subscribe.
+        
+        Args:
+            client: Redis client (decode_responses=True)
+            channel: Channel to subscribe to
+            handler: Called with each decoded notification
+            on_reset: Called whenever notifications may have been missed
+            poll_interval: Longest the background thread blocks per poll
+            retry_delay: Seconds to wait before resubscribing after an error
+        """
+        self.client = client
+        self.channel = channel
+        self.handler = handler
+        self.on_reset = on_reset
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        
+        self.received = 0
+        self.last_error: Optional[str] = None
+        
+        self._pubsub = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._subscribe()
+    
+    def _subscribe(self):
+        """(Re)open the subscription; the cache must be revalidated."""
+        if self._pubsub is not None:
+            try:
+                self._pubsub.close()
+            except Exception:
+                pass
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(self.channel)
+        self.on_reset()
+    
+    def poll(self, timeout: float = 0.0) -> int:
+        """
+        Apply every notification that has arrived.
+        
+        Args:
+            timeout: Seconds to wait for the first message
+        
+        Returns:
+            Number of notifications applied
+        """
+        applied = 0
+        message = self._pubsub.get_message(timeout=timeout)
+        while message is not None:
+            if message.get("type") == "message":
+                try:
+                    self.handler(json.loads(message["data"]))
+                    applied += 1
+                except (ValueError, KeyError, TypeError) as e:
+                    # The update it carried is lost: revalidate everything
+                    self.last_error = str(e)
+                    self.on_reset()
+            message = self._pubsub.get_message(timeout=0.0)
+        self.received += applied
+        return applied
+    
+    def start(self):
+        """Apply notifications on a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="registry-invalidation", daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        """Stop the background thread and unsubscribe."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        try:
+            self._pubsub.close()
+        except Exception:
+            pass
+    
+    def _run(self):
+        """Background poll loop, resubscribing after connection errors."""
+        while not self._stopped.is_set():
+            try:
+                self.poll(self.poll_interval)
+            except Exception as e:
+                self.last_error = str(e)
+                if self._stopped.wait(self.retry_delay):
+                    return
+                try:
+                    self._subscribe()
+                except Exception as e:
+                    self.last_error = str(e)
@@ -2,15 +2,27 @@
 Registry loader for YAML/JSON provider configurations.
 
 Supports loading from files, environment variables, and dynamic discovery.
+Parsed files are cached (see ConfigCache) so unchanged catalogs load
+without parsing YAML again.
 """
 
 import os
 import json
+import hashlib
+import time
 import yaml
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Callable, Dict, List, Optional, Union
 from dataclasses import asdict
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+    LIBYAML_AVAILABLE = True
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+    LIBYAML_AVAILABLE = False
+
+from .codec import RECORD_VERSION, provider_from_record, provider_to_record
 from .models import (
     Provider, 
     ProviderCapabilities, 
@@ -21,6 +33,128 @@ from .models import (
 )
 
 
+def default_cache_dir() -> Path:
+    """Per-user cache directory ($XDG_CACHE_HOME/federation)."""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "federation"
+
+
+class ConfigCache:
+    """
+    Parsed provider configs keyed by file path, mtime and content hash.
+    
+    Each entry holds the validated providers of one config file as codec
+    records, which load without YAML parsing or config validation. A file
+    whose mtime and size are unchanged is trusted without being read,
+    unless it was modified within RACY_SECONDS of the cache being written
+    (a later edit could then keep the same mtime); otherwise its content
+    hash decides. Unreadable or outdated caches are ignored, and failing
+    to write one never fails a load.
+    """
+    
+    FORMAT = 1
+    RACY_SECONDS = 2.0
+    
+    def __init__(self, path: Path):
+        """
+        Initialize cache.
+        
+        Args:
+            path: Cache file
+        """
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        self._written_at = 0.0
+        self._entries: Dict[str, dict] = {}
+        self._dirty = False
+        self._load()
+    
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict):
+            return
+        if data.get("format") == self.FORMAT and data.get("record_version") == RECORD_VERSION:
+            self._written_at = data.get("written_at", 0.0)
+            self._entries = data.get("files", {})
+    
+    def get(self, path: Path, parse: Callable[[bytes], Dict[str, Provider]]) -> Dict[str, Provider]:
+        """
+        Providers of a config file, parsing it only if it changed.
+        
+        Args:
+            path: Config file
+            parse: Parses the file's content into validated providers
+        """
+        key = str(path.resolve())
+        stat = path.stat()
+        entry = self._entries.get(key)
+        
+        if (
+            entry is not None
+            and entry["mtime_ns"] == stat.st_mtime_ns
+            and entry["size"] == stat.st_size
+            and stat.st_mtime < self._written_at - self.RACY_SECONDS
+        ):
+            self.hits += 1
+            return self._decode(entry)
+        
+        content = path.read_bytes()
+        digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+        if entry is not None and entry["digest"] == digest:
+            self.hits += 1
+            entry["mtime_ns"] = stat.st_mtime_ns
+            entry["size"] = stat.st_size
+            self._dirty = True
+            return self._decode(entry)
+        
+        self.misses += 1
+        providers = parse(content)
+        self._entries[key] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "digest": digest,
+            "providers": [provider_to_record(p) for p in providers.values()],
+        }
+        self._dirty = True
+        return providers
+    
+    @staticmethod
+    def _decode(entry: dict) -> Dict[str, Provider]:
+        providers = (provider_from_record(r) for r in entry["providers"])
+        return {p.id: p for p in providers}
+    
+    def save(self):
+        """Write the cache if anything changed; entries for deleted files are dropped."""
+        if not self._dirty:
+            return
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        try:
+            self._entries = {k: v for k, v in self._entries.items() if Path(k).exists()}
+            self._written_at = time.time()
+            data = {
+                "format": self.FORMAT,
+                "record_version": RECORD_VERSION,
+                "written_at": self._written_at,
+                "files": self._entries,
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, 'w') as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except (OSError, TypeError, ValueError):
+            # The cache is only an optimization: a failed write is a miss next time
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+
+
 class RegistryLoader:
     """
     Loads and validates provider configurations from various sources.
@@ -32,16 +166,38 @@ class RegistryLoader:
     - Python dictionaries (for dynamic generation)
     """
     
-    def __init__(self, config_path: Optional[Path] = None):
+    CACHE_FILE = "providers-cache.json"
+    
+    def __init__(
+        self,
+        config_path: Optional[Path] = None,
+        cache_dir: Optional[Path] = None,
+        use_cache: Optional[bool] = None,
+    ):
         """
         Initialize the loader.
         
         Args:
             config_path: Base path for configuration files.
                         Defaults to ./config relative to current working directory.
+            cache_dir: Directory for the parsed-config cache
+                        (default: default_cache_dir())
+            use_cache: Reuse parsed configs of unchanged files. Off unless
+                        requested or a cache_dir is given, so plain loads
+                        never write outside the config directory.
         """
         self.config_path = config_path or Path("config")
         self._providers: Dict[str, Provider] = {}
+        self.cache_dir = cache_dir
+        self.use_cache = cache_dir is not None if use_cache is None else use_cache
+        self._cache: Optional[ConfigCache] = None
+    
+    @property
+    def cache(self) -> Optional[ConfigCache]:
+        """The parsed-config cache (read on first use), or None if disabled."""
+        if self.use_cache and self._cache is None:
+            self._cache = ConfigCache((self.cache_dir or default_cache_dir()) / self.CACHE_FILE)
+        return self._cache
     
     def load_defaults(self) -> Dict[str, Provider]:
         """Load the built-in default providers."""
@@ -53,18 +209,13 @@ class RegistryLoader:
         
         Args:
             path: Path to YAML file
-            
+        
         Returns:
             Dictionary of provider_id -> Provider
         """
-        path = Path(path)
-        if not path.exists():
-            raise FileNotFoundError(f"Provider config not found: {path}")
-        
-        with open(path, 'r') as f:
-            data = yaml.safe_load(f)
-        
-        return self._parse_providers(data)
+        providers = self._load_yaml(path)
+        self._save_cache()
+        return providers
     
     def load_json(self, path: Union[str, Path]) -> Dict[str, Provider]:
         """
@@ -72,52 +223,93 @@ class RegistryLoader:
         
         Args:
             path: Path to JSON file
-            
+        
         Returns:
             Dictionary of provider_id -> Provider
         """
+        providers = self._load_json(path)
+        self._save_cache()
+        return providers
+    
+    def _load_yaml(self, path: Union[str, Path]) -> Dict[str, Provider]:
+        # libyaml's C loader when available: several times faster
+        return self._load_file(
+            path, lambda content: self._parse_providers(yaml.load(content, Loader=_YamlLoader))
+        )
+    
+    def _load_json(self, path: Union[str, Path]) -> Dict[str, Provider]:
+        return self._load_file(path, lambda content: self._parse_providers(json.loads(content)))
+    
+    def _load_file(
+        self,
+        path: Union[str, Path],
+        parse: Callable[[bytes], Dict[str, Provider]],
+    ) -> Dict[str, Provider]:
+        """Parse a config file, or reuse its cached providers."""
         path = Path(path)
         if not path.exists():
             raise FileNotFoundError(f"Provider config not found: {path}")
         
-        with open(path, 'r') as f:
-            data = json.load(f)
-        
-        return self._parse_providers(data)
+        if self.cache is None:
+            return parse(path.read_bytes())
+        return self.cache.get(path, parse)
     
-    def load_directory(self, dir_path: Optional[Path] = None) -> Dict[str, Provider]:
+    def _save_cache(self):
+        if self._cache is not None:
+            self._cache.save()
+    
+    def config_files(self, dir_path: Optional[Path] = None) -> List[Path]:
         """
-        Load all provider configs from a directory.
-        
-        Files are processed in order:
-        1. providers.yaml (or .json)
-        2. Individual provider files: {provider_id}.yaml
+        Provider config files of a directory, in load order.
         
-        Later files override earlier ones.
+        1. providers.yaml (or .yml, .json)
+        2. Individual provider files: {provider_id}.yaml, then .json
         """
         dir_path = dir_path or self.config_path
-        providers = {}
+        files = []
         
-        # Try main providers file
+        # Main providers file
         for ext in ['.yaml', '.yml', '.json']:
             main_file = dir_path / f"providers{ext}"
             if main_file.exists():
-                if ext == '.json':
-                    providers.update(self.load_json(main_file))
-                else:
-                    providers.update(self.load_yaml(main_file))
+                files.append(main_file)
                 break
         
-        # Load individual provider files
+        # Individual provider files
         if dir_path.exists():
-            for file_path in sorted(dir_path.glob("*.yaml")):
-                if file_path.stem != "providers":
-                    providers.update(self.load_yaml(file_path))
-            
-            for file_path in sorted(dir_path.glob("*.json")):
-                if file_path.stem != "providers":
-                    providers.update(self.load_json(file_path))
+            for pattern in ["*.yaml", "*.json"]:
+                for file_path in sorted(dir_path.glob(pattern)):
+                    if file_path.stem != "providers":
+                        files.append(file_path)
+        
+        return files
+    
+    def load_file(self, path: Union[str, Path]) -> Dict[str, Provider]:
+        """Load providers from a JSON or YAML file, by extension."""
+        path = Path(path)
+        if path.suffix == '.json':
+            providers = self._load_json(path)
+        else:
+            providers = self._load_yaml(path)
+        self._save_cache()
+        return providers
+    
+    def load_directory(self, dir_path: Optional[Path] = None) -> Dict[str, Provider]:
+        """
+        Load all provider configs from a directory.
+        
+        Files are processed in config_files() order; later files override
+        earlier ones. Unchanged files are served from the parsed-config
+        cache.
+        """
+        providers = {}
+        for path in self.config_files(dir_path):
+            if path.suffix == '.json':
+                providers.update(self._load_json(path))
+            else:
+                providers.update(self._load_yaml(path))
         
+        self._save_cache()
         return providers
     
     def load_env_overrides(self) -> Dict[str, dict]:
@@ -174,9 +366,11 @@ class RegistryLoader:
     
     def _create_provider(self, config: dict) -> Provider:
         """Create a Provider instance from configuration dictionary."""
-        # Parse tier
-        tier_str = config.get('tier', 'frontier')
-        tier = ProviderTier(tier_str)
+        # Parse tier: it drives tier-based routing and cost decisions, so
+        # a config must state it rather than fall back to a default
+        if 'tier' not in config:
+            raise ValueError(f"Provider {config.get('id')!r} is missing 'tier'")
+        tier = ProviderTier(config['tier'])
         
         # Parse capabilities
         caps_config = config.get('capabilities', {})
@@ -106,15 +106,17 @@ class Provider:
     
     This is the core data structure used for routing decisions.
     """
-    # Identity
+    # Identity. Required fields come first so the dataclass can be
+    # defined; tier has a default for programmatic construction, but
+    # RegistryLoader rejects configs that omit it.
     id: str                       # Unique identifier (e.g., "openai", "deepseek")
     name: str                     # Display name
-    tier: ProviderTier
+    api_base: str
+    tier: ProviderTier = ProviderTier.FRONTIER
     emoji: str = "🤖"            # Visual identifier
     
     # API configuration
-    api_base: str
-    api_key_env: str              # Environment variable name for API key
+    api_key_env: str = ""         # Environment variable name for API key
     
     # Capabilities and pricing
     capabilities: ProviderCapabilities = field(default_factory=ProviderCapabilities)
@@ -0,0 +1,275 @@
+"""
+Hot reload of provider configuration files.
+
+ConfigWatcher polls the config directory, re-parses only the files that
+changed and reports a provider-level diff. ConfigStore holds an
+immutable provider set; applying a diff yields a new store that shares
+every unaffected Provider object, so a router can swap stores atomically
+while requests already in flight keep the set they started with.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .codec import provider_to_record
+from .loader import RegistryLoader
+from .models import Provider, ProviderHealth
+from .store import ReadOnlyStoreError, RegistryStore
+
+
+# Record fields that are runtime state, not configuration
+_RUNTIME_FIELDS = {"v", "health", "created_at", "updated_at"}
+
+
+def _flatten(record: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """Nested record as dotted field paths (e.g. "cost.input_per_1m")."""
+    flat = {}
+    for key, value in record.items():
+        if not prefix and key in _RUNTIME_FIELDS:
+            continue
+        if isinstance(value, dict) and key != "config":
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+@dataclass
+class ProviderChange:
+    """A provider whose configuration changed."""
+    old: Provider
+    new: Provider
+    fields: List[str]             # Dotted paths of the changed fields
+
+
+@dataclass
+class ProviderDiff:
+    """Provider-level difference between two configurations."""
+    added: Dict[str, Provider] = field(default_factory=dict)
+    removed: Dict[str, Provider] = field(default_factory=dict)
+    changed: Dict[str, ProviderChange] = field(default_factory=dict)
+    
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+    
+    @property
+    def affected(self) -> Set[str]:
+        """Ids of every added, removed or changed provider."""
+        return set(self.added) | set(self.removed) | set(self.changed)
+    
+    @property
+    def changed_fields(self) -> Set[str]:
+        """Every field path changed on any provider."""
+        return {f for change in self.changed.values() for f in change.fields}
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "added": sorted(self.added),
+            "removed": sorted(self.removed),
+            "changed": {pid: c.fields for pid, c in sorted(self.changed.items())},
+        }
+
+
+def diff_providers(old: Dict[str, Provider], new: Dict[str, Provider]) -> ProviderDiff:
+    """
+    Compare two provider sets by configuration.
+    
+    Health and timestamps are runtime state and never count as changes.
+    """
+    diff = ProviderDiff(
+        added={pid: p for pid, p in new.items() if pid not in old},
+        removed={pid: p for pid, p in old.items() if pid not in new},
+    )
+    for provider_id in old.keys() & new.keys():
+        before = _flatten(provider_to_record(old[provider_id]))
+        after = _flatten(provider_to_record(new[provider_id]))
+        fields = sorted(k for k in before.keys() | after.keys() if before.get(k) != after.get(k))
+        if fields:
+            diff.changed[provider_id] = ProviderChange(old[provider_id], new[provider_id], fields)
+    return diff
+
+
+class ConfigStore(RegistryStore):
+    """
+    Immutable provider set loaded from configuration.
+    
+    Reloads don't modify a ConfigStore: ``apply()`` returns a new one.
+    Health is runtime state kept on the providers themselves and carries
+    over to the new objects of changed providers. Health history and
+    provider writes go to ``store`` when one is given; without one they
+    raise ReadOnlyStoreError.
+    """
+    
+    def __init__(self, providers: Dict[str, Provider], store: Optional[RegistryStore] = None):
+        """
+        Initialize store.
+        
+        Args:
+            providers: provider_id -> Provider
+            store: Store that receives writes and health history
+        """
+        self._providers = dict(providers)
+        self.store = store
+    
+    def apply(self, diff: ProviderDiff) -> "ConfigStore":
+        """A new store with the diff applied; unaffected providers are shared."""
+        providers = dict(self._providers)
+        for provider_id in diff.removed:
+            providers.pop(provider_id, None)
+        providers.update(diff.added)
+        for provider_id, change in diff.changed.items():
+            current = providers.get(provider_id)
+            if current is not None:
+                change.new.health = current.health
+            providers[provider_id] = change.new
+        return ConfigStore(providers, self.store)
+    
+    def get_provider(self, provider_id: str) -> Optional[Provider]:
+        """Retrieve a provider by ID."""
+        return self._providers.get(provider_id)
+    
+    def get_all_providers(self) -> Dict[str, Provider]:
+        """Retrieve all providers."""
+        return dict(self._providers)
+    
+    def _writer(self) -> RegistryStore:
+        if self.store is None:
+            raise ReadOnlyStoreError("Config stores change through config files without a backing store")
+        return self.store
+    
+    def save_provider(self, provider: Provider) -> None:
+        """Save a provider to the backing store."""
+        self._writer().save_provider(provider)
+    
+    def save_health(self, provider_id: str, health: ProviderHealth) -> None:
+        """Update a provider's live health, recording it in the backing store if any."""
+        provider = self._providers.get(provider_id)
+        if provider is not None:
+            provider.health = health
+        if self.store is not None:
+            self.store.save_health(provider_id, health)
+    
+    def get_health_history(self, provider_id: str, limit: int = 100) -> List[dict]:
+        """Get recent health checks from the backing store."""
+        return self._writer().get_health_history(provider_id, limit)
+
+
+class ConfigWatcher:
+    """
+    Polls a config directory and reports provider-level changes.
+    
+    Files are tracked by (mtime, size); only changed or new files are
+    parsed again, and the per-file results are merged in the loader's
+    file order. A file that fails to parse (e.g. saved mid-edit) keeps
+    its previous providers and is retried on the next check; no diff is
+    reported until every changed file parses.
+    """
+    
+    def __init__(
+        self,
+        loader: RegistryLoader,
+        on_change: Optional[Callable[[ProviderDiff], None]] = None,
+        dir_path: Optional[Path] = None,
+        interval: float = 1.0,
+    ):
+        """
+        Initialize watcher and load the current configuration.
+        
+        Args:
+            loader: Loader used to parse files
+            on_change: Called with each non-empty diff
+            dir_path: Directory to watch (default: the loader's config path)
+            interval: Seconds between background checks
+        
+        Raises:
+            ValueError: If the current configuration doesn't parse
+        """
+        self.loader = loader
+        self.on_change = on_change
+        self.dir_path = dir_path or loader.config_path
+        self.interval = interval
+        
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+        
+        self._stamps: Dict[Path, Tuple[int, int]] = {}
+        self._files: Dict[Path, Dict[str, Provider]] = {}
+        self._order: List[Path] = []
+        self.providers: Dict[str, Provider] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._reload()
+        if self.last_error is not None:
+            raise ValueError(f"Invalid provider config: {self.last_error}")
+    
+    def check(self) -> Optional[ProviderDiff]:
+        """
+        Re-parse changed files and report what changed.
+        
+        Returns:
+            The diff (None if nothing changed or a file failed to parse)
+        """
+        diff = self._reload()
+        if diff is None or diff.empty:
+            return None
+        self.reloads += 1
+        if self.on_change is not None:
+            self.on_change(diff)
+        return diff
+    
+    def _reload(self) -> Optional[ProviderDiff]:
+        """Bring the per-file state up to date; the diff, or None if unchanged."""
+        with self._lock:
+            order = self.loader.config_files(self.dir_path)
+            stamps = {}
+            for path in order:
+                stat = path.stat()
+                stamps[path] = (stat.st_mtime_ns, stat.st_size)
+            if order == self._order and stamps == self._stamps:
+                return None
+            
+            files = {path: self._files[path] for path in order if path in self._files}
+            for path in order:
+                if stamps[path] == self._stamps.get(path) and path in files:
+                    continue
+                try:
+                    files[path] = self.loader.load_file(path)
+                except Exception as e:
+                    self.last_error = f"{path}: {e}"
+                    return None
+            
+            providers: Dict[str, Provider] = {}
+            for path in order:
+                providers.update(files[path])
+            
+            diff = diff_providers(self.providers, providers)
+            self._order, self._stamps, self._files = order, stamps, files
+            self.providers = providers
+            self.last_error = None
+            return diff
+    
+    def start(self):
+        """Check for changes on a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        """Stop the background thread."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def _run(self):
+        """Background check loop."""
+        while not self._stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                # Keep watching: e.g. a file deleted between listing and stat
+                self.last_error = str(e)
@@ -0,0 +1,340 @@
+"""
+Read-only, memory-mapped registry snapshots for multi-process workers.
+
+One process exports the registry (and any precomputed per-provider
+score tables) into a compact binary file; every worker maps it read-only,
+so the page cache holds a single copy however many workers there are.
+A new version is published by writing a temporary file and renaming it
+over the old one: workers that still map the old file keep a consistent
+view until they notice the swap and remap.
+
+Layout (native byte order, recorded in the header)::
+
+    header | provider index | table names | padding | tables | blob
+
+The index holds (id, record) offsets into the blob, sorted by provider
+id; records are ``registry.codec`` JSON. Tables are float64 arrays with
+one entry per provider, in index order.
+"""
+
+import array
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from .codec import decode_provider, encode_provider
+from .models import Provider, ProviderHealth
+from .store import ReadOnlyStoreError, RegistryStore
+
+
+MAGIC = b"FEDSNAP\0"
+FORMAT_VERSION = 1
+
+# magic, format, little-endian flag, provider count, table count, created_at
+_HEADER = struct.Struct("<8sHHIId")
+# id offset, id length, record offset, record length (into the blob)
+_ENTRY = struct.Struct("<IIII")
+# name offset, name length (into the blob)
+_TABLE = struct.Struct("<II")
+_FLOAT = 8
+
+_LITTLE = sys.byteorder == "little"
+
+
+def write_snapshot(
+    path: Union[str, Path],
+    providers: Mapping[str, Provider],
+    tables: Optional[Mapping[str, Sequence[float]]] = None,
+) -> Path:
+    """
+    Export providers and score tables, atomically replacing ``path``.
+    
+    Args:
+        path: Snapshot file
+        providers: provider_id -> Provider
+        tables: Table name -> one value per provider, in sorted id order
+    
+    Returns:
+        The snapshot path
+    """
+    path = Path(path)
+    tables = dict(tables or {})
+    ids = sorted(providers)
+    for name, values in tables.items():
+        if len(values) != len(ids):
+            raise ValueError(f"Table {name!r} has {len(values)} values for {len(ids)} providers")
+    
+    blob = bytearray()
+    
+    def put(data: bytes) -> Tuple[int, int]:
+        offset = len(blob)
+        blob.extend(data)
+        return offset, len(data)
+    
+    index = bytearray()
+    for provider_id in ids:
+        id_ref = put(provider_id.encode("utf-8"))
+        record_ref = put(encode_provider(providers[provider_id]).encode("utf-8"))
+        index += _ENTRY.pack(*id_ref, *record_ref)
+    
+    names = bytearray()
+    for name in tables:
+        names += _TABLE.pack(*put(name.encode("utf-8")))
+    
+    head = _HEADER.size + len(index) + len(names)
+    padding = -head % _FLOAT
+    data = bytearray()
+    for values in tables.values():
+        data += array.array("d", values).tobytes()
+    
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, _LITTLE, len(ids), len(tables), time.time()))
+            f.write(index)
+            f.write(names)
+            f.write(b"\0" * padding)
+            f.write(data)
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return path
+
+
+class RegistrySnapshot:
+    """
+    A mapped snapshot file.
+    
+    Ids, records and tables are read straight from the mapping; only the
+    providers a process asks for are decoded. Tables are zero-copy
+    float64 views, valid until ``close()``.
+    """
+    
+    def __init__(self, path: Union[str, Path]):
+        """
+        Map a snapshot.
+        
+        Raises:
+            ValueError: If the file is not a snapshot this version reads
+        """
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.file_id = (stat.st_ino, stat.st_mtime_ns)
+        self._buf = memoryview(self._mmap)
+        
+        magic, version, little, self.count, table_count, self.created_at = _HEADER.unpack_from(self._buf)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Not a registry snapshot (format {FORMAT_VERSION}): {self.path}")
+        if bool(little) != _LITTLE:
+            self.close()
+            raise ValueError(f"Snapshot was written with a different byte order: {self.path}")
+        
+        self._index_offset = _HEADER.size
+        names_offset = self._index_offset + self.count * _ENTRY.size
+        tables_offset = names_offset + table_count * _TABLE.size
+        tables_offset += -tables_offset % _FLOAT
+        self._blob_offset = tables_offset + table_count * self.count * _FLOAT
+        
+        self._tables: Dict[str, int] = {}
+        for i in range(table_count):
+            offset, length = _TABLE.unpack_from(self._buf, names_offset + i * _TABLE.size)
+            self._tables[self._text(offset, length)] = tables_offset + i * self.count * _FLOAT
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def _text(self, offset: int, length: int) -> str:
+        start = self._blob_offset + offset
+        return str(self._buf[start:start + length], "utf-8")
+    
+    def _entry(self, position: int) -> Tuple[int, int, int, int]:
+        return _ENTRY.unpack_from(self._buf, self._index_offset + position * _ENTRY.size)
+    
+    def provider_id(self, position: int) -> str:
+        """Id of the provider at an index position."""
+        id_offset, id_length, _, _ = self._entry(position)
+        return self._text(id_offset, id_length)
+    
+    def provider_ids(self) -> List[str]:
+        """Every provider id, in index order."""
+        return [self.provider_id(i) for i in range(self.count)]
+    
+    def position(self, provider_id: str) -> Optional[int]:
+        """Index position of a provider (binary search), or None."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.provider_id(mid) < provider_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self.provider_id(lo) == provider_id:
+            return lo
+        return None
+    
+    def provider_at(self, position: int) -> Provider:
+        """Decode the provider at an index position."""
+        _, _, record_offset, record_length = self._entry(position)
+        return decode_provider(self._text(record_offset, record_length))
+    
+    @property
+    def table_names(self) -> List[str]:
+        return list(self._tables)
+    
+    def table(self, name: str) -> memoryview:
+        """
+        A score table as a float64 view, indexed by provider position.
+        
+        Raises:
+            KeyError: If the snapshot has no such table
+        """
+        start = self._tables[name]
+        return self._buf[start:start + self.count * _FLOAT].cast("d")
+    
+    def close(self):
+        """Unmap the file. Views returned by ``table()`` must be released first."""
+        self._buf.release()
+        self._mmap.close()
+
+
+class SnapshotStore(RegistryStore):
+    """
+    Read-only registry store backed by a mapped snapshot.
+    
+    Every worker process opens its own SnapshotStore on the same file.
+    At most every ``check_interval`` seconds a read checks whether the
+    file was swapped and, if so, maps the new version; callers that
+    already hold providers or table views from the old version keep a
+    consistent (old) view. Providers are decoded once per version and
+    shared by every read of that version, so they are frozen: don't
+    modify them; save changes (including health updates, via
+    ``save_health``) to the backing store, where the next snapshot
+    picks them up.
+    
+    Writes go to ``store`` when one is given (typically the shared
+    database the snapshot is exported from); without one the store is
+    read-only and writes raise ReadOnlyStoreError.
+    """
+    
+    def __init__(
+        self,
+        path: Union[str, Path],
+        store: Optional[RegistryStore] = None,
+        check_interval: float = 1.0,
+    ):
+        """
+        Initialize store.
+        
+        Args:
+            path: Snapshot file
+            store: Store that receives writes and health history reads
+            check_interval: Minimum seconds between checks for a new file
+        """
+        self.path = Path(path)
+        self.store = store
+        self.check_interval = check_interval
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._checked_at = time.monotonic()
+        self._snapshot = RegistrySnapshot(self.path)
+        self._providers: Optional[Dict[str, Provider]] = None
+        self._positions: Optional[Dict[str, int]] = None
+    
+    @property
+    def snapshot(self) -> RegistrySnapshot:
+        """The current snapshot, remapped if the file was swapped."""
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            self.reload()
+        return self._snapshot
+    
+    def reload(self) -> bool:
+        """
+        Map the file if it changed since it was last mapped.
+        
+        Returns:
+            True if a new version was mapped
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        if (stat.st_ino, stat.st_mtime_ns) == self._snapshot.file_id:
+            return False
+        
+        snapshot = RegistrySnapshot(self.path)
+        with self._lock:
+            # The old mapping is released once nothing references it
+            self._snapshot = snapshot
+            self._providers = None
+            self._positions = None
+            self.reloads += 1
+        return True
+    
+    def _decoded(self) -> Tuple[RegistrySnapshot, Dict[str, Provider], Dict[str, int]]:
+        """The current snapshot with its decoded providers and positions."""
+        snapshot = self.snapshot
+        with self._lock:
+            if self._providers is None or snapshot is not self._snapshot:
+                snapshot = self._snapshot
+                ids = snapshot.provider_ids()
+                self._positions = {pid: i for i, pid in enumerate(ids)}
+                self._providers = {pid: snapshot.provider_at(i) for i, pid in enumerate(ids)}
+            return snapshot, self._providers, self._positions
+    
+    def get_provider(self, provider_id: str) -> Optional[Provider]:
+        """Retrieve a provider by ID (shared and frozen; see the class docs)."""
+        return self._decoded()[1].get(provider_id)
+    
+    def get_all_providers(self) -> Dict[str, Provider]:
+        """Retrieve all providers (shared and frozen; the dict is the caller's own)."""
+        return dict(self._decoded()[1])
+    
+    def score_tables(
+        self, names: Sequence[str],
+    ) -> Optional[Tuple[List[memoryview], Dict[str, Provider], Dict[str, int]]]:
+        """
+        Precomputed score tables, all from the same snapshot version.
+        
+        Returns:
+            (tables, providers they describe, provider_id -> position), or
+            None if the snapshot lacks any of the tables
+        """
+        snapshot, providers, positions = self._decoded()
+        if not all(name in snapshot.table_names for name in names):
+            return None
+        return [snapshot.table(name) for name in names], providers, positions
+    
+    def _writer(self) -> RegistryStore:
+        if self.store is None:
+            raise ReadOnlyStoreError("Snapshot stores are read-only without a backing store")
+        return self.store
+    
+    def save_provider(self, provider: Provider) -> None:
+        """Save a provider to the backing store (visible from the next snapshot)."""
+        self._writer().save_provider(provider)
+    
+    def save_providers(self, providers: List[Provider]) -> None:
+        """Save providers to the backing store (visible from the next snapshot)."""
+        self._writer().save_providers(providers)
+    
+    def save_health(self, provider_id: str, health: ProviderHealth) -> None:
+        """Save health metrics to the backing store."""
+        self._writer().save_health(provider_id, health)
+    
+    def get_health_history(self, provider_id: str, limit: int = 100) -> List[dict]:
+        """Get recent health checks from the backing store."""
+        return self._writer().get_health_history(provider_id, limit)
@@ -5,10 +5,14 @@ Supports SQLite (local/single-node) and Redis (distributed) backends.
 """
 
 import json
+import queue
 import sqlite3
-from datetime import datetime
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 from contextlib import contextmanager
 
 try:
@@ -17,9 +21,21 @@ try:
 except ImportError:
     REDIS_AVAILABLE = False
 
+from .batching import Batch, WriteBehindQueue
+from .codec import decode_provider, encode_provider, provider_from_record
+from .invalidation import (
+    HEALTH,
+    PROVIDERS,
+    InvalidationListener,
+    health_message,
+)
 from .models import Provider, ProviderHealth, ProviderStatus
 
 
+class ReadOnlyStoreError(PermissionError):
+    """A write to a store that has nowhere to write it."""
+
+
 class RegistryStore:
     """
     Abstract base class for registry storage backends.
@@ -29,6 +45,11 @@ class RegistryStore:
         """Save or update a provider."""
         raise NotImplementedError
     
+    def save_providers(self, providers: List[Provider]) -> None:
+        """Save or update several providers."""
+        for provider in providers:
+            self.save_provider(provider)
+    
     def get_provider(self, provider_id: str) -> Optional[Provider]:
         """Retrieve a provider by ID."""
         raise NotImplementedError
@@ -46,27 +67,146 @@ class RegistryStore:
         raise NotImplementedError
 
 
+@dataclass
+class HealthRetention:
+    """How long each resolution of health data is kept."""
+    raw: timedelta = timedelta(days=2)
+    minute: timedelta = timedelta(days=14)
+    hour: timedelta = timedelta(days=400)
+
+
 class SQLiteStore(RegistryStore):
     """
     SQLite-backed registry store for local or single-node deployments.
     
     Schema:
-    - providers: Static provider configuration
+    - providers: Full provider records (see registry.codec), with a
+      version bumped on every save
     - health_checks: Time-series health metrics
+    - health_rollups / health_rollup_status: Health checks downsampled
+      to 1-minute and 1-hour buckets, maintained as checks are written
+      (and built from existing checks when an older database is opened)
     - routing_outcomes: Learning data for optimization
+    - routing_daily: Per-provider, per-task-type daily outcome totals,
+      maintained as outcomes are written
+    
+    Connections are opened once and reused. The database runs in WAL
+    mode so reads proceed alongside writes: each read checks a reader
+    connection out of a pool of at most ``max_readers`` (waiting when all
+    are busy), and all writes go through a single connection serialized
+    by a lock. Statements are cached per connection.
+    
+    With ``write_behind`` enabled, health checks and routing outcomes are
+    queued and inserted in batches (see WriteBehindQueue). Reads of those
+    tables flush the queue first, so they still see every saved row.
+    
+    Raw health checks and rollups are pruned according to ``retention``;
+    ``get_health_series`` reads the coarsest resolution a range needs.
+    
+    Parsed records are cached by row version and update time, so reads
+    only decode rows that changed. ``get_provider`` builds a fresh
+    provider from the cached record. ``get_all_providers`` returns a new
+    dict of providers shared between calls while the registry version (a
+    counter bumped by triggers on every providers write) is unchanged, so
+    the per-request read is a single-row query; treat those providers as
+    read-only and save changes with ``save_provider`` or ``save_health``.
     """
     
-    def __init__(self, db_path: str = "federation.db"):
+    # Rollup bucket widths in seconds
+    ROLLUP_RESOLUTIONS = {"minute": 60, "hour": 3600}
+    
+    # Series queries: raw rows for short ranges, otherwise the finest
+    # rollup that returns at most SERIES_MAX_POINTS buckets
+    RAW_MAX_SPAN = timedelta(hours=1)
+    SERIES_MAX_POINTS = 1440
+    
+    def __init__(
+        self,
+        db_path: str = "federation.db",
+        synchronous: str = "NORMAL",
+        mmap_size: int = 256 * 1024 * 1024,
+        cached_statements: int = 256,
+        max_readers: int = 8,
+        write_behind: bool = False,
+        flush_interval: float = 1.0,
+        max_batch: int = 500,
+        max_pending: int = 10_000,
+        retention: Optional[HealthRetention] = None,
+        prune_interval: float = 300.0,
+    ):
+        """
+        Initialize store.
+        
+        Args:
+            db_path: Database file (":memory:" for a private in-memory DB)
+            synchronous: SQLite synchronous pragma; NORMAL is durable
+                across application crashes in WAL mode
+            mmap_size: Bytes of the database to memory-map for reads
+            cached_statements: Prepared statements kept per connection
+            max_readers: Most reader connections open at once
+            write_behind: Batch health and outcome inserts
+            flush_interval: Seconds between write-behind flushes
+            max_batch: Queued rows that trigger an early flush
+            max_pending: Most rows queued before producers flush inline
+            retention: Health data retention (default: HealthRetention())
+            prune_interval: Minimum seconds between automatic prunes
+        """
         self.db_path = Path(db_path)
+        self.synchronous = synchronous
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self.retention = retention or HealthRetention()
+        self.prune_interval = prune_interval
+        self._last_prune = float("-inf")
+        # provider_id -> ((version, updated_at), parsed record, shared provider)
+        self._providers: Dict[str, Tuple[tuple, dict, Provider]] = {}
+        # (registry version, providers) of the last get_all_providers
+        self._all: Optional[Tuple[int, Dict[str, Provider]]] = None
+        self.decodes = 0
+        
+        # An in-memory database exists only on one connection, so reads
+        # share the writer
+        self._in_memory = str(db_path) == ":memory:"
+        self.max_readers = max_readers
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._readers: List[sqlite3.Connection] = []
+        self._pool_lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._writer = self._open()
         self._init_db()
+        
+        self._queue: Optional[WriteBehindQueue] = None
+        if write_behind:
+            self._queue = WriteBehindQueue(
+                self._write_batch,
+                flush_interval=flush_interval,
+                max_batch=max_batch,
+                max_pending=max_pending,
+            )
+    
+    def _open(self) -> sqlite3.Connection:
+        """Open a connection with the store's pragmas applied."""
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+            timeout=30.0,
+        )
+        conn.row_factory = sqlite3.Row
+        if not self._in_memory:
+            conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        return conn
     
     def _init_db(self):
         """Initialize database schema."""
-        with self._connect() as conn:
+        with self._write() as conn:
             conn.executescript("""
                 CREATE TABLE IF NOT EXISTS providers (
                     id TEXT PRIMARY KEY,
                     config JSON NOT NULL,
+                    version INTEGER NOT NULL DEFAULT 1,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 );
@@ -98,82 +238,302 @@ class SQLiteStore(RegistryStore):
                 
                 CREATE INDEX IF NOT EXISTS idx_outcomes_provider 
                     ON routing_outcomes(provider_id, created_at);
+                
+                CREATE TABLE IF NOT EXISTS health_rollups (
+                    provider_id TEXT NOT NULL,
+                    resolution INTEGER NOT NULL,
+                    bucket_start TIMESTAMP NOT NULL,
+                    checks INTEGER NOT NULL,
+                    latency_count INTEGER NOT NULL,
+                    latency_sum REAL NOT NULL,
+                    latency_min REAL,
+                    latency_max REAL,
+                    error_rate_count INTEGER NOT NULL,
+                    error_rate_sum REAL NOT NULL,
+                    PRIMARY KEY (provider_id, resolution, bucket_start)
+                ) WITHOUT ROWID;
+                
+                CREATE TABLE IF NOT EXISTS health_rollup_status (
+                    provider_id TEXT NOT NULL,
+                    resolution INTEGER NOT NULL,
+                    bucket_start TIMESTAMP NOT NULL,
+                    status TEXT NOT NULL,
+                    checks INTEGER NOT NULL,
+                    PRIMARY KEY (provider_id, resolution, bucket_start, status)
+                ) WITHOUT ROWID;
+                
+                CREATE INDEX IF NOT EXISTS idx_health_checked_at
+                    ON health_checks(checked_at);
+                
+                CREATE INDEX IF NOT EXISTS idx_rollups_bucket
+                    ON health_rollups(resolution, bucket_start);
+                
+                CREATE TABLE IF NOT EXISTS routing_daily (
+                    provider_id TEXT NOT NULL,
+                    task_type TEXT NOT NULL,
+                    day DATE NOT NULL,
+                    requests INTEGER NOT NULL,
+                    successes INTEGER NOT NULL,
+                    quality_count INTEGER NOT NULL,
+                    quality_sum REAL NOT NULL,
+                    cost_count INTEGER NOT NULL,
+                    cost_sum REAL NOT NULL,
+                    latency_count INTEGER NOT NULL,
+                    latency_sum REAL NOT NULL,
+                    PRIMARY KEY (provider_id, day, task_type)
+                ) WITHOUT ROWID;
+                
+                CREATE TABLE IF NOT EXISTS registry_version (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    version INTEGER NOT NULL
+                );
+                
+                INSERT OR IGNORE INTO registry_version (id, version) VALUES (0, 0);
+                
+                CREATE TRIGGER IF NOT EXISTS providers_inserted AFTER INSERT ON providers
+                BEGIN
+                    UPDATE registry_version SET version = version + 1;
+                END;
+                
+                CREATE TRIGGER IF NOT EXISTS providers_updated AFTER UPDATE ON providers
+                BEGIN
+                    UPDATE registry_version SET version = version + 1;
+                END;
+                
+                CREATE TRIGGER IF NOT EXISTS providers_deleted AFTER DELETE ON providers
+                BEGIN
+                    UPDATE registry_version SET version = version + 1;
+                END;
             """)
+            
+            # Databases written before providers were versioned
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(providers)")}
+            if "version" not in columns:
+                conn.execute(
+                    "ALTER TABLE providers ADD COLUMN version INTEGER NOT NULL DEFAULT 1"
+                )
+            
+            # Databases written before routing_daily existed: build it once
+            # from the raw outcomes
+            if conn.execute("SELECT 1 FROM routing_daily LIMIT 1").fetchone() is None:
+                conn.execute("""
+                    INSERT INTO routing_daily
+                    SELECT
+                        provider_id,
+                        COALESCE(task_type, ''),
+                        date(created_at),
+                        COUNT(*),
+                        SUM(CASE WHEN success THEN 1 ELSE 0 END),
+                        COUNT(quality_score),
+                        COALESCE(SUM(quality_score), 0),
+                        COUNT(cost),
+                        COALESCE(SUM(cost), 0),
+                        COUNT(latency_ms),
+                        COALESCE(SUM(latency_ms), 0)
+                    FROM routing_outcomes
+                    GROUP BY 1, 2, 3
+                """)
+            
+            # Likewise for the health rollups, built from the raw checks
+            if conn.execute("SELECT 1 FROM health_rollups LIMIT 1").fetchone() is None:
+                self._backfill_rollups(conn)
+    
+    def _backfill_rollups(self, conn: sqlite3.Connection, chunk: int = 10_000):
+        """Aggregate existing health checks into the rollup tables, as writes would have."""
+        cursor = conn.execute(
+            "SELECT provider_id, status, latency_ms, error_rate, checked_at FROM health_checks"
+        )
+        while True:
+            rows = cursor.fetchmany(chunk)
+            if not rows:
+                return
+            rollups, statuses = self._rollup([
+                (row[0], row[1], row[2], row[3], datetime.fromisoformat(row[4]))
+                for row in rows
+            ])
+            conn.executemany(self._UPSERT_ROLLUP, rollups)
+            conn.executemany(self._UPSERT_ROLLUP_STATUS, statuses)
     
     @contextmanager
-    def _connect(self):
-        """Context manager for database connections."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+    def _read(self):
+        """A pooled reader connection, returned to the pool afterwards."""
+        if self._in_memory:
+            with self._write_lock:
+                yield self._writer
+            return
+        
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                grow = len(self._readers) < self.max_readers
+                if grow:
+                    conn = self._open()
+                    self._readers.append(conn)
+            if not grow:
+                # Pool exhausted: wait for a reader to come back
+                conn = self._idle.get()
         try:
             yield conn
-            conn.commit()
         finally:
+            self._idle.put(conn)
+    
+    @contextmanager
+    def _write(self):
+        """The writer connection, held exclusively for one transaction."""
+        with self._write_lock:
+            try:
+                yield self._writer
+                self._writer.commit()
+            except BaseException:
+                self._writer.rollback()
+                raise
+    
+    def flush(self) -> bool:
+        """
+        Write queued health checks and outcomes now.
+        
+        Returns:
+            False if the write failed and rows remain queued
+        """
+        return self._queue.flush() if self._queue is not None else True
+    
+    def close(self):
+        """Flush queued writes and close every pooled connection."""
+        if self._queue is not None:
+            self._queue.close()
+        with self._pool_lock:
+            readers, self._readers = self._readers, []
+            self._idle = queue.LifoQueue()
+        for conn in readers:
             conn.close()
+        with self._write_lock:
+            self._writer.close()
+    
+    _UPSERT_PROVIDER = """
+        INSERT INTO providers (id, config, updated_at)
+        VALUES (?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            config = excluded.config,
+            version = version + 1,
+            updated_at = excluded.updated_at
+    """
     
     def save_provider(self, provider: Provider) -> None:
         """Save or update a provider."""
-        with self._connect() as conn:
-            conn.execute(
-                """
-                INSERT INTO providers (id, config, updated_at)
-                VALUES (?, ?, ?)
-                ON CONFLICT(id) DO UPDATE SET
-                    config = excluded.config,
-                    updated_at = excluded.updated_at
-                """,
-                (provider.id, json.dumps(provider.to_dict()), datetime.utcnow())
+        self.save_providers([provider])
+    
+    def save_providers(self, providers: List[Provider]) -> None:
+        """Save or update several providers in one transaction."""
+        now = datetime.utcnow()
+        with self._write() as conn:
+            conn.executemany(
+                self._UPSERT_PROVIDER,
+                [(p.id, encode_provider(p), now) for p in providers]
             )
     
+    def _cached_record(self, provider_id: str, stamp: tuple, config: str) -> dict:
+        """The parsed record for a row stamp, parsing on a miss."""
+        cached = self._providers.get(provider_id)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        record = json.loads(config)
+        self.decodes += 1
+        self._providers[provider_id] = (stamp, record, provider_from_record(record))
+        return record
+    
     def get_provider(self, provider_id: str) -> Optional[Provider]:
         """Retrieve a provider by ID."""
-        with self._connect() as conn:
+        with self._read() as conn:
             row = conn.execute(
-                "SELECT config FROM providers WHERE id = ?",
+                "SELECT version, updated_at, config FROM providers WHERE id = ?",
                 (provider_id,)
             ).fetchone()
             
             if row:
-                # Note: Full reconstruction would need loader logic
-                # For now, return simplified version
-                config = json.loads(row['config'])
-                return self._reconstruct_provider(config)
+                stamp = (row['version'], row['updated_at'])
+                return provider_from_record(self._cached_record(provider_id, stamp, row['config']))
             return None
     
     def get_all_providers(self) -> Dict[str, Provider]:
-        """Retrieve all providers."""
-        with self._connect() as conn:
-            rows = conn.execute("SELECT id, config FROM providers").fetchall()
+        """
+        Retrieve all providers.
+        
+        The providers are shared with other callers until the registry
+        changes; the returned dict is the caller's own.
+        """
+        with self._read() as conn:
+            # Read before the rows: a write landing in between only
+            # causes an extra refresh on the next call
+            version = conn.execute("SELECT version FROM registry_version").fetchone()[0]
+            cached_all = self._all
+            if cached_all is not None and cached_all[0] == version:
+                return dict(cached_all[1])
             
-            providers = {}
-            for row in rows:
-                config = json.loads(row['config'])
-                provider = self._reconstruct_provider(config)
-                providers[provider.id] = provider
+            # A version restarts at 1 when a row is deleted and re-inserted;
+            # the update time tells the two rows apart
+            stamps = {
+                row['id']: (row['version'], row['updated_at'])
+                for row in conn.execute("SELECT id, version, updated_at FROM providers")
+            }
             
-            return providers
+            # Only rows whose stamp changed are fetched and decoded
+            stale = [
+                pid for pid, stamp in stamps.items()
+                if self._providers.get(pid, (None,))[0] != stamp
+            ]
+            for i in range(0, len(stale), 500):
+                chunk = stale[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT id, version, updated_at, config FROM providers "
+                    f"WHERE id IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for row in rows:
+                    self._cached_record(row['id'], (row['version'], row['updated_at']), row['config'])
+        
+        # Forget providers deleted elsewhere
+        for provider_id in self._providers.keys() - stamps.keys():
+            self._providers.pop(provider_id, None)
+        
+        providers = {
+            pid: cached[2]
+            for pid, cached in ((pid, self._providers.get(pid)) for pid in stamps)
+            if cached is not None
+        }
+        self._all = (version, providers)
+        return dict(providers)
+    
+    _INSERT_HEALTH = """
+        INSERT INTO health_checks 
+            (provider_id, status, latency_ms, error_rate, checked_at)
+        VALUES (?, ?, ?, ?, ?)
+    """
+    
+    _INSERT_OUTCOME = """
+        INSERT INTO routing_outcomes
+            (provider_id, task_type, success, quality_score, cost, latency_ms, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
     
     def save_health(self, provider_id: str, health: ProviderHealth) -> None:
         """Save health check result."""
-        with self._connect() as conn:
-            conn.execute(
-                """
-                INSERT INTO health_checks 
-                    (provider_id, status, latency_ms, error_rate, checked_at)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (
-                    provider_id,
-                    health.status.name,
-                    health.avg_latency_ms,
-                    health.error_rate_24h,
-                    health.last_checked or datetime.utcnow()
-                )
-            )
+        row = (
+            provider_id,
+            health.status.name,
+            health.avg_latency_ms,
+            health.error_rate_24h,
+            health.last_checked or datetime.utcnow()
+        )
+        if self._queue is not None:
+            self._queue.put("health", row)
+            return
+        self._write_batch({"health": [row]})
     
     def get_health_history(self, provider_id: str, limit: int = 100) -> List[dict]:
         """Get recent health checks for a provider."""
-        with self._connect() as conn:
+        self.flush()
+        with self._read() as conn:
             rows = conn.execute(
                 """
                 SELECT status, latency_ms, error_rate, checked_at
@@ -191,34 +551,322 @@ class SQLiteStore(RegistryStore):
                             success: bool, quality_score: float,
                             cost: float, latency_ms: int) -> None:
         """Save routing outcome for learning."""
-        with self._connect() as conn:
-            conn.execute(
+        row = (provider_id, task_type, success, quality_score, cost, latency_ms, datetime.utcnow())
+        if self._queue is not None:
+            self._queue.put("outcome", row)
+            return
+        self._write_batch({"outcome": [row]})
+    
+    _UPSERT_ROLLUP = """
+        INSERT INTO health_rollups (
+            provider_id, resolution, bucket_start, checks,
+            latency_count, latency_sum, latency_min, latency_max,
+            error_rate_count, error_rate_sum
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(provider_id, resolution, bucket_start) DO UPDATE SET
+            checks = checks + excluded.checks,
+            latency_count = latency_count + excluded.latency_count,
+            latency_sum = latency_sum + excluded.latency_sum,
+            latency_min = MIN(
+                COALESCE(latency_min, excluded.latency_min),
+                COALESCE(excluded.latency_min, latency_min)
+            ),
+            latency_max = MAX(
+                COALESCE(latency_max, excluded.latency_max),
+                COALESCE(excluded.latency_max, latency_max)
+            ),
+            error_rate_count = error_rate_count + excluded.error_rate_count,
+            error_rate_sum = error_rate_sum + excluded.error_rate_sum
+    """
+    
+    _UPSERT_ROLLUP_STATUS = """
+        INSERT INTO health_rollup_status
+            (provider_id, resolution, bucket_start, status, checks)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(provider_id, resolution, bucket_start, status) DO UPDATE SET
+            checks = checks + excluded.checks
+    """
+    
+    _UPSERT_DAILY = """
+        INSERT INTO routing_daily (
+            provider_id, task_type, day, requests, successes,
+            quality_count, quality_sum, cost_count, cost_sum,
+            latency_count, latency_sum
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(provider_id, day, task_type) DO UPDATE SET
+            requests = requests + excluded.requests,
+            successes = successes + excluded.successes,
+            quality_count = quality_count + excluded.quality_count,
+            quality_sum = quality_sum + excluded.quality_sum,
+            cost_count = cost_count + excluded.cost_count,
+            cost_sum = cost_sum + excluded.cost_sum,
+            latency_count = latency_count + excluded.latency_count,
+            latency_sum = latency_sum + excluded.latency_sum
+    """
+    
+    def _write_batch(self, batch: Batch) -> None:
+        """Insert queued rows of every kind in one transaction."""
+        with self._write() as conn:
+            if batch.get("health"):
+                conn.executemany(self._INSERT_HEALTH, batch["health"])
+                rollups, statuses = self._rollup(batch["health"])
+                conn.executemany(self._UPSERT_ROLLUP, rollups)
+                conn.executemany(self._UPSERT_ROLLUP_STATUS, statuses)
+            if batch.get("outcome"):
+                conn.executemany(self._INSERT_OUTCOME, batch["outcome"])
+                conn.executemany(self._UPSERT_DAILY, self._daily_totals(batch["outcome"]))
+        
+        if batch.get("health") and time.monotonic() - self._last_prune >= self.prune_interval:
+            self.prune_health()
+    
+    @staticmethod
+    def _bucket(ts: datetime, seconds: int) -> datetime:
+        """Start of the ``seconds``-wide bucket containing ``ts``."""
+        epoch = datetime(1970, 1, 1, tzinfo=ts.tzinfo)
+        offset = (ts - epoch).total_seconds()
+        return epoch + timedelta(seconds=offset - offset % seconds)
+    
+    def _rollup(self, rows: List[tuple]) -> Tuple[List[tuple], List[tuple]]:
+        """Aggregate health rows into per-bucket upserts for every resolution."""
+        buckets: Dict[tuple, list] = {}
+        statuses: Dict[tuple, int] = {}
+        
+        for provider_id, status, latency, error_rate, checked_at in rows:
+            for seconds in self.ROLLUP_RESOLUTIONS.values():
+                key = (provider_id, seconds, self._bucket(checked_at, seconds))
+                agg = buckets.get(key)
+                if agg is None:
+                    # checks, latency n/sum/min/max, error rate n/sum
+                    agg = buckets[key] = [0, 0, 0.0, None, None, 0, 0.0]
+                agg[0] += 1
+                if latency is not None:
+                    agg[1] += 1
+                    agg[2] += latency
+                    agg[3] = latency if agg[3] is None else min(agg[3], latency)
+                    agg[4] = latency if agg[4] is None else max(agg[4], latency)
+                if error_rate is not None:
+                    agg[5] += 1
+                    agg[6] += error_rate
+                statuses[key + (status,)] = statuses.get(key + (status,), 0) + 1
+        
+        return (
+            [key + tuple(agg) for key, agg in buckets.items()],
+            [key + (count,) for key, count in statuses.items()],
+        )
+    
+    @staticmethod
+    def _daily_totals(rows: List[tuple]) -> List[tuple]:
+        """Aggregate outcome rows into per-day upserts."""
+        totals: Dict[tuple, list] = {}
+        
+        for provider_id, task_type, success, quality, cost, latency, created_at in rows:
+            key = (provider_id, task_type or "", created_at.date())
+            agg = totals.get(key)
+            if agg is None:
+                # requests, successes, then count/sum for quality, cost, latency
+                agg = totals[key] = [0, 0, 0, 0.0, 0, 0.0, 0, 0.0]
+            agg[0] += 1
+            agg[1] += 1 if success else 0
+            for i, value in ((2, quality), (4, cost), (6, latency)):
+                if value is not None:
+                    agg[i] += 1
+                    agg[i + 1] += value
+        
+        return [key + tuple(agg) for key, agg in totals.items()]
+    
+    def prune_health(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Delete health data older than the retention policy.
+        
+        Runs automatically at most every ``prune_interval`` seconds as
+        health checks are written.
+        
+        Args:
+            now: Reference time (default: utcnow)
+        
+        Returns:
+            Rows deleted per resolution ("raw", "minute", "hour")
+        """
+        now = now or datetime.utcnow()
+        self._last_prune = time.monotonic()
+        deleted = {}
+        
+        with self._write() as conn:
+            deleted["raw"] = conn.execute(
+                "DELETE FROM health_checks WHERE checked_at < ?",
+                (now - self.retention.raw,)
+            ).rowcount
+            
+            for name, seconds in self.ROLLUP_RESOLUTIONS.items():
+                cutoff = now - getattr(self.retention, name)
+                deleted[name] = conn.execute(
+                    "DELETE FROM health_rollups WHERE resolution = ? AND bucket_start < ?",
+                    (seconds, cutoff)
+                ).rowcount
+                conn.execute(
+                    "DELETE FROM health_rollup_status WHERE resolution = ? AND bucket_start < ?",
+                    (seconds, cutoff)
+                )
+        
+        return deleted
+    
+    def series_resolution(
+        self,
+        start: datetime,
+        end: datetime,
+        now: Optional[datetime] = None,
+    ) -> str:
+        """
+        Resolution a health series query over ``[start, end)`` reads.
+        
+        Returns:
+            "raw", "minute", or "hour"
+        """
+        now = now or datetime.utcnow()
+        span = end - start
+        age = now - start
+        
+        if span <= self.RAW_MAX_SPAN and age <= self.retention.raw:
+            return "raw"
+        minute_points = span.total_seconds() / self.ROLLUP_RESOLUTIONS["minute"]
+        if minute_points <= self.SERIES_MAX_POINTS and age <= self.retention.minute:
+            return "minute"
+        return "hour"
+    
+    def get_health_series(
+        self,
+        provider_id: str,
+        start: datetime,
+        end: Optional[datetime] = None,
+        resolution: Optional[str] = None,
+    ) -> List[dict]:
+        """
+        Health time series for a provider over ``[start, end)``.
+        
+        Each point has bucket_start, checks, latency_min/avg/max,
+        error_rate and status_counts. Raw points are single checks.
+        
+        Args:
+            provider_id: Provider to query
+            start: Range start (naive UTC, like checked_at)
+            end: Range end (default: now)
+            resolution: "raw", "minute" or "hour" (default: chosen from
+                the range by ``series_resolution``)
+        
+        Returns:
+            Points in time order
+        """
+        self.flush()
+        end = end or datetime.utcnow()
+        resolution = resolution or self.series_resolution(start, end)
+        
+        if resolution == "raw":
+            with self._read() as conn:
+                rows = conn.execute(
+                    """
+                    SELECT status, latency_ms, error_rate, checked_at
+                    FROM health_checks
+                    WHERE provider_id = ? AND checked_at >= ? AND checked_at < ?
+                    ORDER BY checked_at
+                    """,
+                    (provider_id, start, end)
+                ).fetchall()
+            
+            return [
+                {
+                    "bucket_start": datetime.fromisoformat(row["checked_at"]),
+                    "checks": 1,
+                    "latency_min": row["latency_ms"],
+                    "latency_avg": row["latency_ms"],
+                    "latency_max": row["latency_ms"],
+                    "error_rate": row["error_rate"],
+                    "status_counts": {row["status"]: 1},
+                }
+                for row in rows
+            ]
+        
+        seconds = self.ROLLUP_RESOLUTIONS[resolution]
+        # Include the bucket that contains ``start``
+        params = (provider_id, seconds, self._bucket(start, seconds), end)
+        with self._read() as conn:
+            rows = conn.execute(
                 """
-                INSERT INTO routing_outcomes
-                    (provider_id, task_type, success, quality_score, cost, latency_ms)
-                VALUES (?, ?, ?, ?, ?, ?)
+                SELECT bucket_start, checks, latency_count, latency_sum,
+                    latency_min, latency_max, error_rate_count, error_rate_sum
+                FROM health_rollups
+                WHERE provider_id = ? AND resolution = ?
+                    AND bucket_start >= ? AND bucket_start < ?
+                ORDER BY bucket_start
                 """,
-                (provider_id, task_type, success, quality_score, cost, latency_ms)
-            )
-    
-    def get_routing_stats(self, provider_id: str, 
-                         days: int = 7) -> Optional[dict]:
-        """Get aggregate routing statistics for a provider."""
-        with self._connect() as conn:
-            row = conn.execute(
+                params
+            ).fetchall()
+            status_rows = conn.execute(
                 """
-                SELECT 
-                    COUNT(*) as total_requests,
-                    SUM(CASE WHEN success THEN 1 ELSE 0 END) as success_count,
-                    AVG(quality_score) as avg_quality,
-                    AVG(cost) as avg_cost,
-                    AVG(latency_ms) as avg_latency
-                FROM routing_outcomes
-                WHERE provider_id = ?
-                    AND created_at >= datetime('now', '-' || ? || ' days')
+                SELECT bucket_start, status, checks
+                FROM health_rollup_status
+                WHERE provider_id = ? AND resolution = ?
+                    AND bucket_start >= ? AND bucket_start < ?
                 """,
-                (provider_id, days)
-            ).fetchone()
+                params
+            ).fetchall()
+        
+        status_counts: Dict[str, Dict[str, int]] = {}
+        for row in status_rows:
+            status_counts.setdefault(row["bucket_start"], {})[row["status"]] = row["checks"]
+        
+        return [
+            {
+                "bucket_start": datetime.fromisoformat(row["bucket_start"]),
+                "checks": row["checks"],
+                "latency_min": row["latency_min"],
+                "latency_avg": (
+                    row["latency_sum"] / row["latency_count"] if row["latency_count"] else None
+                ),
+                "latency_max": row["latency_max"],
+                "error_rate": (
+                    row["error_rate_sum"] / row["error_rate_count"]
+                    if row["error_rate_count"] else None
+                ),
+                "status_counts": status_counts.get(row["bucket_start"], {}),
+            }
+            for row in rows
+        ]
+    
+    def get_routing_stats(self, provider_id: str, 
+                         days: int = 7,
+                         task_type: Optional[str] = None) -> Optional[dict]:
+        """
+        Get aggregate routing statistics for a provider.
+        
+        Sums the pre-aggregated daily rows, so the cost depends on the
+        number of days and task types, not on the number of outcomes.
+        
+        Args:
+            provider_id: Provider to query
+            days: Calendar days to cover, including today (UTC)
+            task_type: Restrict to one task type (default: all)
+        """
+        self.flush()
+        since = datetime.utcnow().date() - timedelta(days=days - 1)
+        query = """
+            SELECT 
+                SUM(requests) as total_requests,
+                SUM(successes) as success_count,
+                SUM(quality_sum) / NULLIF(SUM(quality_count), 0) as avg_quality,
+                SUM(cost_sum) / NULLIF(SUM(cost_count), 0) as avg_cost,
+                SUM(latency_sum) / NULLIF(SUM(latency_count), 0) as avg_latency
+            FROM routing_daily
+            WHERE provider_id = ? AND day >= ?
+        """
+        params = [provider_id, since]
+        if task_type is not None:
+            query += " AND task_type = ?"
+            params.append(task_type)
+        
+        with self._read() as conn:
+            row = conn.execute(query, params).fetchone()
             
             if row and row['total_requests']:
                 return {
@@ -229,66 +877,291 @@ class SQLiteStore(RegistryStore):
                     'avg_latency_ms': row['avg_latency'],
                 }
             return None
-    
-    def _reconstruct_provider(self, config: dict) -> Provider:
-        """Reconstruct a Provider from stored config."""
-        # Simplified reconstruction - full impl would need all fields
-        from .loader import RegistryLoader
-        loader = RegistryLoader()
-        return loader._create_provider(config)
 
 
 class RedisStore(RegistryStore):
     """
     Redis-backed registry store for distributed deployments.
     
-    Uses Redis hashes for provider data and sorted sets for time-series.
+    Provider records (see registry.codec) live in one hash keyed by
+    provider id, with a companion hash of versions bumped on every save;
+    health history uses one sorted set per provider. Every operation is a
+    single round trip: multi-command operations are pipelined, and a full
+    registry fetch is one HGETALL pair regardless of provider count.
+    Parsed records are cached by version and record text, and every read
+    builds fresh providers from them, as in SQLiteStore.
+    
+    Saves publish change notifications (see registry.invalidation). After
+    ``subscribe()`` the store serves reads from its local cache: provider
+    notifications mark only the affected entries stale, to be refetched
+    in one round trip on the next read, and health notifications update
+    the live health applied to every provider built afterwards. Whenever
+    the subscription (re)starts the cache is revalidated with a full fetch.
+    
+    Deployments written with the older per-provider hashes are still
+    read (in two round trips) until providers are saved again.
+    """
+    
+    HEALTH_HISTORY = 10_000  # Health entries kept per provider
+    
+    # Save records, bump their versions and publish the notification
+    # (the providers_message format) atomically, in one round trip.
+    # KEYS: config hash, version hash; ARGV: publish flag, channel, then
+    # id/record pairs. Returns the new versions in argument order.
+    SAVE_PROVIDERS_SCRIPT = """
+        local versions, result = {}, {}
+        for i = 3, #ARGV, 2 do
+            redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+            local version = redis.call('HINCRBY', KEYS[2], ARGV[i], 1)
+            versions[ARGV[i]] = version
+            result[#result + 1] = version
+        end
+        if ARGV[1] == '1' then
+            redis.call('PUBLISH', ARGV[2], cjson.encode({kind = 'providers', versions = versions}))
+        end
+        return result
     """
     
-    def __init__(self, redis_url: str = "redis://localhost:6379/0"):
-        if not REDIS_AVAILABLE:
-            raise ImportError("Redis support requires 'redis' package: pip install redis")
+    def __init__(
+        self,
+        redis_url: str = "redis://localhost:6379/0",
+        client: Optional["redis.Redis"] = None,
+        key_prefix: str = "federation",
+        publish_changes: bool = True,
+    ):
+        """
+        Initialize store.
         
-        self.client = redis.from_url(redis_url, decode_responses=True)
-        self.key_prefix = "federation"
+        Args:
+            redis_url: Redis connection URL
+            client: Existing client (decode_responses=True) to use instead
+            key_prefix: Namespace for every key
+            publish_changes: Publish change notifications on saves
+        """
+        if client is None:
+            if not REDIS_AVAILABLE:
+                raise ImportError("Redis support requires 'redis' package: pip install redis")
+            client = redis.from_url(redis_url, decode_responses=True)
+        
+        self.client = client
+        self.key_prefix = key_prefix
+        self.publish_changes = publish_changes
+        self.channel = self._key("invalidations")
+        self._save_providers = client.register_script(self.SAVE_PROVIDERS_SCRIPT)
+        
+        # provider_id -> (version, record text, parsed record)
+        self._providers: Dict[str, Tuple[int, str, dict]] = {}
+        # Latest health sample per provider, by timestamp
+        self._health: Dict[str, Tuple[float, dict]] = {}
+        self._stale: Set[str] = set()
+        self._complete = False
+        self._generation = 0  # Bumped whenever notifications may have been missed
+        self._cache_lock = threading.RLock()
+        self._listener: Optional[InvalidationListener] = None
+        self.invalidations = 0
+        self.health_patches = 0
+        self.decodes = 0
     
     def _key(self, *parts) -> str:
         """Build a Redis key with prefix."""
         return f"{self.key_prefix}:{':'.join(parts)}"
     
+    def subscribe(self, background: bool = True, poll_interval: float = 1.0) -> InvalidationListener:
+        """
+        Keep the local cache current from change notifications.
+        
+        Args:
+            background: Apply notifications on a daemon thread; otherwise
+                call ``poll()`` on the returned listener
+            poll_interval: Longest the background thread blocks per poll
+        
+        Returns:
+            The listener
+        """
+        if self._listener is None:
+            self._listener = InvalidationListener(
+                self.client,
+                self.channel,
+                self.apply_notification,
+                self._reset_cache,
+                poll_interval=poll_interval,
+            )
+            if background:
+                self._listener.start()
+        return self._listener
+    
+    def close(self):
+        """Stop applying change notifications."""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        with self._cache_lock:
+            self._complete = False
+    
+    def _reset_cache(self):
+        """Notifications may have been missed: revalidate on next read."""
+        with self._cache_lock:
+            self._complete = False
+            self._generation += 1
+    
+    def apply_notification(self, message: dict):
+        """Apply one change notification to the local cache."""
+        with self._cache_lock:
+            if message["kind"] == PROVIDERS:
+                for provider_id, version in message["versions"].items():
+                    # Any other version (even a lower one, after the
+                    # counter was reset) means the entry may be out of date
+                    cached = self._providers.get(provider_id)
+                    if cached is None or cached[0] != version:
+                        self._stale.add(provider_id)
+                        self.invalidations += 1
+            elif message["kind"] == HEALTH:
+                provider_id = message["id"]
+                version = message["version"]
+                if version <= self._health.get(provider_id, (float("-inf"),))[0]:
+                    return
+                self._health[provider_id] = (version, message["health"])
+                if provider_id in self._providers:
+                    self.health_patches += 1
+    
+    @staticmethod
+    def _patch_health(provider: Provider, sample: dict):
+        """Apply a health sample to a provider in place."""
+        # Samples are stamped with utcnow().timestamp(), which treats the
+        # naive UTC time as local; fromtimestamp() reverses it exactly
+        checked = datetime.fromtimestamp(sample["timestamp"])
+        if provider.health.last_checked is not None and provider.health.last_checked > checked:
+            return
+        provider.health.status = ProviderStatus[sample["status"]]
+        provider.health.avg_latency_ms = sample["latency_ms"]
+        provider.health.error_rate_24h = sample["error_rate"]
+        provider.health.last_checked = checked
+    
     def save_provider(self, provider: Provider) -> None:
         """Save or update a provider."""
-        key = self._key("provider", provider.id)
-        self.client.hset(key, mapping={
-            "config": json.dumps(provider.to_dict()),
-            "updated_at": datetime.utcnow().isoformat(),
-        })
-        # Add to provider index
-        self.client.sadd(self._key("providers"), provider.id)
+        self.save_providers([provider])
+    
+    def save_providers(self, providers: List[Provider]) -> None:
+        """Save or update several providers in one transaction."""
+        if not providers:
+            return
+        args = [1 if self.publish_changes else 0, self.channel]
+        for provider in providers:
+            args += [provider.id, encode_provider(provider)]
+        result = self._save_providers(
+            keys=[self._key("providers", "config"), self._key("providers", "version")],
+            args=args,
+        )
+        versions = dict(zip((p.id for p in providers), (int(v) for v in result)))
+        
+        # Read-your-writes locally; other nodes learn from the notification
+        with self._cache_lock:
+            self._stale.update(versions)
+    
+    def _cached_record(self, provider_id: str, version: int, config: str) -> dict:
+        """The parsed record for a version and record text, parsing on a miss."""
+        cached = self._providers.get(provider_id)
+        if cached is not None and cached[0] == version and cached[1] == config:
+            return cached[2]
+        record = json.loads(config)
+        self.decodes += 1
+        self._providers[provider_id] = (version, config, record)
+        return record
+    
+    def _build(self, provider_id: str, record: dict) -> Provider:
+        """A fresh provider from a cached record, with the newest health seen."""
+        provider = provider_from_record(record)
+        # Records don't carry live health; reapply the newest sample seen
+        sample = self._health.get(provider_id)
+        if sample is not None:
+            self._patch_health(provider, sample[1])
+        return provider
+    
+    def _refresh_stale(self):
+        """Refetch the providers marked stale, in one round trip."""
+        with self._cache_lock:
+            stale, self._stale = sorted(self._stale), set()
+        if not stale:
+            return
+        
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hmget(self._key("providers", "version"), stale)
+        pipe.hmget(self._key("providers", "config"), stale)
+        versions, configs = pipe.execute()
+        
+        with self._cache_lock:
+            for provider_id, version, config in zip(stale, versions, configs):
+                if config:
+                    self._cached_record(provider_id, int(version or 0), config)
+                else:
+                    self._providers.pop(provider_id, None)
     
     def get_provider(self, provider_id: str) -> Optional[Provider]:
         """Retrieve a provider by ID."""
-        key = self._key("provider", provider_id)
-        data = self.client.hget(key, "config")
+        if self._complete:
+            if provider_id in self._stale:
+                self._refresh_stale()
+            cached = self._providers.get(provider_id)
+            return self._build(provider_id, cached[2]) if cached is not None else None
+        
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hget(self._key("providers", "version"), provider_id)
+        pipe.hget(self._key("providers", "config"), provider_id)
+        version, config = pipe.execute()
         
-        if data:
-            config = json.loads(data)
-            from .loader import RegistryLoader
-            loader = RegistryLoader()
-            return loader._create_provider(config)
-        return None
+        if config:
+            with self._cache_lock:
+                record = self._cached_record(provider_id, int(version or 0), config)
+            return self._build(provider_id, record)
+        return self._get_legacy_providers([provider_id]).get(provider_id)
     
     def get_all_providers(self) -> Dict[str, Provider]:
-        """Retrieve all providers."""
-        provider_ids = self.client.smembers(self._key("providers"))
-        providers = {}
+        """Retrieve all providers in one round trip (none when subscribed and current)."""
+        if self._complete:
+            self._refresh_stale()
+            return {pid: self._build(pid, cached[2]) for pid, cached in list(self._providers.items())}
+        
+        # Anything invalidated from here on is refetched on the next read
+        with self._cache_lock:
+            self._stale.clear()
+            generation = self._generation if self._listener is not None else None
+        
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hgetall(self._key("providers", "version"))
+        pipe.hgetall(self._key("providers", "config"))
+        versions, configs = pipe.execute()
         
-        for pid in provider_ids:
-            provider = self.get_provider(pid)
-            if provider:
-                providers[pid] = provider
+        if not configs:
+            return self._get_legacy_providers()
         
-        return providers
+        with self._cache_lock:
+            for provider_id in self._providers.keys() - configs.keys():
+                self._providers.pop(provider_id, None)
+            records = {
+                provider_id: self._cached_record(provider_id, int(versions.get(provider_id, 0)), config)
+                for provider_id, config in configs.items()
+            }
+            # A reset during the fetch leaves the cache unverified
+            if generation is not None and generation == self._generation and self._listener is not None:
+                self._complete = True
+        return {provider_id: self._build(provider_id, record) for provider_id, record in records.items()}
+    
+    def _get_legacy_providers(self, provider_ids: Optional[List[str]] = None) -> Dict[str, Provider]:
+        """Read providers stored as one hash per provider plus an id set."""
+        if provider_ids is None:
+            provider_ids = sorted(self.client.smembers(self._key("providers")))
+        if not provider_ids:
+            return {}
+        
+        pipe = self.client.pipeline(transaction=False)
+        for provider_id in provider_ids:
+            pipe.hget(self._key("provider", provider_id), "config")
+        
+        return {
+            provider_id: decode_provider(config)
+            for provider_id, config in zip(provider_ids, pipe.execute())
+            if config
+        }
     
     def save_health(self, provider_id: str, health: ProviderHealth) -> None:
         """Save health check result."""
@@ -296,17 +1169,21 @@ class RedisStore(RegistryStore):
         key = self._key("health", provider_id)
         timestamp = datetime.utcnow().timestamp()
         
-        data = json.dumps({
+        sample = {
             "status": health.status.name,
             "latency_ms": health.avg_latency_ms,
             "error_rate": health.error_rate_24h,
             "timestamp": timestamp,
-        })
-        
-        self.client.zadd(key, {data: timestamp})
+        }
+        data = json.dumps(sample)
         
-        # Trim to last 10,000 entries
-        self.client.zremrangebyrank(key, 0, -10001)
+        # Add, trim to the last HEALTH_HISTORY entries and notify in one trip
+        pipe = self.client.pipeline(transaction=True)
+        pipe.zadd(key, {data: timestamp})
+        pipe.zremrangebyrank(key, 0, -(self.HEALTH_HISTORY + 1))
+        if self.publish_changes:
+            pipe.publish(self.channel, health_message(provider_id, timestamp, sample))
+        pipe.execute()
     
     def get_health_history(self, provider_id: str, limit: int = 100) -> List[dict]:
         """Get recent health checks for a provider."""
@@ -323,7 +1200,7 @@ def create_store(backend: str = "sqlite", **kwargs) -> RegistryStore:
     Args:
         backend: "sqlite" or "redis"
         **kwargs: Backend-specific configuration
-        
+    
     Returns:
         Configured RegistryStore instance
     """
@@ -2,12 +2,20 @@
 Pytest fixtures and configuration.
 """
 
+import queue
+
 import pytest
 from pathlib import Path
 
-from src.registry.models import Provider, ProviderCapabilities, ProviderCost, ProviderHealth
+from src.registry.models import (
+    Provider,
+    ProviderCapabilities,
+    ProviderCost,
+    ProviderHealth,
+    ProviderStatus,
+)
 from src.registry.loader import RegistryLoader
-from src.registry.store import SQLiteStore
+from src.registry.store import RegistryStore, SQLiteStore
 from src.engine.router import Router
 from src.engine.classifier import IntentClassifier
 
@@ -99,6 +107,43 @@ def router(mock_providers, temp_db):
     return Router(temp_db)
 
 
+class MemoryStore(RegistryStore):
+    """In-memory store that keeps provider health as-is."""
+    
+    def __init__(self, providers=None):
+        self.providers = dict(providers or {})
+        self.health = {}
+    
+    def save_provider(self, provider):
+        self.providers[provider.id] = provider
+    
+    def get_provider(self, provider_id):
+        return self.providers.get(provider_id)
+    
+    def get_all_providers(self):
+        return dict(self.providers)
+    
+    def save_health(self, provider_id, health):
+        self.health.setdefault(provider_id, []).append(health)
+    
+    def get_health_history(self, provider_id, limit=100):
+        return self.health.get(provider_id, [])[-limit:]
+
+
+@pytest.fixture
+def healthy_providers(mock_providers):
+    """Mock providers marked healthy so they are routable."""
+    for provider in mock_providers.values():
+        provider.health = ProviderHealth(status=ProviderStatus.HEALTHY)
+    return mock_providers
+
+
+@pytest.fixture
+def healthy_router(healthy_providers):
+    """Create a router over healthy in-memory providers."""
+    return Router(MemoryStore(healthy_providers))
+
+
 @pytest.fixture
 def classifier():
     """Create an intent classifier."""
@@ -115,3 +160,168 @@ def sample_tasks():
         "debugging": "Debug this error: KeyError 'user_id' not found",
         "summarize": "Summarize the key points from this article",
     }
+
+
+class FakeRedis:
+    """
+    Local Redis stand-in for the commands the stores use.
+    
+    Counts round trips: one per direct command, pipeline execute or
+    script call. Lua scripts can't run here, so the stores' scripts are
+    emulated in Python.
+    """
+    
+    def __init__(self):
+        self.data = {}
+        self.round_trips = 0
+        self.subscribers = {}  # channel -> [FakePubSub]
+    
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+    
+    def register_script(self, script):
+        from src.registry.store import RedisStore
+        
+        emulations = {RedisStore.SAVE_PROVIDERS_SCRIPT: self._save_providers_script}
+        run = emulations[script]
+        
+        def call(keys=(), args=(), client=None):
+            self.round_trips += 1
+            return run(list(keys), [str(a) for a in args])
+        return call
+    
+    def _save_providers_script(self, keys, args):
+        from src.registry.invalidation import providers_message
+        
+        config_key, version_key = keys
+        versions, result = {}, []
+        for provider_id, record in zip(args[2::2], args[3::2]):
+            self._hset(config_key, provider_id, record)
+            versions[provider_id] = self._hincrby(version_key, provider_id, 1)
+            result.append(versions[provider_id])
+        if args[0] == "1":
+            self._publish(args[1], providers_message(versions))
+        return result
+    
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self)
+    
+    def _call(self, name, *args, **kwargs):
+        self.round_trips += 1
+        return getattr(self, "_" + name)(*args, **kwargs)
+    
+    def __getattr__(self, name):
+        if name.startswith("_") or not hasattr(type(self), "_" + name):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self._call(name, *args, **kwargs)
+    
+    def _hset(self, name, key=None, value=None, mapping=None):
+        fields = self.data.setdefault(name, {})
+        updates = dict(mapping or {})
+        if key is not None:
+            updates[key] = value
+        added = len(updates.keys() - fields.keys())
+        fields.update({k: str(v) for k, v in updates.items()})
+        return added
+    
+    def _hget(self, name, key):
+        return self.data.get(name, {}).get(key)
+    
+    def _hmget(self, name, keys):
+        fields = self.data.get(name, {})
+        return [fields.get(key) for key in keys]
+    
+    def _hgetall(self, name):
+        return dict(self.data.get(name, {}))
+    
+    def _hincrby(self, name, key, amount=1):
+        fields = self.data.setdefault(name, {})
+        fields[key] = str(int(fields.get(key, 0)) + amount)
+        return int(fields[key])
+    
+    def _sadd(self, name, *values):
+        members = self.data.setdefault(name, set())
+        added = len(set(values) - members)
+        members.update(values)
+        return added
+    
+    def _smembers(self, name):
+        return set(self.data.get(name, set()))
+    
+    def _zadd(self, name, mapping):
+        zset = self.data.setdefault(name, {})
+        added = len(mapping.keys() - zset.keys())
+        zset.update(mapping)
+        return added
+    
+    def _ordered(self, name):
+        return sorted(self.data.get(name, {}).items(), key=lambda item: (item[1], item[0]))
+    
+    @staticmethod
+    def _slice(items, start, end):
+        n = len(items)
+        start = max(0, start + n if start < 0 else start)
+        end = end + n if end < 0 else min(end, n - 1)
+        return items[start:end + 1] if start <= end else []
+    
+    def _zremrangebyrank(self, name, start, end):
+        doomed = self._slice(self._ordered(name), start, end)
+        for member, _ in doomed:
+            del self.data[name][member]
+        return len(doomed)
+    
+    def _zrevrange(self, name, start, end):
+        return [m for m, _ in self._slice(self._ordered(name)[::-1], start, end)]
+    
+    def _publish(self, channel, message):
+        receivers = self.subscribers.get(channel, [])
+        for pubsub in receivers:
+            pubsub.messages.put({"type": "message", "channel": channel, "data": message})
+        return len(receivers)
+
+
+class FakePubSub:
+    """FakeRedis subscription; messages are delivered in-process."""
+    
+    def __init__(self, client):
+        self.client = client
+        self.channels = []
+        self.messages = queue.Queue()
+    
+    def subscribe(self, *channels):
+        for channel in channels:
+            self.client.subscribers.setdefault(channel, []).append(self)
+            self.channels.append(channel)
+    
+    def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        try:
+            return self.messages.get(timeout=timeout) if timeout else self.messages.get_nowait()
+        except queue.Empty:
+            return None
+    
+    def close(self):
+        for channel in self.channels:
+            self.client.subscribers[channel].remove(self)
+        self.channels = []
+
+
+class FakePipeline:
+    """Buffered FakeRedis commands, executed as one round trip."""
+    
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+    
+    def __getattr__(self, name):
+        if not hasattr(type(self.client), "_" + name):
+            raise AttributeError(name)
+        
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+    
+    def execute(self):
+        self.client.round_trips += 1
+        commands, self.commands = self.commands, []
+        return [getattr(self.client, "_" + name)(*args, **kwargs) for name, args, kwargs in commands]
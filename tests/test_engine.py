@@ -2,9 +2,12 @@
 Tests for the routing engine.
 """
 
+import time
+
 import pytest
-from src.engine.models import Task, TaskIntent, TaskRequirements, TaskPriority
+from src.engine.models import Task, TaskComplexity, TaskIntent, TaskRequirements, TaskPriority
 from src.engine.classifier import IntentClassifier
+from src.engine.complexity import ComplexityEstimator
 from src.engine.router import Router
 
 
@@ -39,6 +42,105 @@ class TestIntentClassifier:
         intent = classifier.classify(task)
         
         assert intent == TaskIntent.UNKNOWN
+    
+    def test_scan_respects_word_boundaries(self, classifier):
+        """Test that keywords inside longer words are not matched."""
+        task = Task(id="test", prompt="Barcodes and debugger_tools")
+        result = classifier.scan(task)
+        
+        assert result.counts == {}
+    
+    def test_scan_returns_counts_and_spans(self, classifier):
+        """Test that one scan yields per-intent counts and spans."""
+        task = Task(id="test", prompt="Please do a code review")
+        result = classifier.scan(task)
+        text = f" {task.prompt}".lower()
+        
+        assert result.counts[TaskIntent.CODE_REVIEW] == 1
+        assert result.counts[TaskIntent.CODE_IMPLEMENTATION] == 1
+        assert {text[m.start:m.end] for m in result.matches} == {"code", "code review"}
+    
+    def test_get_explanation(self, classifier):
+        """Test explanation lists matched keywords."""
+        task = Task(id="test", prompt="Debug this traceback")
+        explanation = classifier.get_explanation(task)
+        
+        assert "code_debugging" in explanation
+        assert "debug" in explanation
+        assert "traceback" in explanation
+    
+    def test_bounded_scan_reads_head_and_tail(self):
+        """Test that bounded mode finds keywords at both ends of a large prompt."""
+        classifier = IntentClassifier(window_chars=256)
+        prompt = "Summarize this. " + "lorem ipsum " * 10_000 + "Research it."
+        task = Task(id="test", prompt=prompt)
+        result = classifier.scan(task)
+        text = f" {prompt}".lower()
+        
+        assert set(result.counts) == {TaskIntent.SUMMARIZATION, TaskIntent.RESEARCH}
+        assert all(text[m.start:m.end] == m.keyword for m in result.matches)
+    
+    def test_bounded_scan_skips_middle(self):
+        """Test that bounded mode ignores text outside the windows."""
+        classifier = IntentClassifier(window_chars=256)
+        prompt = "lorem ipsum " * 1_000 + "debug " + "lorem ipsum " * 1_000
+        task = Task(id="test", prompt=prompt)
+        
+        assert classifier.classify(task) == TaskIntent.UNKNOWN
+    
+    def test_bounded_scan_early_exit(self):
+        """Test that a dominant intent in the head skips the tail."""
+        classifier = IntentClassifier(window_chars=256)
+        prompt = "Debug the error, fix bug in traceback. " + "x " * 1_000 + "Summarize."
+        task = Task(id="test", prompt=prompt)
+        result = classifier.scan(task)
+        
+        assert result.counts == {TaskIntent.CODE_DEBUGGING: 4}
+
+
+class TestComplexityEstimator:
+    """Test the task complexity estimator."""
+    
+    def test_short_question_is_simple(self):
+        """Test that a one-line factual question is simple."""
+        task = Task(
+            id="test",
+            prompt="What is the capital of France?",
+            intent=TaskIntent.QUESTION_ANSWERING,
+        )
+        
+        assert ComplexityEstimator().estimate(task) == TaskComplexity.SIMPLE
+    
+    def test_short_debugging_prompt_is_not_simple(self):
+        """Test that a one-line request for hard work is not simple."""
+        estimator = ComplexityEstimator()
+        for intent in (TaskIntent.CODE_DEBUGGING, TaskIntent.ANALYSIS, TaskIntent.PLANNING):
+            task = Task(
+                id="test",
+                prompt="Why does this crash with a KeyError?",
+                intent=intent,
+            )
+            
+            assert estimator.score(task) < estimator.SIMPLE_BELOW
+            assert estimator.estimate(task) == TaskComplexity.MEDIUM
+    
+    def test_large_structured_task_is_complex(self):
+        """Test that long multi-step code work is complex."""
+        steps = "\n".join(f"{i}. Refactor module_{i} {{ x = y[i]; }}" for i in range(1, 12))
+        task = Task(
+            id="test",
+            prompt=f"{steps}\n```python\n" + "def f(): return {1: [2]}\n" * 2000 + "```",
+            intent=TaskIntent.CODE_REVIEW,
+        )
+        
+        assert ComplexityEstimator().estimate(task) == TaskComplexity.COMPLEX
+    
+    def test_score_in_range(self):
+        """Test that scores are normalized."""
+        task = Task(id="test", prompt="")
+        score = ComplexityEstimator().score(task)
+        
+        assert 0.0 <= score <= 1.0
 
 
 class TestRouter:
@@ -73,6 +175,27 @@ class TestRouter:
         assert decision.quality_score is not None
         assert decision.quality_score >= 0.8
     
+    def test_route_sets_task_complexity(self, router):
+        """Test that routing records estimated complexity."""
+        task = Task(id="test", prompt="What is a closure?")
+        
+        decision = router.route(task)
+        
+        assert task.complexity == TaskComplexity.SIMPLE
+        assert decision.task_complexity == "simple"
+    
+    def test_simple_tasks_weight_cost_and_speed(self, router):
+        """Test that simple tasks shift weight away from quality."""
+        simple = Task(id="a", prompt="", complexity=TaskComplexity.SIMPLE)
+        hard = Task(id="b", prompt="", complexity=TaskComplexity.COMPLEX)
+        
+        simple_weights = router._weights_for(simple)
+        hard_weights = router._weights_for(hard)
+        
+        assert simple_weights[0] < hard_weights[0]
+        assert simple_weights[2] > hard_weights[2]
+        assert sum(simple_weights) == pytest.approx(1.0)
+    
     def test_route_with_requirements(self, router):
         """Test routing with constraints."""
         task = Task(
@@ -105,6 +228,780 @@ class TestRouter:
         assert decision.provider_id == "ollama"
 
 
+class TestSLARouting:
+    """Test cheapest-provider-meeting-SLA routing."""
+    
+    @staticmethod
+    def _task(**reqs):
+        return Task(
+            id="sla",
+            prompt="What is the capital of France?",
+            requirements=TaskRequirements(**reqs),
+        )
+    
+    def test_cheapest_meeting_quality(self, healthy_router):
+        """Quality floor alone picks the cheapest qualifying provider."""
+        decision = healthy_router.route(self._task(min_quality_score=0.86))
+        
+        assert decision.provider_id == "deepseek"
+        assert "SLA" in decision.reasoning
+    
+    def test_latency_bound_excludes_slow_providers(self, healthy_router):
+        """A p95 bound rules out providers that are too slow."""
+        assert healthy_router.route(
+            self._task(min_quality_score=0.86, max_latency_ms=1500)
+        ).provider_id == "openai"
+        assert healthy_router.route(self._task(max_latency_ms=500)).provider_id == "groq"
+    
+    def test_unsatisfiable_sla_falls_back(self, healthy_router):
+        """No provider meeting the SLA yields a fallback decision."""
+        decision = healthy_router.route(self._task(max_latency_ms=100))
+        
+        assert "No provider meets the SLA" in decision.reasoning
+    
+    def test_observed_latency_overrides_typical(self, healthy_router):
+        """Enough observed samples replace configured latency."""
+        healthy_router.SLA_REFRESH_SECONDS = 0
+        for _ in range(healthy_router.SLA_MIN_SAMPLES):
+            healthy_router.record_latency("groq", 2000)
+        
+        decision = healthy_router.route(self._task(max_latency_ms=1500))
+        
+        assert decision.provider_id == "openai"
+        assert decision.estimated_latency_ms == 1200
+    
+    def test_other_requirements_still_apply(self, healthy_router):
+        """Hard requirements outside the frontier are honoured."""
+        decision = healthy_router.route(
+            self._task(min_quality_score=0.86, min_context=100_000)
+        )
+        
+        assert decision.provider_id == "openai"
+    
+    def test_frontier_matches_brute_force(self):
+        """Frontier queries agree with a linear scan."""
+        import random
+        from src.engine.sla import FrontierEntry, SLAFrontier
+        
+        rng = random.Random(7)
+        entries = [
+            FrontierEntry(
+                f"p{i}",
+                rng.uniform(0.1, 10),
+                rng.uniform(0.6, 1.0),
+                rng.choice([200, 500, 800, 1500, 3000]),
+            )
+            for i in range(40)
+        ]
+        frontier = SLAFrontier(entries)
+        
+        for _ in range(500):
+            q, lat = rng.uniform(0.5, 1.0), rng.uniform(100, 4000)
+            feasible = [e for e in entries if e.quality >= q and e.latency_ms <= lat]
+            expected = min(feasible, key=lambda e: e.cost) if feasible else None
+            assert frontier.cheapest(q, lat) == expected
+    
+    def test_latency_percentile(self):
+        """Tracker reports nearest-rank p95 over its window."""
+        from src.engine.sla import LatencyTracker
+        
+        tracker = LatencyTracker(window=100)
+        for ms in range(1, 201):
+            tracker.record("p", ms)
+        
+        assert tracker.count("p") == 100
+        assert tracker.percentile("p", 0.95) == 195
+        assert tracker.percentile("missing") is None
+
+
+class TestDeadlineRouting:
+    """Test deadline-aware candidate filtering and cancellation."""
+    
+    @staticmethod
+    def _task(seconds):
+        from datetime import datetime, timedelta
+        
+        return Task(
+            id="deadline",
+            prompt="What is the capital of France?",
+            deadline=datetime.utcnow() + timedelta(seconds=seconds),
+        )
+    
+    def test_slow_providers_dropped(self, healthy_router):
+        """Providers predicted slower than the time left are not candidates."""
+        candidates = healthy_router._get_candidates(self._task(1.0))
+        
+        assert [p.id for p in candidates] == ["groq"]
+    
+    def test_expired_deadline_falls_back(self, healthy_router):
+        """A passed deadline routes nowhere."""
+        decision = healthy_router.route(self._task(-1))
+        
+        assert "Deadline passed" in decision.reasoning
+    
+    @pytest.mark.asyncio
+    async def test_cascade_cancels_at_deadline(self, healthy_router):
+        """A call still running at the deadline is cancelled promptly."""
+        import asyncio
+        from src.engine.cascade import min_length_validator
+        
+        cancelled = []
+        
+        async def execute(provider, task):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(provider.id)
+                raise
+        
+        start = time.time()
+        result = await healthy_router.route_cascade(
+            self._task(0.5), execute, [min_length_validator(1)]
+        )
+        
+        assert time.time() - start < 1.5
+        assert result.deadline_exceeded
+        assert cancelled == ["groq"]
+        assert result.steps[0].error == "Deadline exceeded"
+    
+    def test_adapter_request_timeout_from_deadline(self):
+        """Adapter requests inherit the time left as their timeout."""
+        from src.adapters.base import AdapterRequest
+        
+        request = AdapterRequest.from_task(self._task(2.0))
+        
+        assert 1.5 < request.timeout <= 2.0
+        assert AdapterRequest.from_task(Task(id="t", prompt="x")).timeout is None
+
+
+class TestHedgedRouting:
+    """Test tail-latency hedging."""
+    
+    @staticmethod
+    def _response(provider, cost=0.01):
+        from src.adapters.base import AdapterResponse
+        
+        return AdapterResponse(
+            content="ok",
+            model="model",
+            provider=provider.id,
+            input_tokens=10,
+            output_tokens=10,
+            total_tokens=20,
+            cost_usd=cost,
+        )
+    
+    @pytest.fixture
+    def hedging_router(self, healthy_providers):
+        from src.engine.hedging import HedgeBudget
+        from tests.conftest import MemoryStore
+        
+        router = Router(MemoryStore(healthy_providers), hedge_budget=HedgeBudget(ratio=1.0))
+        # Every provider is expected to stream its first token quickly
+        for provider_id in healthy_providers:
+            for _ in range(router.SLA_MIN_SAMPLES):
+                router.first_token_latency.record(provider_id, 50)
+        return router
+    
+    @staticmethod
+    def _task():
+        return Task(id="hedge", prompt="Implement a binary search in Python", tenant_id="acme")
+    
+    @pytest.mark.asyncio
+    async def test_fast_primary_is_not_hedged(self, hedging_router):
+        """A primary streaming within its quantile runs alone."""
+        async def execute(provider, task, on_first_token):
+            on_first_token()
+            return self._response(provider)
+        
+        result = await hedging_router.route_hedged(self._task(), execute)
+        
+        assert not result.hedged
+        assert result.winner == "primary"
+        assert result.duplicate_cost_usd == 0.0
+    
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged_and_cancelled(self, hedging_router):
+        """A stalled primary triggers a backup, which wins."""
+        import asyncio
+        
+        cancelled, started = [], []
+        
+        async def execute(provider, task, on_first_token):
+            started.append(provider.id)
+            if len(started) == 1:
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    cancelled.append(provider.id)
+                    raise
+            on_first_token()
+            return self._response(provider)
+        
+        result = await hedging_router.route_hedged(self._task(), execute)
+        
+        assert result.hedged
+        assert result.winner == "backup"
+        assert result.provider_id == result.backup_provider_id == started[1]
+        assert cancelled == [started[0]]
+        assert result.duplicate_cost_usd >= 0.0
+        assert hedging_router.cost_calc.ledger.total_spend("acme") == pytest.approx(result.total_cost)
+    
+    @pytest.mark.asyncio
+    async def test_budget_limits_hedging(self, hedging_router):
+        """Without budget, a slow primary is simply awaited."""
+        import asyncio
+        from src.engine.hedging import HedgeBudget
+        
+        hedging_router.hedge_budget = HedgeBudget(ratio=0.0)
+        
+        async def execute(provider, task, on_first_token):
+            await asyncio.sleep(0.2)
+            return self._response(provider)
+        
+        result = await hedging_router.route_hedged(self._task(), execute)
+        
+        assert not result.hedged
+        assert result.winner == "primary"
+    
+    @pytest.mark.asyncio
+    async def test_early_primary_failure_starts_backup(self, hedging_router):
+        """A primary failing inside the hedge window fails over at once."""
+        import asyncio
+        from src.engine.hedging import HedgeBudget
+        
+        hedging_router.hedge_budget = HedgeBudget(ratio=0.0)
+        for provider_id in hedging_router.store.get_all_providers():
+            for _ in range(hedging_router.SLA_MIN_SAMPLES):
+                hedging_router.first_token_latency.record(provider_id, 10_000)
+        started = []
+        
+        async def execute(provider, task, on_first_token):
+            started.append(provider.id)
+            if len(started) == 1:
+                raise RuntimeError("connection reset")
+            on_first_token()
+            return self._response(provider)
+        
+        start = time.monotonic()
+        result = await asyncio.wait_for(hedging_router.route_hedged(self._task(), execute), 5)
+        
+        assert time.monotonic() - start < 1.0
+        assert not result.hedged
+        assert result.winner == "backup"
+        assert result.provider_id == result.backup_provider_id == started[1]
+        assert result.error is None
+    
+    @pytest.mark.asyncio
+    async def test_rejected_task_is_not_dispatched(self, hedging_router):
+        """A task routing found no candidate for returns the routing error."""
+        from datetime import datetime, timedelta
+        
+        task = self._task()
+        task.deadline = datetime.utcnow() - timedelta(seconds=1)
+        started = []
+        
+        async def execute(provider, task, on_first_token):
+            started.append(provider.id)
+            return self._response(provider)
+        
+        result = await hedging_router.route_hedged(task, execute)
+        
+        assert started == []
+        assert result.response is None
+        assert result.provider_id is None
+        assert "Deadline passed" in result.error
+    
+    @pytest.mark.asyncio
+    async def test_hedge_wait_is_capped_by_deadline(self, hedging_router):
+        """A hedge delay past the deadline neither overruns it nor hedges."""
+        import asyncio
+        from datetime import datetime, timedelta
+        
+        for provider_id in hedging_router.store.get_all_providers():
+            for _ in range(hedging_router.SLA_MIN_SAMPLES):
+                hedging_router.first_token_latency.record(provider_id, 10_000)
+                hedging_router.record_latency(provider_id, 50)
+        task = self._task()
+        task.deadline = datetime.utcnow() + timedelta(seconds=0.3)
+        started = []
+        
+        async def execute(provider, task, on_first_token):
+            started.append(provider.id)
+            await asyncio.sleep(5)
+            return self._response(provider)
+        
+        start = time.monotonic()
+        result = await hedging_router.route_hedged(task, execute)
+        
+        assert time.monotonic() - start < 1.0
+        assert not result.hedged
+        assert len(started) == 1
+        assert result.error == "Deadline exceeded"
+    
+    def test_budget_caps_hedge_rate(self):
+        """Hedges never exceed the configured share of requests."""
+        from src.engine.hedging import HedgeBudget
+        
+        budget = HedgeBudget(ratio=0.1, burst=2)
+        for _ in range(1000):
+            budget.on_request()
+            budget.try_acquire()
+        
+        assert budget.hedge_rate <= 0.1
+
+
+class TestExplorationBudget:
+    """Test priority-aware exploration and propensity logging."""
+    
+    @staticmethod
+    def _task(priority):
+        return Task(id="explore", prompt="Summarize this note", priority=priority)
+    
+    def test_critical_never_explores(self, healthy_router):
+        """CRITICAL traffic always gets the top provider."""
+        healthy_router.exploration.credits = healthy_router.exploration.burst
+        
+        decisions = [healthy_router.route(self._task(TaskPriority.CRITICAL)) for _ in range(200)]
+        
+        assert not any(d.explored for d in decisions)
+        assert all(d.propensity == 1.0 for d in decisions)
+    
+    def test_low_priority_spends_budget(self, healthy_router):
+        """Background traffic explores, within the configured rate."""
+        budget = healthy_router.exploration
+        
+        decisions = [healthy_router.route(self._task(TaskPriority.BACKGROUND)) for _ in range(2000)]
+        
+        assert any(d.explored for d in decisions)
+        assert budget.exploration_rate <= budget.rate + budget.burst / 2000
+    
+    def test_normal_only_uses_surplus(self):
+        """Higher priorities draw only on credits above their reserve."""
+        from src.engine.exploration import ExplorationBudget
+        
+        budget = ExplorationBudget(rate=0.05, burst=20)
+        budget.credits = 5
+        
+        assert budget.probability(TaskPriority.LOW, 0.001) == 1.0
+        assert budget.probability(TaskPriority.NORMAL, 0.001) == 0.0
+        
+        budget.credits = 20
+        assert budget.probability(TaskPriority.NORMAL, 0.001) == 1.0
+        assert budget.probability(TaskPriority.NORMAL, 0.10) == pytest.approx(0.1)
+        assert budget.probability(TaskPriority.CRITICAL, 0.001) == 0.0
+    
+    def test_propensity_is_logged(self, healthy_router):
+        """Decisions carry the selection probability of their provider."""
+        healthy_router.exploration.credits = healthy_router.exploration.burst
+        
+        decision = healthy_router.route(self._task(TaskPriority.LOW))
+        
+        # Cheap LOW task with a full budget always explores uniformly
+        assert decision.explored
+        assert decision.propensity == pytest.approx(1 / 3)
+        assert decision.to_dict()["propensity"] == decision.propensity
+    
+    def test_failed_spend_logs_greedy_propensity(self, healthy_router, monkeypatch):
+        """Losing the credit to a concurrent request forces the greedy choice."""
+        healthy_router.exploration.credits = healthy_router.exploration.burst
+        monkeypatch.setattr(healthy_router.exploration, "spend", lambda: False)
+        
+        decision = healthy_router.route(self._task(TaskPriority.LOW))
+        
+        assert not decision.explored
+        assert decision.propensity == 1.0
+
+
+class TestPromptCompression:
+    """Test the pre-dispatch prompt compression stage."""
+    
+    TOOL_OUTPUT = "Traceback (most recent call last): File app.py line 12 in main ValueError: bad input"
+    
+    def test_whitespace_keeps_indentation(self):
+        """Trailing spaces and blank runs go; indentation and inner spacing stay."""
+        from src.engine.compression import PromptCompressor
+        
+        result = PromptCompressor().compress("\n    x = {'a':   1}   \n\n\n\nprint(x)\n")
+        
+        assert result.prompt == "    x = {'a':   1}\n\nprint(x)"
+    
+    def test_whitespace_keeps_fenced_code(self):
+        """Fenced code blocks are left exactly as written."""
+        from src.engine.compression import PromptCompressor
+        
+        code = '```python\ns = """a  \n\n\n\nb"""  \n```'
+        result = PromptCompressor().compress(f"Explain:   \n\n\n{code}\n\n\nThanks")
+        
+        assert result.prompt == f"Explain:\n\n{code}\n\nThanks"
+    
+    def test_zero_budget_keeps_prompt(self, mock_provider):
+        """A system prompt filling the context doesn't erase the prompt."""
+        from src.engine.compression import PromptCompressor
+        
+        prompt = "Summarize:\n\n" + "x" * 400
+        task = Task(
+            id="test",
+            prompt=prompt,
+            system_prompt="s" * mock_provider.capabilities.max_context * 4,
+        )
+        compressor = PromptCompressor()
+        assert compressor.budget_for(task, mock_provider) == 0
+        
+        result = compressor.compress_task(task, mock_provider)
+        
+        assert task.prompt == prompt
+        assert result.blocks_truncated == 0
+    
+    def test_repeated_blocks_deduplicated(self):
+        """Verbatim repeats of long blocks become a single marker."""
+        from src.engine.compression import PromptCompressor
+        
+        text = "\n\n".join(["Fix this:", self.TOOL_OUTPUT, self.TOOL_OUTPUT, self.TOOL_OUTPUT, "Thanks"])
+        result = PromptCompressor().compress(text)
+        
+        assert result.prompt.count(self.TOOL_OUTPUT) == 1
+        assert result.prompt.count(PromptCompressor.DUPLICATE_MARKER) == 1
+        assert result.blocks_deduplicated == 2
+        assert result.tokens_saved > 0
+    
+    def test_truncation_keeps_instruction_and_recent_history(self):
+        """Over budget, the oldest middle blocks are dropped."""
+        from src.engine.compression import PromptCompressor
+        
+        turns = [f"turn {i}: " + "x" * 400 for i in range(20)]
+        result = PromptCompressor().compress("\n\n".join(["Summarize:"] + turns), budget_tokens=600)
+        
+        assert result.compressed_tokens <= 600
+        assert result.prompt.startswith("Summarize:")
+        assert "turn 19:" in result.prompt
+        assert "turn 0:" not in result.prompt
+        assert result.blocks_truncated > 0
+    
+    def test_message_history_fits_budget(self):
+        """System messages and the latest turn survive truncation."""
+        from src.engine.compression import PromptCompressor
+        
+        messages = [{"role": "system", "content": "Be terse."}]
+        messages += [{"role": "user", "content": f"m{i} " + "y" * 200} for i in range(10)]
+        kept = PromptCompressor().compress_messages(messages, budget_tokens=200)
+        
+        assert kept[0]["role"] == "system"
+        assert kept[-1]["content"].startswith("m9")
+        assert len(kept) < len(messages)
+    
+    def test_router_reports_tokens_saved(self, healthy_providers):
+        """With a compressor configured, decisions report the savings."""
+        from src.engine.compression import PromptCompressor
+        from tests.conftest import MemoryStore
+        
+        prompt = "\n\n".join(["Debug this error"] + [self.TOOL_OUTPUT] * 5)
+        task = Task(id="t", prompt=prompt)
+        router = Router(MemoryStore(healthy_providers), compressor=PromptCompressor())
+        decision = router.route(task)
+        
+        assert decision.tokens_saved > 0
+        assert task.prompt.count(self.TOOL_OUTPUT) == 1
+        assert decision.to_dict()["tokens_saved"] == decision.tokens_saved
+    
+    def test_router_without_compressor_leaves_prompt(self, healthy_router):
+        """Compression is opt-in."""
+        prompt = "Explain   indexing\n\n\n\nplease"
+        task = Task(id="t", prompt=prompt)
+        decision = healthy_router.route(task)
+        
+        assert decision.tokens_saved is None
+        assert task.prompt == prompt
+
+
+class TestChunkedRouting:
+    """Test chunk-and-reduce for inputs larger than any context window."""
+    
+    PARAGRAPH = "lorem ipsum dolor sit amet " * 150  # ~1k tokens
+    
+    @staticmethod
+    def _response(provider, content):
+        from src.adapters.base import AdapterResponse
+        
+        return AdapterResponse(
+            content=content,
+            model="model",
+            provider=provider.id,
+            input_tokens=10,
+            output_tokens=10,
+            total_tokens=20,
+            cost_usd=0.01,
+        )
+    
+    def _huge_task(self, paragraphs=300):
+        prompt = "\n\n".join(f"section {i}: {self.PARAGRAPH}" for i in range(paragraphs))
+        return Task(id="huge", prompt=prompt, intent=TaskIntent.SUMMARIZATION, tenant_id="acme")
+    
+    def test_split_text_respects_budget(self):
+        """Chunks fit the budget and keep the input in order."""
+        from src.engine.chunking import split_text
+        
+        text = "\n\n".join(f"p{i} " + "z" * 300 for i in range(50)) + "\n\n" + "w" * 5000
+        chunks = split_text(text, max_tokens=500)
+        
+        assert all(len(chunk) <= 2000 for chunk in chunks)
+        assert chunks[0].startswith("p0 ")
+        assert "".join(chunks).replace("\n", "") == text.replace("\n", "")
+    
+    def test_route_explains_context_overflow(self, healthy_router):
+        """A task too big for every window is flagged for chunking."""
+        task = self._huge_task()
+        
+        assert healthy_router.exceeds_context(task)
+        assert "route_chunked" in healthy_router.route(task).reasoning
+        assert not healthy_router.exceeds_context(Task(id="t", prompt="short"))
+        
+        declared = Task(id="t", prompt="short", requirements=TaskRequirements(min_context=10_000_000))
+        assert healthy_router.exceeds_context(declared)
+    
+    @pytest.mark.asyncio
+    async def test_map_across_providers_and_reduce(self, healthy_router):
+        """Chunks run in parallel over several providers, then reduce."""
+        calls = []
+        
+        async def execute(provider, subtask):
+            calls.append((provider.id, subtask))
+            return self._response(provider, f"summary of {subtask.id}")
+        
+        task = self._huge_task()
+        result = await healthy_router.route_chunked(task, execute, instruction="Summarize")
+        
+        assert result.chunks > 1
+        assert result.error is None and not result.partial
+        assert result.reduce_rounds == 1
+        assert result.content == "summary of huge:reduce0"
+        assert len(result.providers_used) > 1
+        assert result.total_cost == pytest.approx(0.01 * (result.chunks + 1))
+        
+        for _, subtask in calls:
+            assert subtask.requirements.min_context is None
+            assert subtask.estimate_tokens()[0] <= result.chunk_tokens + 100
+        reduce_prompt = calls[-1][1].prompt
+        assert reduce_prompt.index("huge:map0") < reduce_prompt.index("huge:map1")
+    
+    @pytest.mark.asyncio
+    async def test_failed_chunk_fails_over(self, healthy_router):
+        """A provider error moves the chunk to the next provider."""
+        flaky = {}
+        
+        async def execute(provider, subtask):
+            if subtask.id == "huge:map0" and not flaky:
+                flaky[provider.id] = True
+                raise ConnectionError("reset")
+            return self._response(provider, "ok")
+        
+        result = await healthy_router.route_chunked(self._huge_task(), execute)
+        map0 = [s for s in result.steps if s.stage == "map" and s.index == 0]
+        
+        assert result.content == "ok"
+        assert [s.error for s in map0] == ["reset", None]
+        assert map0[0].provider_id != map0[1].provider_id
+    
+    @pytest.mark.asyncio
+    async def test_large_partials_reduce_hierarchically(self, healthy_router):
+        """Partials too big for one call are reduced in groups first."""
+        async def execute(provider, subtask):
+            if ":map" in subtask.id:
+                return self._response(provider, "x" * 60_000)
+            return self._response(provider, f"combined {subtask.id}")
+        
+        result = await healthy_router.route_chunked(self._huge_task(), execute)
+        
+        assert result.reduce_rounds == 2
+        assert result.content.startswith("combined huge:reduce0")
+        assert sum(1 for s in result.steps if s.stage == "reduce") > 2
+    
+    @pytest.mark.asyncio
+    async def test_admission_uses_whole_job_cost(self, healthy_router):
+        """Cost ceilings and budgets apply to every chunk plus the reduce."""
+        calls = []
+        
+        async def execute(provider, subtask):
+            calls.append(subtask.id)
+            return self._response(provider, "ok")
+        
+        task = self._huge_task()
+        instruction = Router.CHUNK_INSTRUCTION
+        providers = healthy_router._context_relaxed_candidates(task)
+        costs = {
+            p.id: healthy_router._chunked_cost(
+                task, p, instruction, healthy_router._chunk_budget(task, [p], instruction)
+            )
+            for p in providers
+        }
+        cheapest = min(costs.values())
+        assert cheapest > 0.01  # Far more than a single call's estimate
+        
+        # A budget that covers one call but not the whole job
+        healthy_router.cost_calc.set_budget("acme", daily_limit=cheapest / 2)
+        result = await healthy_router.route_chunked(task, execute)
+        assert "cost ceiling" in result.error
+        assert result.chunks == 0 and not calls
+        
+        # Enough for the cheapest provider only
+        healthy_router.cost_calc.set_budget("acme", daily_limit=cheapest * 1.01)
+        result = await healthy_router.route_chunked(self._huge_task(), execute)
+        cheapest_id = min(costs, key=costs.get)
+        assert result.error is None
+        assert result.providers_used == [cheapest_id]
+
+
+class TestCascadeRouting:
+    """Test cheapest-first cascade routing."""
+    
+    @staticmethod
+    def _response(provider, content):
+        from src.adapters.base import AdapterResponse
+        
+        return AdapterResponse(
+            content=content,
+            model=provider.models[0] if provider.models else "model",
+            provider=provider.id,
+            input_tokens=10,
+            output_tokens=10,
+            total_tokens=20,
+            cost_usd=provider.cost.estimate(10, 10),
+        )
+    
+    def test_ladder_climbs_cost_and_quality(self, healthy_router):
+        """Test the ladder starts cheapest and ends at the best quality."""
+        task = Task(id="test", prompt="Implement a function")
+        ladder = healthy_router.cascade_ladder(task)
+        ids = [s.provider.id for s in ladder]
+        
+        assert ids[0] == "deepseek"
+        assert ids[-1] == "openai"
+        qualities = [s.quality_score for s in ladder]
+        assert qualities == sorted(qualities)
+    
+    @pytest.mark.asyncio
+    async def test_cascade_stops_at_first_valid(self, healthy_router):
+        """Test that a passing cheap response is returned without escalating."""
+        from src.engine.cascade import json_validator
+        
+        calls = []
+        
+        async def execute(provider, task):
+            calls.append(provider.id)
+            return self._response(provider, '{"answer": 42}')
+        
+        task = Task(id="test", prompt="Return JSON", tenant_id="acme")
+        result = await healthy_router.route_cascade(task, execute, [json_validator()])
+        
+        assert result.validated
+        assert calls == ["deepseek"]
+        assert result.escalations == 0
+        assert healthy_router.cost_calc.get_spend("acme") == result.total_cost
+    
+    @pytest.mark.asyncio
+    async def test_cascade_escalates_on_failure(self, healthy_router):
+        """Test escalation past invalid responses and provider errors."""
+        from src.engine.cascade import json_validator, min_length_validator
+        
+        async def execute(provider, task):
+            if provider.id == "deepseek":
+                return self._response(provider, "not json")
+            if provider.id == "openai":
+                return self._response(provider, '{"answer": "a long enough answer"}')
+            raise RuntimeError("provider down")
+        
+        task = Task(id="test", prompt="Return JSON")
+        result = await healthy_router.route_cascade(
+            task, execute, [json_validator(), min_length_validator(10)]
+        )
+        
+        assert result.validated
+        assert result.provider_id == "openai"
+        assert result.steps[0].failed_checks == ["json"]
+        assert result.escalations == len(result.steps) - 1
+    
+    def test_self_confidence_validator(self):
+        """Test parsing self-reported confidence."""
+        from src.engine.cascade import self_confidence_validator
+        from src.registry.models import Provider, ProviderCapabilities
+        
+        check = self_confidence_validator(0.7)
+        provider = Provider(
+            id="p",
+            name="P",
+            api_base="https://p",
+            capabilities=ProviderCapabilities(max_context=4096),
+        )
+        task = Task(id="test")
+        
+        assert check(task, self._response(provider, "Answer. Confidence: 0.9"))
+        assert check(task, self._response(provider, '{"confidence": 85%}'))
+        assert not check(task, self._response(provider, "confidence = 0.4"))
+        assert not check(task, self._response(provider, "No score"))
+
+
+class TestBudgetAdmission:
+    """Test budget-aware candidate filtering and downgrading."""
+    
+    @staticmethod
+    def _task():
+        return Task(
+            id="budget",
+            prompt="Write a detailed explanation of database indexing. " * 200,
+            tenant_id="acme",
+        )
+    
+    def test_max_cost_filters_candidates(self, healthy_router):
+        """Providers whose estimate exceeds max_cost are not candidates."""
+        task = self._task()
+        task.requirements = TaskRequirements(max_cost=0.01)
+        
+        candidates = healthy_router._get_candidates(task)
+        
+        assert "openai" not in {p.id for p in candidates}
+        assert "deepseek" in {p.id for p in candidates}
+    
+    def test_remaining_budget_filters_candidates(self, healthy_router):
+        """Remaining daily budget acts as a cost ceiling."""
+        healthy_router.cost_calc.set_budget("acme", daily_limit=1.00)
+        healthy_router.cost_calc.track_spend("acme", "openai", 0.995)
+        
+        candidates = healthy_router._get_candidates(self._task())
+        
+        assert "openai" not in {p.id for p in candidates}
+        assert healthy_router.cost_calc.remaining_budget("acme") == pytest.approx(0.005)
+    
+    def test_exhausted_budget_falls_back(self, healthy_router):
+        """An exhausted budget routes to the fallback with a clear reason."""
+        healthy_router.cost_calc.set_budget("acme", monthly_limit=5.00)
+        healthy_router.cost_calc.track_spend("acme", "openai", 5.00)
+        
+        decision = healthy_router.route(self._task())
+        
+        assert "Tenant budget exhausted" in decision.reasoning
+    
+    def test_budget_pressure_shifts_weights_to_cost(self, healthy_router):
+        """Near the limit, weights blend toward cost."""
+        task = self._task()
+        task.complexity = TaskComplexity.COMPLEX
+        base = healthy_router._weights_for(task)
+        
+        healthy_router.cost_calc.set_budget("acme", daily_limit=10.00)
+        healthy_router.cost_calc.track_spend("acme", "openai", 9.50)
+        pressured = healthy_router._weights_for(task)
+        
+        assert healthy_router.cost_calc.budget_utilization("acme") == pytest.approx(0.95)
+        assert pressured[2] > base[2]
+        assert pressured[0] < base[0]
+        assert sum(pressured) == pytest.approx(1.0)
+    
+    def test_no_budget_is_unrestricted(self, healthy_router):
+        """Tenants without a budget see no filtering or pressure."""
+        assert healthy_router.cost_calc.remaining_budget("acme") is None
+        assert healthy_router.cost_calc.budget_utilization("acme") == 0.0
+        assert len(healthy_router._get_candidates(self._task())) == 3
+
+
 class TestCostCalculator:
     """Test the cost calculator."""
     
@@ -154,6 +1051,276 @@ class TestCostCalculator:
         
         assert ranked[0][0].id == "cheap"
         assert ranked[1][0].id == "expensive"
+    
+    def test_track_and_get_spend(self):
+        """Test calendar period spend."""
+        from datetime import datetime
+        from src.engine.cost import CostCalculator
+        
+        calc = CostCalculator()
+        calc.track_spend("acme", "openai", 1.50, timestamp=datetime(2026, 3, 1, 10))
+        calc.track_spend("acme", "openai", 0.50, timestamp=datetime(2026, 3, 2, 10))
+        
+        assert calc.get_spend("acme", "daily", "2026-03-01") == pytest.approx(1.50)
+        assert calc.get_spend("acme", "monthly", "2026-03") == pytest.approx(2.00)
+        assert calc.get_spend("other", "daily") == 0.0
+
+
+class TestSpendLedger:
+    """Test the time-bucketed spend ledger."""
+    
+    def test_sliding_windows(self):
+        """Test trailing window queries across resolutions."""
+        from datetime import datetime, timedelta
+        from src.engine.ledger import SpendLedger
+        
+        ledger = SpendLedger()
+        now = datetime(2026, 3, 1, 12, 0, 30)
+        for minute in range(180):
+            ledger.record("acme", 1.0, timestamp=now - timedelta(minutes=minute))
+        
+        assert ledger.window_spend("acme", timedelta(minutes=15), now=now) == 15.0
+        assert ledger.window_spend("acme", timedelta(hours=2), now=now) == 120.0
+        assert ledger.burn_rate("acme", timedelta(minutes=15), now=now) == 60.0
+        assert ledger.window_spend("acme", timedelta(minutes=15), now=now + timedelta(hours=1)) == 0.0
+    
+    def test_user_and_session_rollups(self):
+        """Test rollups and LRU eviction of sessions."""
+        from datetime import timedelta
+        from src.engine.ledger import SpendLedger
+        
+        ledger = SpendLedger(max_sessions=2)
+        ledger.record("acme", 1.0, user_id="alice", session_id="s1")
+        ledger.record("acme", 2.0, user_id="alice", session_id="s2")
+        ledger.record("acme", 4.0, user_id="bob", session_id="s3")
+        
+        assert ledger.total_spend("acme") == 7.0
+        assert ledger.total_spend("alice", scope="user") == 3.0
+        assert ledger.window_spend("s2", timedelta(minutes=5), scope="session") == 2.0
+        assert ledger.total_spend("s1", scope="session") == 0.0
+    
+    def test_ring_memory_is_bounded(self):
+        """Test that old buckets are recycled."""
+        from src.engine.ledger import BucketRing
+        
+        ring = BucketRing(10)
+        for bucket in range(1000):
+            ring.add(bucket, 1.0)
+        
+        assert len(ring.to_dict()["values"]) == 10
+        assert ring.since(0) == 10.0
+        assert ring.since(995) == 5.0
+        assert ring.total == 1000.0
+    
+    def test_late_writes(self):
+        """Test out-of-order writes land in the right window."""
+        from src.engine.ledger import BucketRing
+        
+        ring = BucketRing(10)
+        ring.add(100, 1.0)
+        ring.add(95, 2.0)
+        ring.add(50, 4.0)
+        
+        assert ring.since(100) == 1.0
+        assert ring.since(95) == 3.0
+        assert ring.total == 7.0
+    
+    def test_persistence_round_trip(self, tmp_path):
+        """Test snapshot and restore."""
+        from datetime import timedelta
+        from src.engine.ledger import SpendLedger
+        
+        path = tmp_path / "spend.json"
+        ledger = SpendLedger(persist_path=path, persist_interval=0)
+        ledger.record("acme", 2.5, user_id="alice")
+        ledger.close()
+        
+        restored = SpendLedger(persist_path=path)
+        restored.close()
+        
+        assert restored.window_spend("acme", timedelta(minutes=1)) == 2.5
+        assert restored.total_spend("alice", scope="user") == 2.5
+    
+    def test_persist_runs_off_the_request_path(self, tmp_path, monkeypatch):
+        """Concurrent records schedule one background snapshot per interval."""
+        import threading
+        from src.engine.ledger import SpendLedger
+        
+        path = tmp_path / "spend.json"
+        ledger = SpendLedger(persist_path=path, persist_interval=3600)
+        ledger._last_persist = 0.0
+        callers, release = [], threading.Event()
+        
+        def slow_save(target):
+            callers.append(threading.current_thread().name)
+            release.wait(5)
+        
+        monkeypatch.setattr(ledger, "save", slow_save)
+        threads = [threading.Thread(target=ledger.record, args=("acme", 1.0)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(2)
+        
+        # Every record returned while the snapshot was still being written
+        assert not any(thread.is_alive() for thread in threads)
+        release.set()
+        monkeypatch.undo()
+        ledger.close()
+        
+        restored = SpendLedger(persist_path=path)
+        restored.close()
+        
+        assert callers == ["spend-persist"]
+        assert restored.total_spend("acme") == 8.0
+    
+    def test_concurrent_saves_use_unique_temp_files(self, tmp_path):
+        """Overlapping saves never collide on a temporary file."""
+        import threading
+        from src.engine.ledger import SpendLedger
+        
+        path = tmp_path / "spend.json"
+        ledger = SpendLedger()
+        ledger.record("acme", 1.0)
+        errors = []
+        
+        def save():
+            try:
+                for _ in range(20):
+                    ledger.save(path)
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=save) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert errors == []
+        assert [p.name for p in tmp_path.iterdir()] == ["spend.json"]
+
+
+class TestSharedSpendLedger:
+    """Test cluster-wide spend aggregation."""
+    
+    @staticmethod
+    def _replicas(n=3, **kwargs):
+        from src.engine.shared_ledger import LocalSpendBackend, SharedSpendLedger
+        
+        backend = LocalSpendBackend()
+        return backend, [SharedSpendLedger(backend, **kwargs) for _ in range(n)]
+    
+    def test_spend_is_shared_across_replicas(self):
+        """Every replica sees the cluster-wide tenant total."""
+        _, nodes = self._replicas(flush_interval=0, refresh_interval=0)
+        
+        for node in nodes:
+            node.record("acme", 1.0)
+        
+        for node in nodes:
+            assert node.period_spend("acme", "daily") == pytest.approx(3.0)
+            assert node.period_spend("acme", "monthly") == pytest.approx(3.0)
+    
+    def test_deltas_are_batched(self):
+        """Records accumulate locally and flush in one round trip."""
+        backend, (node,) = self._replicas(1, flush_interval=3600, max_pending=100)
+        
+        for _ in range(99):
+            node.record("acme", 0.01)
+        assert backend.round_trips == 0
+        # Own unflushed spend is always visible locally
+        assert node.period_spend("acme", "daily") == pytest.approx(0.99)
+        
+        node.record("acme", 0.01)
+        assert backend.round_trips == 2  # initial refresh + one flush
+        assert backend.counters[node._counter_key("acme", "daily", time.time())] == pytest.approx(1.0)
+    
+    def test_staleness_is_bounded(self):
+        """Another replica's spend appears once flushed and refreshed."""
+        _, (a, b) = self._replicas(2, flush_interval=3600, refresh_interval=3600)
+        
+        a.record("acme", 5.0)
+        assert b.period_spend("acme", "daily") == 0.0
+        
+        a.flush()
+        b.refresh_interval = 0
+        assert b.period_spend("acme", "daily") == pytest.approx(5.0)
+    
+    def test_failed_flush_requeues(self):
+        """Deltas survive an unreachable backend."""
+        backend, (node,) = self._replicas(1, flush_interval=3600)
+        node.record("acme", 2.0)
+        
+        original = backend.increment
+        backend.increment = lambda deltas, ttls: (_ for _ in ()).throw(ConnectionError())
+        assert node.flush() is False
+        
+        backend.increment = original
+        assert node.flush() is True
+        assert sum(backend.counters.values()) == pytest.approx(4.0)  # day + month
+    
+    def test_idle_node_flushes_on_interval(self):
+        """Spend reaches the backend without further records or reads."""
+        backend, (node,) = self._replicas(1, flush_interval=0.05)
+        node.record("acme", 1.0)  # Not yet due: queued
+        
+        deadline = time.monotonic() + 2.0
+        while sum(backend.counters.values()) == 0.0:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert sum(backend.counters.values()) == pytest.approx(2.0)  # day + month
+        node.close()
+    
+    def test_inflight_batch_counts_in_reads(self):
+        """Spend being flushed is neither lost nor hidden from budget checks."""
+        import threading
+        
+        backend, (node,) = self._replicas(1, flush_interval=3600, refresh_interval=3600)
+        node.period_spend("acme", "daily")  # Cache the cluster total
+        node.record("acme", 3.0)
+        
+        started, release = threading.Event(), threading.Event()
+        original = backend.increment
+        
+        def slow_increment(deltas, ttls):
+            started.set()
+            release.wait()
+            return original(deltas, ttls)
+        backend.increment = slow_increment
+        
+        flusher = threading.Thread(target=node.flush)
+        flusher.start()
+        started.wait()
+        assert node.period_spend("acme", "daily") == pytest.approx(3.0)
+        
+        release.set()
+        flusher.join()
+        assert node.period_spend("acme", "daily") == pytest.approx(3.0)
+    
+    def test_close_flushes_and_stops(self):
+        """Shutdown writes what is still queued."""
+        backend, (node,) = self._replicas(1, flush_interval=3600)
+        node.record("acme", 1.5)
+        node.close()
+        assert not node._thread.is_alive()
+        assert sum(backend.counters.values()) == pytest.approx(3.0)
+    
+    def test_budget_enforced_cluster_wide(self, healthy_providers):
+        """A budget is exhausted by spend spread over replicas."""
+        from src.engine.cost import CostCalculator
+        from tests.conftest import MemoryStore
+        
+        _, nodes = self._replicas(flush_interval=0, refresh_interval=0)
+        calcs = [CostCalculator(ledger=node) for node in nodes]
+        for calc in calcs:
+            calc.set_budget("acme", daily_limit=3.0)
+            calc.track_spend("acme", "openai", 1.0)
+        
+        router = Router(MemoryStore(healthy_providers), cost_calculator=calcs[0])
+        decision = router.route(Task(id="t", prompt="Explain indexing", tenant_id="acme"))
+        
+        assert "Tenant budget exhausted" in decision.reasoning
 
 
 class TestTaskModel:
@@ -183,3 +1350,91 @@ class TestTaskModel:
         
         assert reqs.max_cost == 10.00
         assert reqs.soc2_required is True
+
+
+class TestSnapshotRouting:
+    """Test routing from a memory-mapped registry snapshot."""
+    
+    def test_precomputed_scores_match_live_scoring(self, tmp_path, healthy_router):
+        """Workers on the snapshot score exactly as the exporting router."""
+        from src.registry.snapshot import SnapshotStore
+        
+        path = healthy_router.export_snapshot(tmp_path / "registry.snap")
+        worker = Router(SnapshotStore(path))
+        
+        for intent in (TaskIntent.CODE_IMPLEMENTATION, TaskIntent.RESEARCH, TaskIntent.UNKNOWN):
+            task = Task(id="t", prompt="Write a function", intent=intent)
+            live = healthy_router._score_providers(list(healthy_router.store.get_all_providers().values()), task)
+            mapped = worker._score_providers(list(worker.store.get_all_providers().values()), task)
+            assert [s.to_dict() for s in mapped] == [s.to_dict() for s in live]
+    
+    def test_tables_are_used_instead_of_recomputing(self, tmp_path, healthy_router, monkeypatch):
+        """Providers from the snapshot skip the static score functions."""
+        from src.registry.snapshot import SnapshotStore
+        
+        path = healthy_router.export_snapshot(tmp_path / "registry.snap")
+        worker = Router(SnapshotStore(path))
+        
+        def fail(*args):
+            raise AssertionError("static score recomputed")
+        monkeypatch.setattr(worker, "_calc_quality_score", fail)
+        monkeypatch.setattr(worker, "_calc_cost_score", fail)
+        
+        decision = worker.route(Task(id="t", prompt="Write a Python function to sort a list"))
+        assert decision.provider_id is not None
+
+
+class TestRegistrySwap:
+    """Test hot-swapping the router's registry."""
+    
+    @pytest.fixture
+    def config_router(self, healthy_providers):
+        from src.registry.reload import ConfigStore
+        
+        return Router(ConfigStore(healthy_providers))
+    
+    def test_in_flight_reads_keep_old_providers(self, config_router, healthy_providers):
+        """Providers read before a swap are unaffected by it."""
+        import copy
+        from src.registry.reload import diff_providers
+        
+        in_flight = config_router.store.get_all_providers()
+        new = copy.deepcopy(healthy_providers)
+        new.pop("openai")
+        config_router.reload_registry(diff_providers(healthy_providers, new))
+        
+        assert "openai" in in_flight
+        assert "openai" not in config_router.store.get_all_providers()
+        assert config_router.route(Task(id="t", prompt="Write a function")).provider_id != "openai"
+    
+    def test_only_affected_structures_are_reset(self, config_router, healthy_providers):
+        """Cosmetic changes keep SLA frontiers; removals drop latency samples."""
+        import copy
+        import dataclasses
+        from src.registry.reload import diff_providers
+        
+        config_router._sla_frontier(TaskIntent.UNKNOWN, config_router.store.get_all_providers())
+        built_at = config_router._sla_built_at
+        config_router.record_latency("openai", 500.0)
+        
+        new = copy.deepcopy(healthy_providers)
+        new["openai"].docs_url = "https://example.com/docs"
+        config_router.reload_registry(diff_providers(healthy_providers, new))
+        assert config_router._sla_built_at == built_at
+        
+        newer = copy.deepcopy(new)
+        newer["openai"].cost = dataclasses.replace(newer["openai"].cost, output_per_1m=1.0)
+        config_router.reload_registry(diff_providers(new, newer))
+        assert config_router._sla_built_at == float("-inf")
+        assert config_router.latency.count("openai") == 1
+        
+        del newer["openai"]
+        config_router.reload_registry(diff_providers(new, newer))
+        assert config_router.latency.count("openai") == 0
+    
+    def test_reload_needs_config_store(self, healthy_router):
+        """Diffs only apply to config-backed registries."""
+        from src.registry.reload import ProviderDiff
+        
+        with pytest.raises(TypeError):
+            healthy_router.reload_registry(ProviderDiff())
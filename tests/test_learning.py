@@ -0,0 +1,204 @@
+"""
+Tests for learning and optimization.
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.engine.models import Task, TaskIntent
+from src.learning.classifier import LearnedIntentClassifier
+from src.learning.outcomes import OutcomeStatus, RoutingOutcome
+
+
+@pytest.fixture
+def training_data():
+    """Labelled prompts that avoid the rule-based keywords."""
+    phrases = {
+        TaskIntent.CODE_DEBUGGING: ["why does this crash", "segfault when running"],
+        TaskIntent.SUMMARIZATION: ["give me the gist of", "recap the meeting about"],
+        TaskIntent.TRANSLATION: ["say this in portuguese", "put this into italian"],
+    }
+    subjects = ["the parser", "my service", "the login page"]
+    
+    texts, labels = [], []
+    for intent, prefixes in phrases.items():
+        for prefix in prefixes:
+            for subject in subjects:
+                texts.append(f"{prefix} {subject}")
+                labels.append(intent)
+    return texts, labels
+
+
+class TestLearnedIntentClassifier:
+    """Test the hashed n-gram naive Bayes classifier."""
+    
+    def test_untrained_uses_keyword_rules(self):
+        """Test that an untrained model falls back to keyword rules."""
+        clf = LearnedIntentClassifier()
+        task = Task(id="test", prompt="Implement a sorting algorithm")
+        
+        assert clf.classify(task) == TaskIntent.CODE_IMPLEMENTATION
+    
+    def test_classify_learned_intent(self, training_data):
+        """Test classifying prompts the keyword rules miss."""
+        clf = LearnedIntentClassifier().fit(*training_data)
+        task = Task(id="test", prompt="Recap the meeting about the budget")
+        intent, confidence = clf.classify_with_confidence(task)
+        
+        assert intent == TaskIntent.SUMMARIZATION
+        assert confidence >= clf.min_confidence
+    
+    def test_low_confidence_falls_back(self, training_data):
+        """Test that unfamiliar prompts use the keyword rules."""
+        clf = LearnedIntentClassifier(min_confidence=0.99).fit(*training_data)
+        task = Task(id="test", prompt="Hello")
+        
+        assert clf.classify(task) == TaskIntent.UNKNOWN
+    
+    def test_batch_matches_single(self, training_data):
+        """Test that the vectorized path agrees with single classification."""
+        clf = LearnedIntentClassifier().fit(*training_data)
+        texts, _ = training_data
+        tasks = [Task(id=str(i), prompt=t) for i, t in enumerate(texts)]
+        tasks.append(Task(id="empty", prompt=""))
+        
+        results = clf.batch_classify(tasks)
+        
+        assert results == {t.id: clf.classify(t) for t in tasks}
+    
+    def test_fit_outcomes_skips_failures(self, training_data):
+        """Test training from routing outcomes."""
+        texts, labels = training_data
+        tasks = {str(i): Task(id=str(i), prompt=t) for i, t in enumerate(texts)}
+        outcomes = [
+            RoutingOutcome(
+                outcome_id=f"o{i}",
+                decision_id=f"d{i}",
+                task_id=str(i),
+                provider_id="openai",
+                model=None,
+                status=OutcomeStatus.SUCCESS if i % 5 else OutcomeStatus.FAILURE,
+                task_intent=label.value,
+            )
+            for i, label in enumerate(labels)
+        ]
+        
+        clf = LearnedIntentClassifier().fit_outcomes(tasks, outcomes)
+        
+        assert clf.is_trained
+        assert set(clf.classes) == set(labels)
+    
+    def test_fit_rejects_invalid_weights(self, training_data):
+        """Test that mismatched or all-zero weights are rejected."""
+        texts, labels = training_data
+        clf = LearnedIntentClassifier()
+        
+        with pytest.raises(ValueError):
+            clf.fit(texts, labels, [1.0] * (len(texts) - 1))
+        with pytest.raises(ValueError):
+            clf.fit(texts, labels, [0.0] * len(texts))
+        with pytest.raises(ValueError):
+            clf.fit(texts, labels, [-1.0] + [1.0] * (len(texts) - 1))
+        assert not clf.is_trained
+    
+    def test_save_and_load(self, training_data, tmp_path):
+        """Test model persistence round-trip."""
+        clf = LearnedIntentClassifier().fit(*training_data)
+        path = tmp_path / "model.npz"
+        clf.save(path)
+        
+        loaded = LearnedIntentClassifier.load(path)
+        task = Task(id="test", prompt="say this in portuguese please")
+        
+        assert loaded.classify_with_confidence(task) == clf.classify_with_confidence(task)
+
+
+class TestCostSimulator:
+    """Test the vectorized what-if cost simulator."""
+    
+    @pytest.fixture
+    def history(self):
+        from src.learning.simulator import TrafficHistory
+        
+        records = []
+        for _ in range(50):
+            records.append(("code_implementation", 2000, 800, "openai", 0.9))
+            records.append(("question_answering", 200, 100, "openai", None))
+            records.append(("question_answering", 300, 150, "groq", 0.7))
+        return TrafficHistory.from_records(records)
+    
+    @pytest.fixture
+    def simulator(self, history, healthy_router):
+        from src.learning.simulator import CostSimulator
+        
+        return CostSimulator(history, healthy_router)
+    
+    def test_baseline_matches_per_request_pricing(self, simulator, healthy_providers):
+        """Baseline equals pricing every recorded request individually."""
+        openai = healthy_providers["openai"].cost
+        groq = healthy_providers["groq"].cost
+        expected = 50 * (
+            (2000 * openai.input_per_1m + 800 * openai.output_per_1m) +
+            (200 * openai.input_per_1m + 100 * openai.output_per_1m) +
+            (300 * groq.input_per_1m + 150 * groq.output_per_1m)
+        ) / 1e6
+        
+        assert simulator.baseline().total_cost == pytest.approx(expected)
+    
+    def test_mix_uses_default_and_fractions(self, simulator, healthy_providers):
+        """Mixes split each intent's traffic by fraction."""
+        result = simulator.simulate_mix({
+            "*": {"deepseek": 1.0},
+            "code_implementation": {"openai": 1, "deepseek": 1},
+        })
+        
+        assert result.assignment["code_implementation"] == {"openai": 0.5, "deepseek": 0.5}
+        assert result.assignment["question_answering"] == {"deepseek": 1.0}
+        assert result.total_cost < simulator.baseline().total_cost
+    
+    def test_weight_sweep_matches_router_choice(self, simulator, healthy_router):
+        """Argmax per weight vector agrees with the router's own scoring."""
+        results = simulator.simulate_weights([(1.0, 0, 0, 0), (0, 0, 1.0, 0)])
+        
+        task = Task(id="t", prompt="", intent=TaskIntent.CODE_IMPLEMENTATION)
+        top_quality = max(
+            healthy_router.store.get_all_providers().values(),
+            key=lambda p: healthy_router._calc_quality_score(p, task),
+        )
+        assert results[0].assignment["code_implementation"] == {top_quality.id: 1.0}
+        assert results[1].total_cost < results[0].total_cost
+    
+    def test_pareto_curve_is_monotone(self, simulator):
+        """Frontier costs and qualities both increase."""
+        curve = simulator.pareto_curve(simulator.sweep_weights(steps=6))
+        optimal = simulator.optimal_curve(points=30)
+        
+        for frontier in (curve, optimal):
+            assert frontier
+            costs = [r.total_cost for r in frontier]
+            qualities = [r.mean_quality for r in frontier]
+            assert costs == sorted(costs)
+            assert all(a < b for a, b in zip(qualities, qualities[1:]))
+        
+        # Per-intent optimum is never worse than the weighted router
+        assert optimal[-1].mean_quality >= curve[-1].mean_quality - 1e-9
+    
+    def test_observed_quality_overrides_prior(self, simulator):
+        """Well-rated cells use the observed mean quality."""
+        qa = simulator.intents.index("question_answering")
+        groq = simulator.provider_ids.index("groq")
+        
+        assert simulator.quality[qa, groq] == pytest.approx(0.7)
+    
+    def test_save_and_load(self, history, tmp_path):
+        """Columns round-trip through npz."""
+        from src.learning.simulator import TrafficHistory
+        
+        path = tmp_path / "history.npz"
+        history.save(path)
+        loaded = TrafficHistory.load(path)
+        
+        assert len(loaded) == len(history)
+        assert loaded.intents == history.intents
+        assert np.array_equal(loaded.input_tokens, history.input_tokens)
@@ -67,6 +67,13 @@ class TestRegistryLoader:
         assert provider.id == "test"
         assert provider.capabilities.max_context == 4096
         assert provider.cost.input_per_1m == 1.0
+    
+    def test_create_provider_requires_tier(self):
+        """A config without a tier is rejected rather than made frontier."""
+        loader = RegistryLoader()
+        
+        with pytest.raises(ValueError, match="tier"):
+            loader._create_provider({"id": "test", "api_base": "https://api.test.com"})
 
 
 class TestProviderStore:
@@ -106,3 +113,1092 @@ class TestProviderStore:
         
         assert len(history) == 1
         assert history[0]["status"] == "HEALTHY"
+    
+    def test_sqlite_uses_wal_and_pooled_connections(self, temp_db):
+        """Readers are returned to the pool and reused; the journal is WAL."""
+        with temp_db._read() as first:
+            assert first.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        with temp_db._read() as second:
+            assert second is first
+        
+        with temp_db._write() as writer:
+            assert writer is not first
+    
+    def test_sqlite_concurrent_reads_and_writes(self, temp_db, mock_providers):
+        """Threads can read while a writer saves health checks."""
+        import threading
+        from datetime import datetime
+        from src.registry.models import ProviderHealth, ProviderStatus
+        
+        for provider in mock_providers.values():
+            temp_db.save_provider(provider)
+        errors = []
+        
+        def write():
+            health = ProviderHealth(status=ProviderStatus.HEALTHY, last_checked=datetime.utcnow())
+            for _ in range(50):
+                temp_db.save_health("openai", health)
+        
+        def read():
+            try:
+                for _ in range(50):
+                    assert len(temp_db.get_all_providers()) == len(mock_providers)
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert not errors
+        assert len(temp_db.get_health_history("openai", limit=1000)) == 50
+        assert 1 <= len(temp_db._readers) <= temp_db.max_readers
+        temp_db.close()
+    
+    def test_sqlite_reader_pool_is_bounded(self, tmp_path, mock_provider):
+        """Short-lived threads reuse pooled readers instead of leaking them."""
+        import threading
+        from src.registry.store import SQLiteStore
+        
+        store = SQLiteStore(str(tmp_path / "pool.db"), max_readers=2)
+        store.save_provider(mock_provider)
+        barrier = threading.Barrier(6)
+        errors = []
+        
+        def read():
+            try:
+                barrier.wait()
+                for _ in range(10):
+                    assert store.get_provider(mock_provider.id) is not None
+            except Exception as e:
+                errors.append(e)
+        
+        for _ in range(5):
+            threads = [threading.Thread(target=read) for _ in range(6)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            barrier.reset()
+        
+        assert not errors
+        assert len(store._readers) <= 2
+        store.close()
+    
+    def test_sqlite_in_memory(self, mock_provider):
+        """An in-memory store shares its single connection."""
+        from src.registry.store import SQLiteStore
+        
+        store = SQLiteStore(":memory:")
+        store.save_provider(mock_provider)
+        
+        assert store.get_provider(mock_provider.id) is not None
+
+
+class TestWriteBehind:
+    """Test write-behind batching of health and outcome inserts."""
+    
+    @staticmethod
+    def _health():
+        from datetime import datetime
+        from src.registry.models import ProviderHealth, ProviderStatus
+        
+        return ProviderHealth(status=ProviderStatus.HEALTHY, last_checked=datetime.utcnow())
+    
+    def test_rows_flush_in_one_batch(self):
+        """Queued rows reach the flush function together."""
+        from src.registry.batching import WriteBehindQueue
+        
+        batches = []
+        queue = WriteBehindQueue(batches.append, flush_interval=3600, max_batch=100)
+        for i in range(10):
+            queue.put("health", (i,))
+        queue.put("outcome", ("x",))
+        
+        assert len(queue) == 11
+        assert queue.flush() is True
+        assert batches == [{"health": [(i,) for i in range(10)], "outcome": [("x",)]}]
+        queue.close()
+    
+    def test_batch_size_triggers_background_flush(self):
+        """Reaching max_batch wakes the flusher before the interval."""
+        import time
+        from src.registry.batching import WriteBehindQueue
+        
+        batches = []
+        queue = WriteBehindQueue(batches.append, flush_interval=3600, max_batch=5, max_pending=50)
+        for i in range(5):
+            queue.put("health", (i,))
+        
+        deadline = time.time() + 2
+        while not batches and time.time() < deadline:
+            time.sleep(0.01)
+        assert batches and len(batches[0]["health"]) == 5
+        queue.close()
+    
+    def test_failed_flush_requeues_with_bounded_memory(self):
+        """Failed rows are retried first; the queue never exceeds its bound."""
+        from src.registry.batching import WriteBehindQueue
+        
+        fail = [True]
+        written = []
+        
+        def flush_fn(batch):
+            if fail[0]:
+                raise OSError("disk full")
+            written.extend(batch["health"])
+        
+        queue = WriteBehindQueue(flush_fn, flush_interval=3600, max_batch=10, max_pending=10)
+        for i in range(15):
+            queue.put("health", (i,))
+        
+        assert len(queue) == 10
+        assert queue.dropped == 5
+        assert queue.last_error == "disk full"
+        
+        fail[0] = False
+        queue.close()
+        assert written == [(i,) for i in range(5, 15)]
+    
+    def test_close_flushes_pending(self):
+        """Shutdown writes everything still queued."""
+        from src.registry.batching import WriteBehindQueue
+        
+        batches = []
+        queue = WriteBehindQueue(batches.append, flush_interval=3600)
+        queue.put("health", (1,))
+        queue.close()
+        
+        assert batches == [{"health": [(1,)]}]
+        with pytest.raises(RuntimeError):
+            queue.put("health", (2,))
+    
+    def test_store_batches_and_reads_its_writes(self, tmp_path, mock_provider):
+        """Store reads flush first, so queued rows are visible."""
+        from src.registry.store import SQLiteStore
+        
+        store = SQLiteStore(str(tmp_path / "wb.db"), write_behind=True, flush_interval=3600)
+        store.save_provider(mock_provider)
+        for _ in range(20):
+            store.save_health(mock_provider.id, self._health())
+            store.save_routing_outcome(mock_provider.id, "research", True, 0.9, 0.01, 100)
+        
+        assert len(store._queue) == 40
+        assert len(store.get_health_history(mock_provider.id)) == 20
+        assert store.get_routing_stats(mock_provider.id)["total_requests"] == 20
+        assert store._queue.flushes == 1
+        store.close()
+    
+    def test_store_close_persists_queue(self, tmp_path, mock_provider):
+        """Rows queued at shutdown survive a reopen."""
+        from src.registry.store import SQLiteStore
+        
+        path = str(tmp_path / "wb.db")
+        store = SQLiteStore(path, write_behind=True, flush_interval=3600)
+        store.save_health(mock_provider.id, self._health())
+        store.close()
+        
+        assert len(SQLiteStore(path).get_health_history(mock_provider.id)) == 1
+
+
+class TestHealthRollups:
+    """Test downsampled health series and retention."""
+    
+    @staticmethod
+    def _now():
+        from datetime import datetime
+        
+        # Recent enough to survive the automatic prune on first write
+        return datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    
+    def _store(self, tmp_path, **kwargs):
+        from src.registry.store import SQLiteStore
+        
+        return SQLiteStore(str(tmp_path / "health.db"), prune_interval=3600, **kwargs)
+    
+    @staticmethod
+    def _save(store, when, latency, status=None, error_rate=0.0):
+        from src.registry.models import ProviderHealth, ProviderStatus
+        
+        store.save_health("openai", ProviderHealth(
+            status=status or ProviderStatus.HEALTHY,
+            last_checked=when,
+            avg_latency_ms=latency,
+            error_rate_24h=error_rate,
+        ))
+    
+    def test_checks_roll_up_into_minute_and_hour_buckets(self, tmp_path):
+        """Rollups carry min/avg/max latency, error rate and status counts."""
+        from datetime import timedelta
+        from src.registry.models import ProviderStatus
+        
+        store = self._store(tmp_path)
+        start = self._now() - timedelta(hours=2)
+        self._save(store, start + timedelta(seconds=5), 100)
+        self._save(store, start + timedelta(seconds=30), 300, ProviderStatus.DEGRADED, 0.5)
+        self._save(store, start + timedelta(seconds=70), 200)
+        
+        minutes = store.get_health_series("openai", start, start + timedelta(hours=1), "minute")
+        assert [p["checks"] for p in minutes] == [2, 1]
+        assert minutes[0]["latency_min"] == 100
+        assert minutes[0]["latency_avg"] == 200
+        assert minutes[0]["latency_max"] == 300
+        assert minutes[0]["error_rate"] == 0.25
+        assert minutes[0]["status_counts"] == {"HEALTHY": 1, "DEGRADED": 1}
+        assert minutes[0]["bucket_start"] == start
+        
+        (hour,) = store.get_health_series("openai", start, start + timedelta(hours=1), "hour")
+        assert hour["checks"] == 3
+        assert hour["latency_avg"] == 200
+        assert hour["status_counts"] == {"HEALTHY": 2, "DEGRADED": 1}
+    
+    def test_rollups_merge_across_writes(self, tmp_path):
+        """Separate flushes into the same bucket accumulate."""
+        from datetime import timedelta
+        
+        store = self._store(tmp_path, write_behind=True, flush_interval=3600)
+        start = self._now() - timedelta(minutes=30)
+        for i in range(6):
+            self._save(store, start + timedelta(seconds=i), 10 * (i + 1))
+            if i == 2:
+                store.flush()
+        
+        (point,) = store.get_health_series("openai", start, start + timedelta(minutes=1), "minute")
+        assert point["checks"] == 6
+        assert (point["latency_min"], point["latency_max"]) == (10, 60)
+        store.close()
+    
+    def test_existing_checks_are_backfilled(self, tmp_path):
+        """Opening a database written before the rollup tables fills them."""
+        import sqlite3
+        from datetime import timedelta
+        
+        path = tmp_path / "health.db"
+        conn = sqlite3.connect(path)
+        conn.execute("""
+            CREATE TABLE health_checks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                provider_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                latency_ms REAL,
+                error_rate REAL,
+                checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        start = self._now() - timedelta(hours=2)
+        conn.executemany(
+            "INSERT INTO health_checks (provider_id, status, latency_ms, error_rate, checked_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                ("openai", "HEALTHY", 100, 0.0, (start + timedelta(seconds=5)).isoformat(" ")),
+                ("openai", "DEGRADED", 300, 0.5, (start + timedelta(seconds=30)).isoformat(" ")),
+                ("openai", "HEALTHY", 200, None, (start + timedelta(seconds=70)).isoformat(" ")),
+            ],
+        )
+        conn.commit()
+        conn.close()
+        
+        store = self._store(tmp_path)
+        minutes = store.get_health_series("openai", start, start + timedelta(hours=1), "minute")
+        assert [p["checks"] for p in minutes] == [2, 1]
+        assert minutes[0]["status_counts"] == {"HEALTHY": 1, "DEGRADED": 1}
+        assert minutes[0]["error_rate"] == 0.25
+        
+        (hour,) = store.get_health_series("openai", start, start + timedelta(hours=1), "hour")
+        assert hour["checks"] == 3
+        assert (hour["latency_min"], hour["latency_avg"], hour["latency_max"]) == (100, 200, 300)
+        
+        # Reopening doesn't count the checks twice
+        store.close()
+        (hour,) = self._store(tmp_path).get_health_series(
+            "openai", start, start + timedelta(hours=1), "hour"
+        )
+        assert hour["checks"] == 3
+    
+    def test_resolution_follows_range(self, tmp_path):
+        """Short recent ranges read raw rows, long ranges coarser rollups."""
+        from datetime import timedelta
+        
+        store = self._store(tmp_path)
+        now = self._now()
+        
+        assert store.series_resolution(now - timedelta(minutes=30), now, now) == "raw"
+        assert store.series_resolution(now - timedelta(hours=6), now, now) == "minute"
+        assert store.series_resolution(now - timedelta(days=30), now, now) == "hour"
+        # Raw rows are gone after three days, even for a short range
+        old = now - timedelta(days=3)
+        assert store.series_resolution(old, old + timedelta(minutes=10), now) == "minute"
+    
+    def test_retention_prunes_each_resolution(self, tmp_path):
+        """Raw rows expire first, then minute and hour rollups."""
+        from datetime import timedelta
+        
+        store = self._store(tmp_path)
+        now = self._now()
+        for days in (1, 5, 30, 500):
+            self._save(store, now - timedelta(days=days), 100)
+        
+        deleted = store.prune_health(now=now)
+        
+        assert deleted == {"raw": 3, "minute": 2, "hour": 1}
+        assert len(store.get_health_history("openai")) == 1
+        month = store.get_health_series(
+            "openai", now - timedelta(days=40), now, "hour"
+        )
+        assert [p["checks"] for p in month] == [1, 1, 1]
+
+
+class TestRoutingStats:
+    """Test incrementally maintained routing statistics."""
+    
+    @staticmethod
+    def _outcome(days_ago=0, task_type="research", success=True, quality=0.8, cost=0.01, latency=100):
+        from datetime import datetime, timedelta
+        
+        return ("openai", task_type, success, quality, cost, latency,
+                datetime.utcnow() - timedelta(days=days_ago))
+    
+    def test_stats_match_outcomes(self, temp_db):
+        """Daily totals reproduce the averages over raw outcomes."""
+        temp_db.save_routing_outcome("openai", "research", True, 0.9, 0.02, 100)
+        temp_db.save_routing_outcome("openai", "research", False, 0.5, 0.04, 300)
+        temp_db.save_routing_outcome("openai", "code", True, None, 0.06, 200)
+        
+        stats = temp_db.get_routing_stats("openai")
+        
+        assert stats["total_requests"] == 3
+        assert stats["success_rate"] == pytest.approx(2 / 3)
+        assert stats["avg_quality"] == pytest.approx(0.7)
+        assert stats["avg_cost"] == pytest.approx(0.04)
+        assert stats["avg_latency_ms"] == pytest.approx(200)
+        assert temp_db.get_routing_stats("openai", task_type="code")["total_requests"] == 1
+        assert temp_db.get_routing_stats("anthropic") is None
+    
+    def test_window_reads_few_daily_rows(self, temp_db):
+        """Outcomes collapse to one row per day and task type."""
+        rows = [self._outcome(days_ago=d % 40) for d in range(400)]
+        temp_db._write_batch({"outcome": rows})
+        
+        with temp_db._read() as conn:
+            daily = conn.execute("SELECT COUNT(*) FROM routing_daily").fetchone()[0]
+        
+        assert daily == 40
+        assert temp_db.get_routing_stats("openai", days=7)["total_requests"] == 70
+        assert temp_db.get_routing_stats("openai", days=30)["total_requests"] == 300
+    
+    def test_existing_outcomes_are_backfilled(self, tmp_path):
+        """Opening a database written before the daily table fills it."""
+        from src.registry.store import SQLiteStore
+        
+        path = str(tmp_path / "old.db")
+        store = SQLiteStore(path)
+        store.save_routing_outcome("openai", "research", True, 0.9, 0.02, 100)
+        store.save_routing_outcome("openai", None, False, 0.5, 0.04, 300)
+        with store._write() as conn:
+            conn.execute("DROP TABLE routing_daily")
+        store.close()
+        
+        stats = SQLiteStore(path).get_routing_stats("openai")
+        
+        assert stats["total_requests"] == 2
+        assert stats["success_rate"] == 0.5
+
+
+class TestProviderRecords:
+    """Test structured provider storage and the decoded-provider cache."""
+    
+    @staticmethod
+    def _provider(provider_id="p1"):
+        from datetime import datetime, timedelta
+        from src.registry.models import ProviderHealth, ProviderStatus
+        
+        return Provider(
+            id=provider_id,
+            name="P1",
+            tier=ProviderTier.AGGREGATOR,
+            api_base="https://p1.example/v1",
+            api_key_env="P1_KEY",
+            capabilities=ProviderCapabilities(
+                max_context=32_000,
+                specialties={"code", "reasoning"},
+                data_residency={"eu"},
+                typical_latency_ms=900,
+            ),
+            cost=ProviderCost(input_per_1m=0.5, output_per_1m=1.5, batch_discount=0.5),
+            health=ProviderHealth(
+                status=ProviderStatus.DEGRADED,
+                last_checked=datetime(2026, 1, 2, 3, 4, 5),
+                avg_latency_ms=850.0,
+                error_rate_24h=0.02,
+                consecutive_failures=2,
+                circuit_open=True,
+                circuit_open_until=datetime.utcnow() + timedelta(minutes=5),
+            ),
+            quality_score=0.8,
+            models=["p1-large"],
+            config={"region": "eu-west"},
+        )
+    
+    def test_record_round_trip(self):
+        """Every field, including health, survives encode/decode."""
+        from src.registry.codec import decode_provider, encode_provider
+        
+        provider = self._provider()
+        decoded = decode_provider(encode_provider(provider))
+        
+        assert decoded.capabilities == provider.capabilities
+        assert decoded.cost == provider.cost
+        assert decoded.health == provider.health
+        assert decoded.tier == provider.tier
+        assert decoded.config == provider.config
+        assert decoded.updated_at == provider.updated_at
+    
+    def test_store_round_trips_health(self, temp_db):
+        """Health and circuit-breaker state persist through the store."""
+        provider = self._provider()
+        temp_db.save_provider(provider)
+        
+        stored = temp_db.get_provider("p1")
+        
+        assert stored.health == provider.health
+        assert not stored.is_healthy
+    
+    def test_reads_are_cached_by_version(self, temp_db):
+        """Unchanged rows aren't decoded again; saves replace them."""
+        temp_db.save_providers([self._provider("p1"), self._provider("p2")])
+        
+        temp_db.get_all_providers()
+        assert temp_db.decodes == 2
+        temp_db.get_all_providers()
+        temp_db.get_provider("p2")
+        assert temp_db.decodes == 2
+        
+        changed = self._provider("p1")
+        changed.quality_score = 0.95
+        temp_db.save_provider(changed)
+        
+        second = temp_db.get_all_providers()
+        assert second["p1"].quality_score == 0.95
+        assert temp_db.decodes == 3
+    
+    def test_unchanged_registry_reuses_providers(self, temp_db):
+        """Until a row changes, every read returns the same providers."""
+        temp_db.save_providers([self._provider("p1"), self._provider("p2")])
+        
+        first = temp_db.get_all_providers()
+        first.pop("p2")
+        second = temp_db.get_all_providers()
+        assert second is not first
+        assert set(second) == {"p1", "p2"}
+        assert second["p1"] is first["p1"]
+        
+        changed = self._provider("p2")
+        changed.quality_score = 0.95
+        temp_db.save_provider(changed)
+        
+        third = temp_db.get_all_providers()
+        assert third["p1"] is first["p1"]
+        assert third["p2"] is not second["p2"]
+        assert third["p2"].quality_score == 0.95
+        
+        with temp_db._write() as conn:
+            conn.execute("DELETE FROM providers WHERE id = 'p1'")
+        assert set(temp_db.get_all_providers()) == {"p2"}
+    
+    def test_cached_reads_are_independent(self, temp_db):
+        """Changing a returned provider doesn't leak into later reads."""
+        from src.registry.models import ProviderStatus
+        
+        temp_db.save_provider(self._provider())
+        first = temp_db.get_provider("p1")
+        first.health.status = ProviderStatus.HEALTHY
+        first.health.circuit_open = False
+        first.models.append("p1-small")
+        first.config["region"] = "us-east"
+        
+        second = temp_db.get_all_providers()["p1"]
+        assert second is not first
+        assert second.health.status == ProviderStatus.DEGRADED
+        assert second.health.circuit_open
+        assert second.models == ["p1-large"]
+        assert second.config == {"region": "eu-west"}
+    
+    def test_reinserted_row_is_not_served_from_cache(self, temp_db):
+        """A deleted and re-inserted row restarts at version 1 but is refetched."""
+        temp_db.save_provider(self._provider())
+        assert temp_db.get_provider("p1").quality_score == 0.8
+        
+        with temp_db._write() as conn:
+            conn.execute("DELETE FROM providers WHERE id = 'p1'")
+        changed = self._provider()
+        changed.quality_score = 0.3
+        temp_db.save_provider(changed)
+        
+        assert temp_db.get_provider("p1").quality_score == 0.3
+        assert temp_db.get_all_providers()["p1"].quality_score == 0.3
+    
+    def test_cache_sees_other_writers(self, tmp_path):
+        """A second store on the same file invalidates by version."""
+        from src.registry.store import SQLiteStore
+        
+        path = str(tmp_path / "shared.db")
+        reader, writer = SQLiteStore(path), SQLiteStore(path)
+        writer.save_provider(self._provider())
+        assert reader.get_provider("p1").quality_score == 0.8
+        
+        changed = self._provider()
+        changed.quality_score = 0.5
+        writer.save_provider(changed)
+        
+        assert reader.get_provider("p1").quality_score == 0.5
+    
+    def test_legacy_rows_still_load(self, tmp_path, mock_provider):
+        """Rows stored as to_dict() JSON without a version column decode."""
+        import json
+        import sqlite3
+        from src.registry.store import SQLiteStore
+        
+        path = tmp_path / "legacy.db"
+        conn = sqlite3.connect(path)
+        conn.execute("""
+            CREATE TABLE providers (
+                id TEXT PRIMARY KEY,
+                config JSON NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute(
+            "INSERT INTO providers (id, config) VALUES (?, ?)",
+            (mock_provider.id, json.dumps(mock_provider.to_dict())),
+        )
+        conn.commit()
+        conn.close()
+        
+        provider = SQLiteStore(str(path)).get_provider(mock_provider.id)
+        
+        assert provider.capabilities == mock_provider.capabilities
+        assert provider.models == mock_provider.models
+
+
+class TestRedisStore:
+    """Test the pipelined Redis store against a local stand-in."""
+    
+    @pytest.fixture
+    def redis_store(self):
+        from src.registry.store import RedisStore
+        from tests.conftest import FakeRedis
+        
+        return RedisStore(client=FakeRedis())
+    
+    @staticmethod
+    def _providers(count):
+        import dataclasses
+        
+        base = list(RegistryLoader().load_defaults().values())
+        return [dataclasses.replace(base[i % len(base)], id=f"p{i}") for i in range(count)]
+    
+    def test_bulk_save_and_fetch_are_one_round_trip(self, redis_store):
+        """Registry size doesn't change the number of round trips."""
+        client = redis_store.client
+        
+        redis_store.save_providers(self._providers(500))
+        assert client.round_trips == 1  # Write and change notification together
+        
+        client.round_trips = 0
+        providers = redis_store.get_all_providers()
+        assert len(providers) == 500
+        assert client.round_trips == 1
+        
+        client.round_trips = 0
+        assert redis_store.get_provider("p42").id == "p42"
+        assert client.round_trips == 1
+    
+    def test_reads_are_cached_by_version(self, redis_store):
+        """Unchanged providers are not decoded again."""
+        redis_store.save_providers(self._providers(3))
+        first = redis_store.get_all_providers()
+        assert redis_store.decodes == 3
+        
+        changed = self._providers(1)[0]
+        changed.quality_score = 0.42
+        redis_store.save_provider(changed)
+        second = redis_store.get_all_providers()
+        
+        assert second["p0"].quality_score == 0.42
+        assert second["p1"] is not first["p1"]
+        assert redis_store.decodes == 4
+    
+    def test_cached_reads_are_independent(self, redis_store):
+        """Changing a returned provider doesn't leak into later reads."""
+        from src.registry.models import ProviderStatus
+        
+        redis_store.save_providers(self._providers(1))
+        first = redis_store.get_provider("p0")
+        first.health.status = ProviderStatus.UNHEALTHY
+        first.enabled = False
+        
+        second = redis_store.get_provider("p0")
+        assert second.health.status != ProviderStatus.UNHEALTHY
+        assert second.enabled
+    
+    def test_reset_version_is_not_served_from_cache(self, redis_store):
+        """A version counter restarted after a delete still invalidates."""
+        redis_store.save_providers(self._providers(1))
+        redis_store.get_all_providers()
+        
+        del redis_store.client.data["federation:providers:version"]["p0"]
+        changed = self._providers(1)[0]
+        changed.quality_score = 0.2
+        redis_store.save_provider(changed)
+        
+        assert redis_store.get_all_providers()["p0"].quality_score == 0.2
+    
+    def test_health_is_one_round_trip_and_trimmed(self, redis_store):
+        """ZADD and trim are pipelined together."""
+        from datetime import datetime
+        from src.registry.models import ProviderHealth, ProviderStatus
+        
+        redis_store.HEALTH_HISTORY = 3
+        health = ProviderHealth(status=ProviderStatus.HEALTHY, last_checked=datetime.utcnow())
+        for latency in range(5):
+            health.avg_latency_ms = float(latency)
+            redis_store.save_health("p0", health)
+        
+        assert redis_store.client.round_trips == 5
+        history = redis_store.get_health_history("p0")
+        assert [h["latency_ms"] for h in history] == [4.0, 3.0, 2.0]
+    
+    def test_legacy_layout_still_reads(self, redis_store, mock_provider):
+        """Providers saved as per-provider hashes are still returned."""
+        import json
+        
+        client = redis_store.client
+        client.sadd("federation:providers", mock_provider.id)
+        client.hset(
+            f"federation:provider:{mock_provider.id}",
+            mapping={"config": json.dumps(mock_provider.to_dict())},
+        )
+        
+        assert set(redis_store.get_all_providers()) == {mock_provider.id}
+        assert redis_store.get_provider(mock_provider.id).models == mock_provider.models
+
+
+class TestRegistryInvalidation:
+    """Test cross-node cache invalidation over pub/sub."""
+    
+    @pytest.fixture
+    def nodes(self):
+        from src.registry.store import RedisStore
+        from tests.conftest import FakeRedis
+        
+        client = FakeRedis()
+        writer = RedisStore(client=client)
+        reader = RedisStore(client=client)
+        yield writer, reader
+        writer.close()
+        reader.close()
+    
+    def test_subscribed_reads_are_served_locally(self, nodes):
+        """Once current, a subscribed node doesn't touch Redis to read."""
+        writer, reader = nodes
+        writer.save_providers(TestRedisStore._providers(50))
+        reader.subscribe(background=False)
+        
+        reader.get_all_providers()
+        reader.client.round_trips = 0
+        for _ in range(10):
+            assert len(reader.get_all_providers()) == 50
+            assert reader.get_provider("p7").id == "p7"
+        assert reader.client.round_trips == 0
+    
+    def test_provider_save_invalidates_only_affected_entries(self, nodes):
+        """Other providers keep their cached records."""
+        writer, reader = nodes
+        writer.save_providers(TestRedisStore._providers(3))
+        listener = reader.subscribe(background=False)
+        before = reader.get_all_providers()
+        
+        changed = TestRedisStore._providers(1)[0]
+        changed.quality_score = 0.42
+        writer.save_provider(changed)
+        assert listener.poll() == 1
+        assert reader.invalidations == 1
+        
+        reader.client.round_trips = 0
+        decodes = reader.decodes
+        after = reader.get_all_providers()
+        assert reader.client.round_trips == 1
+        assert after["p0"].quality_score == 0.42
+        assert after["p1"].quality_score == before["p1"].quality_score
+        assert reader.decodes == decodes + 1
+    
+    def test_own_and_stale_notifications_are_ignored(self, nodes):
+        """Notifications of the cached version don't invalidate."""
+        writer, reader = nodes
+        writer.save_providers(TestRedisStore._providers(2))
+        reader.subscribe(background=False)
+        reader.get_all_providers()
+        
+        reader.apply_notification({"kind": "providers", "versions": {"p0": 1}})
+        assert reader.invalidations == 0
+        
+        # A node's own save is visible to it before its notification arrives
+        changed = TestRedisStore._providers(1)[0]
+        changed.enabled = False
+        reader.save_provider(changed)
+        assert reader.get_provider("p0").enabled is False
+    
+    def test_health_notifications_need_no_fetch(self, nodes):
+        """Health updates need no fetch and ignore out-of-order samples."""
+        from datetime import datetime
+        from src.registry.models import ProviderHealth, ProviderStatus
+        
+        writer, reader = nodes
+        writer.save_providers(TestRedisStore._providers(2))
+        listener = reader.subscribe(background=False)
+        reader.get_all_providers()
+        
+        writer.save_health("p1", ProviderHealth(
+            status=ProviderStatus.DEGRADED, avg_latency_ms=900.0, last_checked=datetime.utcnow(),
+        ))
+        reader.client.round_trips = 0
+        listener.poll()
+        provider = reader.get_provider("p1")
+        assert reader.client.round_trips == 0
+        assert provider.health.status == ProviderStatus.DEGRADED
+        assert provider.health.avg_latency_ms == 900.0
+        assert reader.health_patches == 1
+        
+        reader.apply_notification({
+            "kind": "health", "id": "p1", "version": 0.0,
+            "health": {"status": "HEALTHY", "latency_ms": 1.0, "error_rate": 0.0, "timestamp": 0.0},
+        })
+        assert reader.get_provider("p1").health.status == ProviderStatus.DEGRADED
+        
+        # A refetched record keeps the newest health seen
+        changed = TestRedisStore._providers(2)[1]
+        changed.quality_score = 0.5
+        writer.save_provider(changed)
+        listener.poll()
+        assert reader.get_provider("p1").health.status == ProviderStatus.DEGRADED
+    
+    def test_malformed_notification_revalidates_everything(self, nodes):
+        """A notification that can't be applied invalidates the whole cache."""
+        writer, reader = nodes
+        writer.save_providers(TestRedisStore._providers(2))
+        listener = reader.subscribe(background=False)
+        reader.get_all_providers()
+
+        writer.publish_changes = False
+        changed = TestRedisStore._providers(1)[0]
+        changed.quality_score = 0.15
+        writer.save_provider(changed)  # Its notification arrives garbled
+        writer.client.publish(reader.channel, '{"kind": "providers", "versi')
+
+        assert listener.poll() == 0
+        assert listener.last_error is not None
+
+        reader.client.round_trips = 0
+        assert reader.get_all_providers()["p0"].quality_score == 0.15
+        assert reader.get_provider("p0").quality_score == 0.15
+        assert reader.client.round_trips == 1
+
+    def test_resubscribe_revalidates_everything(self, nodes):
+        """Missed notifications are recovered with a full fetch."""
+        writer, reader = nodes
+        writer.save_providers(TestRedisStore._providers(2))
+        listener = reader.subscribe(background=False)
+        reader.get_all_providers()
+        
+        listener.stop()
+        changed = TestRedisStore._providers(1)[0]
+        changed.quality_score = 0.1
+        writer.save_provider(changed)  # Not delivered
+        
+        listener._subscribe()
+        assert reader.get_all_providers()["p0"].quality_score == 0.1
+    
+    def test_background_listener_converges(self, nodes):
+        """A change on one node reaches another well under a second."""
+        import time
+        
+        writer, reader = nodes
+        writer.save_providers(TestRedisStore._providers(2))
+        reader.subscribe(poll_interval=0.05)
+        reader.get_all_providers()
+        
+        changed = TestRedisStore._providers(1)[0]
+        changed.quality_score = 0.33
+        writer.save_provider(changed)
+        
+        deadline = time.monotonic() + 1.0
+        while reader.get_provider("p0").quality_score != 0.33:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+
+class TestRegistrySnapshot:
+    """Test memory-mapped registry snapshots."""
+    
+    def test_round_trip_and_tables(self, tmp_path, mock_providers):
+        """Providers and tables read back from the mapped file."""
+        from src.registry.snapshot import RegistrySnapshot, write_snapshot
+        
+        ids = sorted(mock_providers)
+        path = write_snapshot(
+            tmp_path / "registry.snap",
+            mock_providers,
+            {"score": [float(i) for i in range(len(ids))]},
+        )
+        
+        snapshot = RegistrySnapshot(path)
+        assert len(snapshot) == len(ids)
+        assert snapshot.provider_ids() == ids
+        assert snapshot.position(ids[1]) == 1
+        assert snapshot.position("missing") is None
+        assert snapshot.provider_at(0).to_dict() == mock_providers[ids[0]].to_dict()
+        
+        table = snapshot.table("score")
+        assert list(table) == [float(i) for i in range(len(ids))]
+        table.release()
+        snapshot.close()
+    
+    def test_rejects_mismatched_tables_and_foreign_files(self, tmp_path, mock_providers):
+        """Bad input never replaces the file; other files don't map."""
+        from src.registry.snapshot import RegistrySnapshot, write_snapshot
+        
+        with pytest.raises(ValueError):
+            write_snapshot(tmp_path / "bad.snap", mock_providers, {"score": [1.0]})
+        assert not list(tmp_path.iterdir())
+        
+        other = tmp_path / "other.bin"
+        other.write_bytes(b"\0" * 64)
+        with pytest.raises(ValueError):
+            RegistrySnapshot(other)
+    
+    def test_store_picks_up_swapped_file(self, tmp_path, mock_providers):
+        """Readers remap after an atomic swap; old providers stay intact."""
+        from src.registry.snapshot import SnapshotStore, write_snapshot
+        
+        path = write_snapshot(tmp_path / "registry.snap", mock_providers)
+        store = SnapshotStore(path, check_interval=0.0)
+        before = store.get_all_providers()
+        assert store.get_all_providers()["openai"] is before["openai"]
+        
+        updated = dict(mock_providers)
+        del updated["openai"]
+        write_snapshot(path, updated)
+        
+        after = store.get_all_providers()
+        assert store.reloads == 1
+        assert "openai" not in after
+        assert before["openai"].id == "openai"
+    
+    def test_store_is_read_only_without_backing_store(self, tmp_path, mock_providers, mock_provider):
+        """Writes need a backing store."""
+        from src.registry.snapshot import SnapshotStore, write_snapshot
+        from src.registry.store import ReadOnlyStoreError, SQLiteStore
+        
+        path = write_snapshot(tmp_path / "registry.snap", mock_providers)
+        with pytest.raises(ReadOnlyStoreError):
+            SnapshotStore(path).save_provider(mock_provider)
+        with pytest.raises(PermissionError):
+            SnapshotStore(path).save_health(mock_provider.id, mock_provider.health)
+        
+        backing = SQLiteStore(":memory:")
+        SnapshotStore(path, store=backing).save_provider(mock_provider)
+        assert backing.get_provider(mock_provider.id) is not None
+
+
+class TestConfigCache:
+    """Test the RegistryLoader parsed-config cache."""
+    
+    @staticmethod
+    def _write_config(config_dir, providers):
+        config_dir.mkdir(exist_ok=True)
+        for provider_id, quality in providers.items():
+            (config_dir / f"{provider_id}.yaml").write_text(
+                f"- id: {provider_id}\n"
+                f"  api_base: https://{provider_id}.example.com\n"
+                f"  tier: aggregator\n"
+                f"  quality_score: {quality}\n"
+                f"  capabilities:\n"
+                f"    max_context: 32000\n"
+                f"    specialties: [code]\n"
+            )
+    
+    def test_unchanged_files_are_not_parsed_again(self, tmp_path, monkeypatch):
+        """A second loader serves everything from the cache."""
+        import yaml
+        
+        config_dir = tmp_path / "config"
+        self._write_config(config_dir, {"alpha": 0.9, "beta": 0.8})
+        
+        first = RegistryLoader(config_dir, cache_dir=tmp_path / "cache").load_directory()
+        
+        def no_parse(*args, **kwargs):
+            raise AssertionError("config parsed again")
+        monkeypatch.setattr(yaml, "load", no_parse)
+        
+        loader = RegistryLoader(config_dir, cache_dir=tmp_path / "cache")
+        cached = loader.load_directory()
+        assert loader.cache.hits == 2
+        assert {k: p.to_dict() for k, p in cached.items()} == {k: p.to_dict() for k, p in first.items()}
+        assert cached["alpha"].capabilities.specialties == {"code"}
+    
+    def test_only_changed_files_are_parsed(self, tmp_path):
+        """Edits, additions and deletions are picked up per file."""
+        config_dir = tmp_path / "config"
+        self._write_config(config_dir, {"alpha": 0.9, "beta": 0.8})
+        RegistryLoader(config_dir, cache_dir=tmp_path / "cache").load_directory()
+        
+        self._write_config(config_dir, {"beta": 0.5, "gamma": 0.7})
+        (config_dir / "alpha.yaml").unlink()
+        
+        loader = RegistryLoader(config_dir, cache_dir=tmp_path / "cache")
+        providers = loader.load_directory()
+        assert set(providers) == {"beta", "gamma"}
+        assert providers["beta"].quality_score == 0.5
+        assert (loader.cache.hits, loader.cache.misses) == (0, 2)
+    
+    def test_corrupt_cache_and_disabled_cache(self, tmp_path):
+        """A bad cache file is ignored; use_cache=False never writes one."""
+        config_dir = tmp_path / "config"
+        self._write_config(config_dir, {"alpha": 0.9})
+        
+        RegistryLoader(config_dir, cache_dir=tmp_path / "off", use_cache=False).load_directory()
+        assert not (tmp_path / "off").exists()
+        
+        cache_dir = tmp_path / "cache"
+        cache_dir.mkdir()
+        (cache_dir / RegistryLoader.CACHE_FILE).write_text("{not json")
+        assert set(RegistryLoader(config_dir, cache_dir=cache_dir).load_directory()) == {"alpha"}
+    
+    def test_cache_is_opt_in(self, tmp_path, monkeypatch):
+        """Without a cache_dir the loader never writes to the user cache."""
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+        config_dir = tmp_path / "config"
+        self._write_config(config_dir, {"alpha": 0.9})
+        
+        loader = RegistryLoader(config_dir)
+        assert set(loader.load_directory()) == {"alpha"}
+        assert loader.cache is None
+        assert not (tmp_path / "xdg").exists()
+        
+        RegistryLoader(config_dir, use_cache=True).load_directory()
+        assert (tmp_path / "xdg" / "federation" / RegistryLoader.CACHE_FILE).exists()
+    
+    def test_unwritable_cache_is_a_miss(self, tmp_path):
+        """A cache that cannot be written never fails the load."""
+        config_dir = tmp_path / "config"
+        self._write_config(config_dir, {"alpha": 0.9})
+        blocker = tmp_path / "blocker"
+        blocker.write_text("not a directory")
+        
+        for _ in range(2):
+            loader = RegistryLoader(config_dir, cache_dir=blocker / "cache")
+            assert set(loader.load_directory()) == {"alpha"}
+            assert (loader.cache.hits, loader.cache.misses) == (0, 1)
+
+
+class TestHotReload:
+    """Test config diffs, the config watcher and ConfigStore swaps."""
+    
+    def test_diff_reports_fields_and_ignores_runtime_state(self, mock_providers):
+        """Changed field paths are listed; health changes are not config."""
+        import copy
+        import dataclasses
+        from src.registry.models import ProviderHealth, ProviderStatus
+        from src.registry.reload import diff_providers
+        
+        new = copy.deepcopy(mock_providers)
+        new["openai"].cost = dataclasses.replace(new["openai"].cost, input_per_1m=1.0)
+        new["openai"].capabilities.specialties.add("vision")
+        new["deepseek"].health = ProviderHealth(status=ProviderStatus.HEALTHY)
+        removed_id = next(pid for pid in mock_providers if pid not in ("openai", "deepseek"))
+        del new[removed_id]
+        
+        diff = diff_providers(mock_providers, new)
+        assert diff.to_dict() == {
+            "added": [],
+            "removed": [removed_id],
+            "changed": {"openai": ["capabilities.specialties", "cost.input_per_1m"]},
+        }
+        assert diff_providers(mock_providers, copy.deepcopy(mock_providers)).empty
+    
+    def test_watcher_reparses_only_changed_files(self, tmp_path, monkeypatch):
+        """One edited file is parsed; the diff names its provider."""
+        import os
+        from src.registry.reload import ConfigWatcher
+        
+        config_dir = tmp_path / "config"
+        TestConfigCache._write_config(config_dir, {"alpha": 0.9, "beta": 0.8})
+        loader = RegistryLoader(config_dir, use_cache=False)
+        diffs = []
+        watcher = ConfigWatcher(loader, on_change=diffs.append)
+        assert set(watcher.providers) == {"alpha", "beta"}
+        assert watcher.check() is None
+        
+        parsed = []
+        load_file = loader.load_file
+        monkeypatch.setattr(loader, "load_file", lambda path: parsed.append(path.name) or load_file(path))
+        
+        TestConfigCache._write_config(config_dir, {"beta": 0.55, "gamma": 0.7})
+        os.utime(config_dir / "beta.yaml", ns=(1, 1))
+        diff = watcher.check()
+        
+        assert sorted(parsed) == ["beta.yaml", "gamma.yaml"]
+        assert diffs == [diff]
+        assert set(diff.added) == {"gamma"}
+        assert diff.changed["beta"].fields == ["quality_score"]
+    
+    def test_unparseable_file_keeps_previous_state(self, tmp_path):
+        """A half-written file is retried rather than applied."""
+        import os
+        from src.registry.reload import ConfigWatcher
+        
+        config_dir = tmp_path / "config"
+        TestConfigCache._write_config(config_dir, {"alpha": 0.9})
+        watcher = ConfigWatcher(RegistryLoader(config_dir, use_cache=False))
+        
+        (config_dir / "alpha.yaml").write_text("- id: alpha\n  api_base: [unclosed\n")
+        os.utime(config_dir / "alpha.yaml", ns=(1, 1))
+        assert watcher.check() is None
+        assert watcher.last_error is not None
+        assert watcher.providers["alpha"].quality_score == 0.9
+        
+        TestConfigCache._write_config(config_dir, {"alpha": 0.6})
+        assert watcher.check().changed["alpha"].fields == ["quality_score"]
+    
+    def test_config_store_apply_shares_unaffected_providers(self, mock_providers):
+        """A new store is returned; health survives a config change."""
+        import copy
+        from src.registry.models import ProviderHealth, ProviderStatus
+        from src.registry.reload import ConfigStore, diff_providers
+        
+        store = ConfigStore(mock_providers)
+        store.save_health("openai", ProviderHealth(status=ProviderStatus.HEALTHY))
+        
+        new = copy.deepcopy(mock_providers)
+        new["openai"].quality_score = 0.5
+        swapped = store.apply(diff_providers(mock_providers, new))
+        
+        assert store.get_provider("openai").quality_score != 0.5
+        assert swapped.get_provider("openai").quality_score == 0.5
+        assert swapped.get_provider("openai").health.status == ProviderStatus.HEALTHY
+        other = next(pid for pid in mock_providers if pid != "openai")
+        assert swapped.get_provider(other) is store.get_provider(other)
+    
+    def test_config_store_is_read_only_without_backing_store(self, mock_providers, mock_provider):
+        """Provider writes and health history need a backing store."""
+        from src.registry.reload import ConfigStore
+        from src.registry.store import ReadOnlyStoreError
+        
+        store = ConfigStore(mock_providers)
+        with pytest.raises(ReadOnlyStoreError):
+            store.save_provider(mock_provider)
+        with pytest.raises(ReadOnlyStoreError):
+            store.get_health_history("openai")